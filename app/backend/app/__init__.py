@@ -4,10 +4,16 @@ from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
 from app.utils.error_handlers import register_error_handlers
 from app.utils.logger import setup_logging
-from app.services.firebase_service import initialize_firebase
+from app.services.firebase_service import initialize_firebase, init_request_metrics
 from app.config import config
 from redis import Redis
 from app.services.caching_service import init_cache, cache_content, get_cached_content
+from app.services.redis_service import init_redis
+from app.services.job_service import init_jobs
+from app.services.write_behind_service import init_write_behind
+from app.services.search_service import init_search_index
+from app.services.ranked_search_service import init_ranked_search
+from app.services.recommendation_service import init_recommendation_graph
 
 # Configure Redis
 # redis = Redis(host='localhost', port=6379, db=0)
@@ -25,15 +31,30 @@ def create_app(config_name='production'):
     """
     app = Flask(__name__)
 
-    init_cache(app)
-
     # Load configuration
     app.config.from_object(config[config_name])
     config[config_name].init_app(app)
 
+    # Size the content cache from the loaded configuration
+    init_cache(app)
+
     # Initialize Firebase Admin SDK
     initialize_firebase(app)
 
+    # Report per-request Firestore reads and writes
+    init_request_metrics(app)
+
+    # Batch hot user-document updates (e.g. last_login) instead of writing per request
+    init_write_behind(app)
+
+    # Build the in-memory topic search index and keep it in sync with Firestore
+    init_search_index(app)
+    init_ranked_search(app)
+    init_recommendation_graph(app)
+
+    # Connect the shared Redis store used for cross-worker coordination
+    init_redis(app)
+
     # Enable Cross-Origin Resource Sharing (CORS) for API requests
     CORS(app)
 
@@ -43,6 +64,9 @@ def create_app(config_name='production'):
     # Setup rate limiting
     limiter.init_app(app)
 
+    # Start the background job workers
+    init_jobs(app)
+
     # Initialize caching
     # app.cache = init_cache(app)  # Attach cache to app for easy access
 
@@ -57,6 +81,8 @@ def create_app(config_name='production'):
     from app.routes.home_routes import home_bp
     from app.routes.recommendation_routes import recommendation_bp
     from app.routes.search_routes import search_bp
+    from app.routes.health_routes import health_bp
+    from app.routes.job_routes import job_bp
 
     app.register_blueprint(auth_bp, url_prefix='/api/v1/auth')
     app.register_blueprint(lesson_bp, url_prefix='/api/v1/lessons')
@@ -68,6 +94,8 @@ def create_app(config_name='production'):
     app.register_blueprint(home_bp, url_prefix='/api/v1/home')
     app.register_blueprint(recommendation_bp, url_prefix='/api/v1/recommendation')
     app.register_blueprint(search_bp, url_prefix='/api/v1/search')
+    app.register_blueprint(health_bp, url_prefix='/api/v1/health')
+    app.register_blueprint(job_bp, url_prefix='/api/v1/jobs')
 
     # Register error handlers (for global error handling)
     register_error_handlers(app)
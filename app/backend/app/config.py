@@ -21,6 +21,13 @@ class Config:
     FIREBASE_WEB_API_KEY = os.getenv('FIREBASE_WEB_API_KEY')
     FIREBASE_AUTH_BASE_URL = 'https://identitytoolkit.googleapis.com/v1'
 
+    # Shared store for cross-worker coordination (optional)
+    REDIS_URL = os.getenv('REDIS_URL')
+
+    # Background job backend: "redis" (default; startup fails outside debug/testing without
+    # REDIS_URL) or "memory", which only works with a single worker process
+    JOB_BACKEND = os.getenv('JOB_BACKEND')
+
     # Flask-Limiter configurations
     RATELIMIT_DEFAULT = "200 per day;50 per hour"
     RATELIMIT_STORAGE_URL = "memory://"
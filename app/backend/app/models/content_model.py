@@ -1,13 +1,31 @@
 from app.services.firebase_service import db
-from app.services.caching_service import cache_content, get_cached_content
-from app.services.api_service import generate_topic_summary, generate_lessons, generate_quizzes
+from app.services.caching_service import cache_content, get_cached_content, ReadThroughCache
+from app.services.coalescing_service import coalesce_key, single_flight
+from app.services.ranked_search_service import index_content
+from app.models.question_bank_model import add_generated_questions
+from app.services.api_service import generate_topic_summary, generate_lessons, generate_quizzes, get_hf_manager, HuggingFaceManager
+from app.utils.etag import CONTENT_HASH_FIELD, content_hash
 import logging
-from typing import Dict, List, Any
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Any, Tuple, Callable, Iterator, Optional
 import time
 from google.cloud.firestore_v1.transforms import DELETE_FIELD
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 
+MAX_RETRIES = 3
+RETRY_DELAY = 2  # seconds
+
+# Upper bound on lesson pipelines running at once for a single generation
+CONTENT_GENERATION_WORKERS = int(os.getenv('CONTENT_GENERATION_WORKERS', 3))
+
+# Fields a stored content document needs before it is served instead of regenerated
+REQUIRED_CONTENT_FIELDS = {'summary', 'lessons', 'quizzes', 'level'}
+
+# Callback receiving (event name, payload) as each piece of content becomes ready
+ContentEventCallback = Callable[[str, Dict[str, Any]], None]
+
 class ContentGenerationError(Exception):
     """Custom exception for content generation errors"""
     pass
@@ -36,7 +54,53 @@ def sanitize_for_firestore(data: Dict[str, Any]) -> Dict[str, Any]:
             sanitized[key] = value
     return sanitized
 
-def generate_content(user_id: str, topic: str, level: str) -> Dict[str, Any]:
+def _generate_lesson_pipeline(
+    topic: str,
+    outline: str,
+    level: str,
+    api_manager: HuggingFaceManager,
+    index: int = 0,
+    on_event: Optional[ContentEventCallback] = None
+) -> Tuple[List[str], List[Dict[str, Any]]]:
+    """
+    Generates a single lesson and its quiz, retrying the pair on failure.
+
+    Args:
+        topic: The topic for content generation
+        outline: Lesson outline to expand
+        level: Difficulty level selected by the user
+        api_manager: Shared manager whose key budgets pace the requests
+        index: Position of the lesson within the content
+        on_event: Optional callback notified when the lesson and the quiz are ready
+
+    Returns:
+        Tuple of (lesson content, lesson quiz)
+
+    Raises:
+        ContentGenerationError: If the lesson cannot be generated
+    """
+    for attempt in range(MAX_RETRIES):
+        try:
+            lesson_content = generate_lessons(topic=topic, outlines=[outline], level=level, api_manager=api_manager)
+            if on_event:
+                on_event('lesson', {'index': index, 'outline': outline, 'lesson': lesson_content})
+            # Generate quiz based on lesson content
+            lesson_quiz = generate_quizzes(lesson_content=lesson_content)
+            if on_event:
+                on_event('quiz', {'index': index, 'quiz': lesson_quiz})
+            return lesson_content, lesson_quiz
+        except Exception as e:
+            if attempt == MAX_RETRIES - 1:
+                raise ContentGenerationError(f"Failed to generate lesson for outline '{outline}' after {MAX_RETRIES} attempts: {str(e)}")
+            time.sleep(RETRY_DELAY)
+
+def generate_content(
+    user_id: str,
+    topic: str,
+    level: str,
+    concurrent: bool = True,
+    on_event: Optional[ContentEventCallback] = None
+) -> Dict[str, Any]:
     """
     Generates content with improved error handling and Firestore compatibility.
     
@@ -44,6 +108,10 @@ def generate_content(user_id: str, topic: str, level: str) -> Dict[str, Any]:
         user_id: ID of the user requesting the content
         topic: The topic for content generation
         level: Difficulty level selected by the user
+        concurrent: Run the per-lesson pipelines in parallel on a bounded executor
+        on_event: Optional callback receiving 'summary', 'lesson' and 'quiz' events as
+            each piece is generated. Not called when the content comes from the cache
+            or from a generation another request already started.
     
     Returns:
         Dictionary with generated content
@@ -51,22 +119,45 @@ def generate_content(user_id: str, topic: str, level: str) -> Dict[str, Any]:
     Raises:
         ContentGenerationError: If content generation fails
     """
-    MAX_RETRIES = 3
-    RETRY_DELAY = 2  # seconds
-
     # Check cache first
-    cached_content = get_cached_content(topic)
+    cached_content = get_cached_content(topic, level)
+    if cached_content:
+        logging.info(f"Content for '{topic}' found in cache.")
+        return cached_content
+
+    # Concurrent requests for the same topic and level share one generation
+    return single_flight(
+        coalesce_key(topic, level),
+        lambda: _generate_and_store(user_id, topic, level, concurrent, on_event)
+    )
+
+def _generate_and_store(
+    user_id: str,
+    topic: str,
+    level: str,
+    concurrent: bool,
+    on_event: Optional[ContentEventCallback] = None
+) -> Dict[str, Any]:
+    """
+    Runs the generation pipeline, persists the result to Firestore and caches it.
+    Called once per in-flight topic and level by generate_content.
+    """
+    # A generation that finished while we waited for the lock may have filled the cache
+    cached_content = get_cached_content(topic, level)
     if cached_content:
         logging.info(f"Content for '{topic}' found in cache.")
         return cached_content
 
     logging.info(f"Generating content for topic '{topic}' at '{level}' level.")
 
+    # Shared manager so every request draws from the process-wide key budgets
+    api_manager = get_hf_manager()
+
     try:
         # Generate topic summary with retries
         for attempt in range(MAX_RETRIES):
             try:
-                summary = generate_topic_summary(topic, level)
+                summary = generate_topic_summary(topic, level, api_manager=api_manager)
                 break
             except Exception as e:
                 if attempt == MAX_RETRIES - 1:
@@ -78,28 +169,25 @@ def generate_content(user_id: str, topic: str, level: str) -> Dict[str, Any]:
             f"Lesson {i + 1} Outline for {topic} at {level} level"
             for i in range(3)
         ]
+        if on_event:
+            on_event('summary', {'summary': summary, 'lesson_outlines': lesson_outlines})
+
+        # Generate lessons and quizzes; pacing is left to the manager's key budgets
+        if concurrent:
+            workers = max(1, min(CONTENT_GENERATION_WORKERS, len(lesson_outlines)))
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='content-gen') as executor:
+                results = list(executor.map(
+                    lambda item: _generate_lesson_pipeline(topic, item[1], level, api_manager, item[0], on_event),
+                    enumerate(lesson_outlines)
+                ))
+        else:
+            results = [
+                _generate_lesson_pipeline(topic, outline, level, api_manager, index, on_event)
+                for index, outline in enumerate(lesson_outlines)
+            ]
 
-        # Initialize content containers
-        lesson_contents = []
-        quizzes = []
-
-        # Generate lessons and quizzes with retries
-        for outline in lesson_outlines:
-            for attempt in range(MAX_RETRIES):
-                try:
-                    # Pass both outline and level to generate_lessons
-                    lesson_content = generate_lessons(topic=topic, outlines=[outline], level=level)  # Fixed: Added topic parameter
-                    # Generate quiz based on lesson content
-                    lesson_quiz = generate_quizzes(lesson_content=lesson_content)  # Fixed: Added parameter name
-                    break
-                except Exception as e:
-                    if attempt == MAX_RETRIES - 1:
-                        raise ContentGenerationError(f"Failed to generate lesson for outline '{outline}' after {MAX_RETRIES} attempts: {str(e)}")
-                    time.sleep(RETRY_DELAY)
-            
-            lesson_contents.append(lesson_content)
-            quizzes.append(lesson_quiz)
-            time.sleep(RETRY_DELAY)  # Rate limiting between lessons
+        lesson_contents = [lesson_content for lesson_content, _ in results]
+        quizzes = [lesson_quiz for _, lesson_quiz in results]
 
         # Structure the content
         content = {
@@ -113,8 +201,9 @@ def generate_content(user_id: str, topic: str, level: str) -> Dict[str, Any]:
             'status': 'completed'
         }
 
-        # Sanitize content for Firestore
+        # Sanitize content for Firestore, and hash what is stored so downloads can be revalidated by ETag
         sanitized_content = sanitize_for_firestore(content)
+        sanitized_content[CONTENT_HASH_FIELD] = content[CONTENT_HASH_FIELD] = content_hash(sanitized_content)
         
         # Save to Firestore with retry logic
         for attempt in range(MAX_RETRIES):
@@ -128,8 +217,16 @@ def generate_content(user_id: str, topic: str, level: str) -> Dict[str, Any]:
                     # Don't raise here - we can still return the content even if saving fails
                 time.sleep(RETRY_DELAY)
 
-        # Cache the content
-        cache_content(topic, content)
+        # Bank the generated questions so later quizzes for these lessons can be sampled from them
+        try:
+            add_generated_questions(topic, level, quizzes)
+        except Exception as e:
+            logging.error(f"Failed to add generated questions to the question bank: {str(e)}")
+
+        # Cache the content and make it searchable
+        cache_content(topic, content, level)
+        content_reader.prime((topic, level), content)
+        index_content(topic, level, content)
         
         logging.info(f"Content generation for '{topic}' completed successfully.")
         return content
@@ -141,6 +238,79 @@ def generate_content(user_id: str, topic: str, level: str) -> Dict[str, Any]:
         logging.error(f"Unexpected error in content generation: {str(e)}")
         raise ContentGenerationError(f"Failed to generate content: {str(e)}")
 
+def _as_list(value: Any) -> List[Any]:
+    """
+    Returns a list for values stored either as lists or as Firestore-sanitized index maps.
+    """
+    if isinstance(value, dict):
+        return [value[key] for key in sorted(value, key=lambda k: int(k) if str(k).isdigit() else 0)]
+    return list(value or [])
+
+def iter_content_events(content: Dict[str, Any]) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """
+    Yields the same events generate_content emits, rebuilt from finished content.
+
+    Args:
+        content: Generated or stored content document
+
+    Yields:
+        Tuples of (event name, payload)
+    """
+    outlines = _as_list(content.get('lesson_outlines'))
+    yield 'summary', {'summary': content.get('summary'), 'lesson_outlines': outlines}
+    quizzes = _as_list(content.get('quizzes'))
+    for index, lesson in enumerate(_as_list(content.get('lessons'))):
+        outline = outlines[index] if index < len(outlines) else None
+        yield 'lesson', {'index': index, 'outline': outline, 'lesson': lesson}
+        if index < len(quizzes):
+            yield 'quiz', {'index': index, 'quiz': quizzes[index]}
+
+def _load_content(key: Tuple[str, str]) -> Optional[Dict[str, Any]]:
+    """
+    Loads complete content for (topic, level) from the shared cache or Firestore.
+    Returns None if the document is missing or incomplete.
+    """
+    topic, level = key
+    content = get_cached_content(topic, level)
+    if content:
+        if CONTENT_HASH_FIELD not in content:
+            content[CONTENT_HASH_FIELD] = content_hash(content)
+        return content
+
+    content_doc = db.collection('content').document(f"{topic}_{level}").get()
+    if not content_doc.exists:
+        return None
+    content = content_doc.to_dict()
+    # Verify content completeness
+    if not all(field in content for field in REQUIRED_CONTENT_FIELDS):
+        return None
+    logging.info(f"Retrieved existing content for '{topic}' from Firestore")
+    if CONTENT_HASH_FIELD not in content:
+        # Content stored before hashes were recorded; store one so later revalidations stay cheap
+        content[CONTENT_HASH_FIELD] = content_hash(content)
+        try:
+            content_doc.reference.update({CONTENT_HASH_FIELD: content[CONTENT_HASH_FIELD]})
+        except Exception as e:
+            logging.error(f"Failed to store content hash for '{topic}': {str(e)}")
+    cache_content(topic, content, level)
+    return content
+
+# Read-through cache in front of the content collection, keyed by (topic, level)
+content_reader = ReadThroughCache(_load_content, name='content')
+
+def fetch_content_hash(topic: str, level: str) -> Optional[str]:
+    """
+    Returns the stored hash of the content for a topic and level, or None if there is none.
+    Served from memory when the content is cached; otherwise only the hash field is read.
+    """
+    content = content_reader.peek((topic, level))
+    if content is not None:
+        return content.get(CONTENT_HASH_FIELD)
+    snapshot = db.collection('content').document(f"{topic}_{level}").get(field_paths=[CONTENT_HASH_FIELD])
+    if not snapshot.exists:
+        return None
+    return (snapshot.to_dict() or {}).get(CONTENT_HASH_FIELD)
+
 def fetch_content(user_id: str, topic: str, level: str) -> Dict[str, Any]:
     """
     Fetch content with improved error handling and validation.
@@ -166,17 +336,10 @@ def fetch_content(user_id: str, topic: str, level: str) -> Dict[str, Any]:
         raise ValueError(f"Level must be one of: {', '.join(valid_levels)}")
 
     try:
-        # Try to fetch from Firestore
-        content_ref = db.collection('content').document(f"{topic}_{level}")
-        content_doc = content_ref.get()
-        
-        if content_doc.exists:
-            content = content_doc.to_dict()
-            # Verify content completeness
-            required_fields = {'summary', 'lessons', 'quizzes', 'level'}
-            if all(field in content for field in required_fields):
-                logging.info(f"Retrieved existing content for '{topic}' from Firestore")
-                return content
+        # Served from memory for hot topics; Firestore is read only on a miss or refresh
+        content = content_reader.get((topic, level))
+        if content is not None:
+            return content
         
         # Generate new content if not found or incomplete
         logging.info(f"Generating new content for '{topic}' at '{level}' level")
@@ -184,4 +347,4 @@ def fetch_content(user_id: str, topic: str, level: str) -> Dict[str, Any]:
         
     except Exception as e:
         logging.error(f"Error in fetch_content: {str(e)}")
-        raise ContentGenerationError(f"Unable to retrieve or generate content for topic '{topic}'") from e
\ No newline at end of file
+        raise ContentGenerationError(f"Unable to retrieve or generate content for topic '{topic}'") from e
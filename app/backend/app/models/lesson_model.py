@@ -1,48 +1,146 @@
-from app.services.firebase_service import db
+from app.services.firebase_service import db, get_loader
+from app.models.progress_model import apply_completion, apply_download, get_progress_summary, write_with_summary
 from firebase_admin import firestore
+from google.cloud.firestore_v1.field_path import FieldPath
+from app.utils.etag import CONTENT_HASH_FIELD, content_hash
+import base64
+import logging
+import os
 
-def fetch_all_lessons(user_id):
+# Lesson listing page sizes and the fields returned for each lesson in a list view
+LESSONS_PAGE_SIZE = int(os.getenv('LESSONS_PAGE_SIZE', 20))
+LESSONS_MAX_PAGE_SIZE = int(os.getenv('LESSONS_MAX_PAGE_SIZE', 100))
+LESSON_LIST_FIELDS = ['title', 'level']
+
+def encode_lesson_cursor(lesson_id):
+    return base64.urlsafe_b64encode(lesson_id.encode('utf-8')).decode('ascii')
+
+def decode_lesson_cursor(cursor):
+    """
+    Returns the lesson id a cursor points after, or None for the first page.
+
+    Raises:
+        ValueError: If the cursor was not produced by encode_lesson_cursor.
     """
-    Fetches all lessons available for the user.
+    if not cursor:
+        return None
+    try:
+        lesson_id = base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8')
+    except Exception:
+        raise ValueError("Invalid cursor")
+    if not lesson_id or '/' in lesson_id:
+        raise ValueError("Invalid cursor")
+    return lesson_id
+
+class LessonPage:
+    """
+    One page of the lesson listing, ordered by document id so pages are stable as lessons
+    are added. Iterating streams at most limit + 1 projected documents; next_cursor is set
+    once iteration finishes and there are more lessons after this page.
     """
-    lessons = db.collection('lessons').stream()
-    return [lesson.to_dict() for lesson in lessons]
+    def __init__(self, limit=LESSONS_PAGE_SIZE, cursor=None):
+        self.limit = max(1, min(int(limit), LESSONS_MAX_PAGE_SIZE))
+        self.cursor = cursor
+        self.start_after = decode_lesson_cursor(cursor)
+        self.next_cursor = None
+        self.last_id = None
+
+    def resume_cursor(self):
+        """Cursor continuing after the last lesson returned, for resuming a page that failed part-way"""
+        return encode_lesson_cursor(self.last_id) if self.last_id else self.cursor
+
+    def __iter__(self):
+        document_id = FieldPath.document_id()
+        query = db.collection('lessons').order_by(document_id).select(LESSON_LIST_FIELDS)
+        if self.start_after:
+            query = query.start_after({document_id: self.start_after})
+        loader = get_loader()
+        last_id = None
+        count = 0
+        for doc in query.limit(self.limit + 1).stream():
+            loader.record_reads(1)
+            if count == self.limit:
+                self.next_cursor = encode_lesson_cursor(last_id)
+                return
+            count += 1
+            last_id = doc.id
+            yield {'id': doc.id, **(doc.to_dict() or {})}
+            self.last_id = last_id
+
+def fetch_all_lessons(user_id, limit=LESSONS_PAGE_SIZE, cursor=None):
+    """
+    Fetches one page of the lessons available for the user.
+
+    Args:
+        user_id (str): The user's ID.
+        limit (int): Page size, capped at LESSONS_MAX_PAGE_SIZE.
+        cursor (str): The next_cursor returned with the previous page.
+
+    Returns:
+        LessonPage: The page; iterate it to stream the lessons (id, title and level).
+
+    Raises:
+        ValueError: If the cursor is invalid.
+    """
+    return LessonPage(limit, cursor)
 
 def fetch_lesson_by_id(user_id, lesson_id):
     """
     Fetches a specific lesson by lesson_id for the user.
+
+    Lessons are edited outside this service, so the content hash is recomputed on every
+    read; a missing or stale stored hash is replaced, and a 304 is never answered from
+    a hash that no longer matches the lesson.
     """
-    lesson_ref = db.collection('lessons').document(lesson_id)
-    lesson = lesson_ref.get()
-    return lesson.to_dict() if lesson.exists else None
+    loader = get_loader()
+    path = f"lessons/{lesson_id}"
+    lesson = loader.load(path)
+    if lesson is None:
+        return None
+    current_hash = content_hash(lesson)
+    if lesson.get(CONTENT_HASH_FIELD) != current_hash:
+        lesson[CONTENT_HASH_FIELD] = current_hash
+        try:
+            loader.update(path, {CONTENT_HASH_FIELD: current_hash})
+        except Exception as e:
+            logging.error(f"Failed to store content hash for lesson {lesson_id}: {str(e)}")
+    return lesson
 
 def mark_lesson_complete(user_id, lesson_id):
     """
-    Marks a lesson as completed for the user in Firestore.
+    Marks a lesson as completed for the user in Firestore, updating their progress summary
+    in the same transaction.
     """
-    db.collection('users').document(user_id).collection('progress').document(lesson_id).set({
+    write_with_summary(user_id, f"users/{user_id}/progress/{lesson_id}", {
         'completed': True,
-        'completed_at': firestore.SERVER_TIMESTAMP
-    })
+        'status': 'completed',
+        'completed_at': firestore.SERVER_TIMESTAMP,
+        'last_accessed': firestore.SERVER_TIMESTAMP
+    }, lambda summary, now: apply_completion(summary, lesson_id, now))
+    return True
 
 def download_lesson(user_id, lesson_id):
     """
     Marks a lesson as downloaded for offline use by the user.
     """
-    db.collection('users').document(user_id).collection('downloads').document(lesson_id).set({
+    write_with_summary(user_id, f"users/{user_id}/downloads/{lesson_id}", {
         'downloaded': True,
         'downloaded_at': firestore.SERVER_TIMESTAMP
-    })
+    }, lambda summary, now: apply_download(summary, lesson_id, True, now))
+    return True
 
 def delete_downloaded_lesson(user_id, lesson_id):
     """
     Deletes a downloaded lesson from the user's collection.
     """
-    db.collection('users').document(user_id).collection('downloads').document(lesson_id).delete()
+    write_with_summary(user_id, f"users/{user_id}/downloads/{lesson_id}", None,
+                       lambda summary, now: apply_download(summary, lesson_id, False, now))
+    return True
 
 def fetch_progress(user_id):
     """
-    Fetches the user's progress across all lessons.
+    Fetches the user's progress across all lessons, keyed by lesson id, from their
+    progress summary. Each entry has the fields of the lesson's progress document
+    (e.g. completed, completed_at) with status and last_accessed always filled in.
     """
-    progress_ref = db.collection('users').document(user_id).collection('progress').stream()
-    return {doc.id: doc.to_dict() for doc in progress_ref}
+    return get_progress_summary(user_id)['lessons']
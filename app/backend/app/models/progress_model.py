@@ -0,0 +1,225 @@
+from app.services import firebase_service
+from app.services.firebase_service import get_loader
+from firebase_admin import firestore
+from datetime import datetime, timezone
+import logging
+import os
+
+# Number of most recently touched lessons kept in the summary
+PROGRESS_RECENT_LIMIT = int(os.getenv('PROGRESS_RECENT_LIMIT', 10))
+# Most lessons a summary document holds. Entries are a few hundred bytes, so this keeps
+# the document well under Firestore's 1 MiB limit; users past it get a stub summary
+# and their progress is read from the subcollections instead
+PROGRESS_SUMMARY_MAX_LESSONS = int(os.getenv('PROGRESS_SUMMARY_MAX_LESSONS', 2000))
+
+# Status sets kept in the summary, each a sorted list of lesson ids
+STATUS_SETS = ('in_progress', 'completed', 'downloaded')
+
+# A lesson a user starts is counted as co-studied with at most this many of their
+# other lessons (most recent first), which bounds the writes in a progress transaction
+CO_LEARNER_LIMIT = int(os.getenv('CO_LEARNER_LIMIT', 50))
+
+def topic_stats_path(topic_id):
+    """
+    Returns the path of a topic's learner counts, which the recommendation graph is built from.
+    """
+    return f"topic_stats/{topic_id}"
+
+def summary_path(user_id):
+    """
+    Returns the path of a user's progress summary document.
+    """
+    return f"users/{user_id}/aggregates/progress"
+
+def _status_of(progress):
+    return progress.get('status') or ('completed' if progress.get('completed') else 'in_progress')
+
+def _reindex(summary):
+    """Recomputes the status sets and counts from the per-lesson entries"""
+    lessons = summary['lessons']
+    summary['in_progress'] = sorted(lesson_id for lesson_id, entry in lessons.items() if entry['status'] == 'in_progress')
+    summary['completed'] = sorted(lesson_id for lesson_id, entry in lessons.items() if entry['status'] == 'completed')
+    summary['downloaded'] = sorted(set(summary.get('downloaded', [])))
+    for name in STATUS_SETS:
+        summary[f'{name}_count'] = len(summary[name])
+    return summary
+
+def _touch(summary, lesson_id, now):
+    """Moves a lesson to the front of the recent list"""
+    entry = dict(summary['lessons'].get(lesson_id, {}), lesson_id=lesson_id, last_accessed=now)
+    recent = [item for item in summary.get('recent', []) if item['lesson_id'] != lesson_id]
+    summary['recent'] = [entry] + recent[:PROGRESS_RECENT_LIMIT - 1]
+
+def build_summary(progress, downloaded_ids, now=None):
+    """
+    Builds a progress summary from a user's progress documents and downloads.
+
+    Args:
+        progress (dict): Lesson id to progress document.
+        downloaded_ids (iterable): Ids of the user's downloaded lessons.
+        now (datetime): Time recorded as the summary's update time.
+
+    Returns:
+        dict: The summary document.
+    """
+    lessons = {}
+    for lesson_id, data in progress.items():
+        # Entries keep the progress document's own fields (e.g. completed_at), which
+        # fetch_progress and the recent lessons return to clients
+        lessons[lesson_id] = {
+            **data,
+            'status': _status_of(data),
+            'completed': bool(data.get('completed')) or _status_of(data) == 'completed',
+            'last_accessed': data.get('last_accessed') or data.get('completed_at'),
+        }
+    summary = {'lessons': lessons, 'downloaded': list(downloaded_ids)}
+    touched = [lesson_id for lesson_id in lessons if lessons[lesson_id]['last_accessed'] is not None]
+    touched.sort(key=lambda lesson_id: lessons[lesson_id]['last_accessed'], reverse=True)
+    summary['recent'] = [dict(lessons[lesson_id], lesson_id=lesson_id) for lesson_id in touched[:PROGRESS_RECENT_LIMIT]]
+    summary['updated_at'] = now or datetime.now(timezone.utc)
+    return _reindex(summary)
+
+def apply_completion(summary, lesson_id, now):
+    """
+    Records a completed lesson in a summary, in place.
+    """
+    summary['lessons'][lesson_id] = {
+        **summary['lessons'].get(lesson_id, {}),
+        'status': 'completed',
+        'completed': True,
+        'completed_at': now,
+        'last_accessed': now,
+    }
+    _touch(summary, lesson_id, now)
+    summary['updated_at'] = now
+    return _reindex(summary)
+
+def apply_download(summary, lesson_id, downloaded, now):
+    """
+    Records a lesson being downloaded, or its download being deleted, in a summary, in place.
+    """
+    downloaded_ids = set(summary.get('downloaded', []))
+    if downloaded:
+        downloaded_ids.add(lesson_id)
+    else:
+        downloaded_ids.discard(lesson_id)
+    summary['downloaded'] = sorted(downloaded_ids)
+    summary['updated_at'] = now
+    return _reindex(summary)
+
+def co_learner_updates(summary, added_ids):
+    """
+    Returns the topic_stats increments for lessons newly added to a user's summary: each
+    added lesson gains a learner, and each pair of it and another of the user's lessons
+    gains a co-learner on both sides.
+
+    Args:
+        summary (dict): The summary before the lessons were added.
+        added_ids (iterable): Lesson ids the write adds.
+
+    Returns:
+        dict: topic_stats path to fields, for set(..., merge=True).
+    """
+    added_ids = sorted(added_ids)
+    if not added_ids:
+        return {}
+    recent = [item['lesson_id'] for item in summary.get('recent', [])]
+    previous = list(dict.fromkeys(recent + sorted(summary.get('lessons', {}))))
+    previous = [lesson_id for lesson_id in previous if lesson_id not in added_ids][:CO_LEARNER_LIMIT]
+
+    updates = {}
+    for lesson_id in added_ids:
+        others = previous + [other for other in added_ids if other != lesson_id]
+        updates[topic_stats_path(lesson_id)] = {
+            'learners': firestore.Increment(1),
+            'co_learners': {other: firestore.Increment(1) for other in others},
+        }
+    for other in previous:
+        fields = updates.setdefault(topic_stats_path(other), {'co_learners': {}})
+        fields['co_learners'].update({lesson_id: firestore.Increment(1) for lesson_id in added_ids})
+    return updates
+
+def _collect_summary(user_id):
+    """Builds a summary by streaming the user's progress and downloads subcollections"""
+    user_ref = firebase_service.db.collection('users').document(user_id)
+    progress = {doc.id: doc.to_dict() or {} for doc in user_ref.collection('progress').stream()}
+    downloaded_ids = [doc.id for doc in user_ref.collection('downloads').select([]).stream()]
+    get_loader().record_reads(len(progress) + len(downloaded_ids))
+    return build_summary(progress, downloaded_ids)
+
+def _stored_form(summary):
+    """Returns what is stored for a summary: itself, or a stub if it holds too many lessons"""
+    if len(summary['lessons']) > PROGRESS_SUMMARY_MAX_LESSONS:
+        return {'overflow': True, 'updated_at': summary['updated_at']}
+    return summary
+
+def rebuild_progress_summary(user_id):
+    """
+    Rebuilds a user's progress summary from the subcollections and stores it.
+    Used to backfill users who have no summary yet, and to repair one.
+    """
+    summary = _collect_summary(user_id)
+    get_loader().set(summary_path(user_id), _stored_form(summary))
+    logging.info(f"Progress summary rebuilt for user {user_id}: {summary['completed_count']} completed")
+    return summary
+
+def get_progress_summary(user_id):
+    """
+    Returns a user's progress summary: per-lesson status, the in_progress, completed and
+    downloaded lesson id lists with their counts, and the recently touched lessons.
+    Lesson entries carry the fields of their progress documents.
+
+    A single document read; users without a summary are backfilled on first read. Users
+    with more than PROGRESS_SUMMARY_MAX_LESSONS lessons have their summary built from the
+    subcollections on each call.
+    """
+    summary = get_loader().load(summary_path(user_id))
+    if summary is None:
+        summary = rebuild_progress_summary(user_id)
+    elif summary.get('overflow'):
+        summary = _collect_summary(user_id)
+    return summary
+
+def write_with_summary(user_id, path, data, change):
+    """
+    Writes (or, if data is None, deletes) a progress or download document and updates the
+    user's summary in the same transaction, so the two never disagree.
+
+    Args:
+        user_id (str): The user's ID.
+        path (str): Path of the document to write.
+        data (dict): Document data, or None to delete the document.
+        change (callable): Applies the write to a summary dict, given the summary and the time.
+
+    Returns:
+        dict: The updated summary.
+    """
+    client = firebase_service.db
+    summary_ref = client.document(summary_path(user_id))
+    document_ref = client.document(path)
+
+    @firestore.transactional
+    def write(transaction):
+        snapshot = summary_ref.get(transaction=transaction)
+        summary = snapshot.to_dict() if snapshot.exists else None
+        if summary is None or summary.get('overflow'):
+            summary = _collect_summary(user_id)
+        before = {**summary, 'lessons': dict(summary.get('lessons', {}))}
+        change(summary, datetime.now(timezone.utc))
+        if data is None:
+            transaction.delete(document_ref)
+        else:
+            transaction.set(document_ref, data)
+        transaction.set(summary_ref, _stored_form(summary))
+        # Lessons the user studies for the first time update the recommendation graph's counts
+        stats = co_learner_updates(before, set(summary['lessons']) - set(before['lessons']))
+        for stats_path, fields in stats.items():
+            transaction.set(client.document(stats_path), fields, merge=True)
+        return summary, len(stats)
+
+    summary, stats_writes = write(client.transaction())
+    loader = get_loader()
+    loader.record_reads(1)
+    loader.record_writes(2 + stats_writes)
+    loader.forget(path, summary_path(user_id))
+    return summary
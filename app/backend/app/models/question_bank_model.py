@@ -0,0 +1,204 @@
+from app.services.firebase_service import db, get_loader
+import hashlib
+import logging
+import math
+import random
+
+# Difficulty levels a question can have; questions without a known one count as medium
+QUESTION_DIFFICULTIES = ('easy', 'medium', 'hard')
+DEFAULT_DIFFICULTY = 'medium'
+
+# Share of each difficulty in a generated quiz
+QUIZ_DIFFICULTY_MIX = {'easy': 0.3, 'medium': 0.4, 'hard': 0.3}
+
+# Firestore allows at most 500 writes per batch
+BATCH_WRITE_LIMIT = 500
+
+# Questions read per random pivot; short windows keep neighbouring keys from always being drawn together
+SAMPLE_WINDOW = 2
+
+def question_bank(lesson_id):
+    """
+    Returns the lessons/{lesson_id}/questions collection. Each question is its own
+    document with a random_key in [0, 1) and a difficulty, indexed together so a quiz
+    can be sampled with range queries instead of reading every question.
+    """
+    return db.collection('lessons').document(lesson_id).collection('questions')
+
+def _difficulty_of(question):
+    difficulty = str(question.get('difficulty') or DEFAULT_DIFFICULTY).lower()
+    return difficulty if difficulty in QUESTION_DIFFICULTIES else DEFAULT_DIFFICULTY
+
+def generated_lesson_id(topic, level, index):
+    """
+    Returns the question bank id of a lesson generated with a topic's content.
+    """
+    return f"{topic}_{level}_{index}"
+
+def bank_entry(question, index):
+    """
+    Returns a question as stored in the bank: with an id (its position in the lesson if it
+    had none), a normalized difficulty and a fresh random_key.
+    """
+    entry = dict(question)
+    entry['id'] = str(entry.get('id', f"q{index}"))
+    entry['difficulty'] = _difficulty_of(entry)
+    entry['random_key'] = random.random()
+    return entry
+
+def add_questions(lesson_id, questions):
+    """
+    Writes questions into a lesson's question bank in batches.
+
+    Args:
+        lesson_id (str): The lesson ID.
+        questions (list): Questions to add; ids, difficulties and random keys are filled in.
+
+    Returns:
+        list: The stored entries.
+    """
+    bank = question_bank(lesson_id)
+    entries = [bank_entry(question, index) for index, question in enumerate(questions)]
+    for start in range(0, len(entries), BATCH_WRITE_LIMIT):
+        batch = db.batch()
+        for entry in entries[start:start + BATCH_WRITE_LIMIT]:
+            batch.set(bank.document(entry['id']), entry)
+        batch.commit()
+    get_loader().record_writes(len(entries))
+    return entries
+
+def allocate(num_questions, mix=None):
+    """
+    Splits a question count across difficulties in proportion to mix (largest remainder).
+
+    Returns:
+        dict: Difficulty to number of questions.
+    """
+    mix = mix or QUIZ_DIFFICULTY_MIX
+    total = sum(mix.values()) or 1.0
+    shares = {difficulty: num_questions * weight / total for difficulty, weight in mix.items()}
+    counts = {difficulty: int(share) for difficulty, share in shares.items()}
+    remainder = num_questions - sum(counts.values())
+    for difficulty in sorted(shares, key=lambda d: shares[d] - counts[d], reverse=True)[:remainder]:
+        counts[difficulty] += 1
+    return counts
+
+def _read_window(query, pivot, count):
+    """
+    Reads up to count questions from pivot onwards in random_key order, wrapping around
+    to the start of the key space when the tail runs out.
+    """
+    loader = get_loader()
+    found = [doc.to_dict() for doc in query.where('random_key', '>=', pivot).order_by('random_key').limit(count).stream()]
+    loader.record_reads(max(1, len(found)))
+    if len(found) < count:
+        wrapped = query.where('random_key', '<', pivot).order_by('random_key').limit(count - len(found)).stream()
+        wrapped = [doc.to_dict() for doc in wrapped]
+        loader.record_reads(max(1, len(wrapped)))
+        found += wrapped
+    return found
+
+def _range_sample(query, count):
+    """
+    Reads up to count questions as short windows of the random_key order, each starting at
+    its own random pivot, so a quiz is not one contiguous run of neighbouring questions.
+    Gives up after twice the windows a full sample needs, or once a window comes back short
+    (the whole query holds fewer questions than a window).
+    """
+    if count <= 0:
+        return []
+    found = {}
+    for _ in range(2 * math.ceil(count / SAMPLE_WINDOW)):
+        size = min(SAMPLE_WINDOW, count - len(found))
+        window = _read_window(query, random.random(), size)
+        for question in window:
+            found.setdefault(question['id'], question)
+        if len(found) >= count or len(window) < size:
+            break
+    return list(found.values())
+
+def sample_questions(lesson_id, num_questions, mix=None):
+    """
+    Samples questions from a lesson's question bank, stratified by difficulty. Only the
+    selected questions are read. Strata with too few questions are topped up from the
+    whole bank.
+
+    Returns:
+        list: Selected questions in random order; empty if the bank has none.
+    """
+    bank = question_bank(lesson_id)
+    selected = {}
+    for difficulty, count in allocate(num_questions, mix).items():
+        for question in _range_sample(bank.where('difficulty', '==', difficulty), count):
+            selected[question['id']] = question
+
+    shortfall = num_questions - len(selected)
+    if shortfall > 0:
+        for question in _range_sample(bank, shortfall + len(selected)):
+            if len(selected) < num_questions:
+                selected.setdefault(question['id'], question)
+
+    questions = list(selected.values())
+    random.shuffle(questions)
+    return questions
+
+def sample_in_memory(questions, num_questions, mix=None):
+    """
+    Stratified sample of already loaded questions, with the same allocation as sample_questions.
+    """
+    by_difficulty = {}
+    for question in questions:
+        by_difficulty.setdefault(_difficulty_of(question), []).append(question)
+
+    selected = []
+    for difficulty, count in allocate(num_questions, mix).items():
+        pool = by_difficulty.get(difficulty, [])
+        selected += random.sample(pool, min(count, len(pool)))
+
+    chosen = {id(question) for question in selected}
+    rest = [question for question in questions if id(question) not in chosen]
+    selected += random.sample(rest, min(num_questions - len(selected), len(rest)))
+    random.shuffle(selected)
+    return selected
+
+def _generated_question_id(question):
+    text = str(question.get('question', ''))
+    return 'g' + hashlib.sha1(text.encode('utf-8')).hexdigest()[:16]
+
+def add_generated_questions(topic, level, quizzes):
+    """
+    Adds the quiz questions generated with a topic's content to the question bank of each
+    generated lesson. Ids are derived from the question text, so regenerating content grows
+    the bank instead of overwriting it, and repeated questions are stored once.
+
+    Args:
+        topic (str): The topic.
+        level (str): The difficulty level.
+        quizzes (list): One list of generated questions per lesson.
+
+    Returns:
+        int: The number of questions written.
+    """
+    written = 0
+    for index, quiz in enumerate(quizzes or []):
+        questions = [
+            {**question, 'id': question.get('id') or _generated_question_id(question)}
+            for question in (quiz or []) if isinstance(question, dict)
+        ]
+        if questions:
+            written += len(add_questions(generated_lesson_id(topic, level, index), questions))
+    return written
+
+def backfill_question_bank(lesson_id, lesson):
+    """
+    Copies the questions embedded in a legacy lesson document into its question bank.
+
+    Returns:
+        list: The stored entries.
+    """
+    questions = lesson.get('questions') or []
+    if not questions:
+        return []
+    entries = add_questions(lesson_id, questions)
+    logging.info(f"Backfilled question bank for lesson {lesson_id}: {len(entries)} questions")
+    return entries
@@ -1,12 +1,13 @@
-from app.services.firebase_service import db
+from app.services.firebase_service import db, get_loader
 # from app.models.content_model import fetch_random_quiz
+from app.models.question_bank_model import backfill_question_bank, sample_in_memory, sample_questions
+from app.services.grading_service import build_answer_key, submit_batch
 from firebase_admin import firestore
-import random
 
 def generate_quiz(user_id, lesson_id, num_questions=15):
     """
-    Generates a new quiz for a lesson. Dynamically selects questions and supports
-    multiple formats (multiple-choice, single-pick, and text input).
+    Generates a new quiz for a lesson. Dynamically selects questions, stratified by
+    difficulty, and supports multiple formats (multiple-choice, single-pick, and text input).
 
     Args:
         user_id (str): The user's ID.
@@ -16,28 +17,35 @@ def generate_quiz(user_id, lesson_id, num_questions=15):
     Returns:
         str: The generated quiz ID.
     """
-    lesson_ref = db.collection('lessons').document(lesson_id)
-    lesson = lesson_ref.get()
+    # Sample from the lesson's question bank, reading only the selected questions
+    selected_questions = sample_questions(lesson_id, num_questions)
 
-    if not lesson.exists:
-        return None
+    if not selected_questions:
+        # Lessons created before the question bank keep their questions inline; copy them over once
+        lesson = get_loader().load(f"lessons/{lesson_id}")
 
-    questions = lesson.to_dict().get('questions', [])
-    
-    # Randomly select questions for the quiz
-    selected_questions = random.sample(questions, min(len(questions), num_questions))
+        if lesson is None:
+            return None
+
+        selected_questions = sample_in_memory(backfill_question_bank(lesson_id, lesson), num_questions)
+
+    selected_questions = [
+        {key: value for key, value in question.items() if key != 'random_key'}
+        for question in selected_questions
+    ]
     
     quiz_data = {
         'user_id': user_id,
         'lesson_id': lesson_id,
         'questions': selected_questions,
+        'answer_key': build_answer_key(selected_questions),
         'completed': False,
         'score': None,
         'created_at': firestore.SERVER_TIMESTAMP
     }
 
     quiz_ref = db.collection('users').document(user_id).collection('quizzes').document()
-    quiz_ref.set(quiz_data)
+    get_loader().set(quiz_ref.path, quiz_data)
     
     return quiz_ref.id
 
@@ -52,14 +60,15 @@ def fetch_quiz(user_id, quiz_id):
     Returns:
         dict: The quiz data if found.
     """
-    quiz_ref = db.collection('users').document(user_id).collection('quizzes').document(quiz_id)
-    quiz = quiz_ref.get()
-    
-    return quiz.to_dict() if quiz.exists else None
+    quiz = get_loader().load(f"users/{user_id}/quizzes/{quiz_id}")
+    if quiz is not None:
+        quiz.pop('answer_key', None)
+    return quiz
 
 def submit_quiz(user_id, quiz_id, answers):
     """
-    Submits the user's answers and calculates the score for the quiz.
+    Submits the user's answers and calculates the score for the quiz, using the
+    grading engine's stored answer key.
 
     Args:
         user_id (str): The user's ID.
@@ -69,32 +78,8 @@ def submit_quiz(user_id, quiz_id, answers):
     Returns:
         float: The quiz score in percentage.
     """
-    quiz_ref = db.collection('users').document(user_id).collection('quizzes').document(quiz_id)
-    quiz = quiz_ref.get()
-
-    if not quiz.exists:
-        return None
-    
-    quiz_data = quiz.to_dict()
-    questions = quiz_data.get('questions', [])
-    
-    # Calculate score
-    correct_answers = 0
-    total_questions = len(questions)
-    
-    for question in questions:
-        correct_answer = question.get('correct_answer')
-        user_answer = answers.get(question['id'])
-        if correct_answer == user_answer:
-            correct_answers += 1
-
-    score = (correct_answers / total_questions) * 100
-    quiz_ref.update({
-        'completed': True,
-        'score': score
-    })
-    
-    return score
+    result = submit_batch([{'user_id': user_id, 'quiz_id': quiz_id, 'answers': answers}])['results'][0]
+    return result.get('score')
 
 def reset_quiz(user_id, quiz_id):
     """
@@ -104,5 +89,4 @@ def reset_quiz(user_id, quiz_id):
         user_id (str): The user's ID.
         quiz_id (str): The quiz ID.
     """
-    quiz_ref = db.collection('users').document(user_id).collection('quizzes').document(quiz_id)
-    quiz_ref.update({'completed': False, 'score': None})
+    get_loader().update(f"users/{user_id}/quizzes/{quiz_id}", {'completed': False, 'score': None})
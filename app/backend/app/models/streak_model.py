@@ -1,10 +1,154 @@
-from app.services.firebase_service import db
+from app.services import firebase_service
+from app.services.caching_service import ReadThroughCache
+from app.services.firebase_service import get_loader
 from firebase_admin import firestore
+from datetime import date, datetime, timedelta, timezone
+import logging
+import os
+
+# Days shown in the activity heat map by default, and the most that can be requested
+HEATMAP_DAYS = int(os.getenv('STREAK_HEATMAP_DAYS', 365))
+HEATMAP_MAX_DAYS = 3 * 366
+# How long a worker serves its in-memory activity log before re-reading it
+ACTIVITY_CACHE_TTL = float(os.getenv('ACTIVITY_CACHE_TTL', 300))
+
+def activity_path(user_id):
+    """
+    Returns the path of a user's activity log document.
+    """
+    return f"users/{user_id}/aggregates/activity"
+
+def today_utc():
+    return datetime.now(timezone.utc).date()
+
+class ActivityLog(object):
+    """
+    A user's daily activity as a bitmap: bit i is set if the user was active on epoch + i days.
+    Stored as little-endian bytes in one document; streaks come from bit operations on the
+    bitmap as an integer. Instances are not modified once shared; with_day returns a copy.
+    """
+    def __init__(self, epoch=None, bits=0):
+        self.epoch = epoch
+        self.bits = bits
+
+    @classmethod
+    def from_document(cls, data):
+        if not data or not data.get('epoch'):
+            return cls()
+        return cls(date.fromisoformat(data['epoch']), int.from_bytes(bytes(data.get('bits') or b''), 'little'))
+
+    def to_document(self):
+        return {
+            'epoch': self.epoch.isoformat(),
+            'bits': self.bits.to_bytes(max(1, (self.bits.bit_length() + 7) // 8), 'little'),
+            'active_days': bin(self.bits).count('1'),
+        }
+
+    def is_active(self, day):
+        if self.epoch is None or day < self.epoch:
+            return False
+        return bool(self.bits >> (day - self.epoch).days & 1)
+
+    def with_day(self, day):
+        """Returns a copy of the log with day marked active"""
+        if self.epoch is None:
+            return ActivityLog(day, 1)
+        if day < self.epoch:
+            return ActivityLog(day, (self.bits << (self.epoch - day).days) | 1)
+        return ActivityLog(self.epoch, self.bits | 1 << (day - self.epoch).days)
+
+    def current_streak(self, today):
+        """
+        Consecutive active days ending today, or ending yesterday if today has no activity
+        yet (the streak is still alive until the day is over).
+        """
+        if self.epoch is None or today < self.epoch:
+            return 0
+        end = (today - self.epoch).days
+        if not self.is_active(today):
+            end -= 1
+        if end < 0:
+            return 0
+        # Zeros at or below the end bit; the highest one marks where the streak starts
+        gaps = ~self.bits & ((1 << (end + 1)) - 1)
+        return end + 1 if not gaps else end - (gaps.bit_length() - 1)
+
+    def longest_streak(self):
+        """Longest run of set bits: each x &= x >> 1 shortens every run by one"""
+        x, length = self.bits, 0
+        while x:
+            x &= x >> 1
+            length += 1
+        return length
+
+    def heatmap(self, end, days):
+        """
+        Returns one 0/1 entry per day from end - days + 1 to end, oldest first.
+        """
+        start = end - timedelta(days=days - 1)
+        if self.epoch is None:
+            return [0] * days
+        offset = (start - self.epoch).days
+        window = self.bits >> offset if offset >= 0 else self.bits << -offset
+        window &= (1 << days) - 1
+        return [window >> i & 1 for i in range(days)]
+
+def _load_activity(user_id):
+    """
+    Loads a user's activity log. Users without one start from their legacy streak count,
+    as consecutive days ending on their last login, if that streak is still alive (the
+    last login was today or yesterday); otherwise they start from an empty log.
+    """
+    loader = get_loader()
+    data = loader.load(activity_path(user_id))
+    if data is not None:
+        return ActivityLog.from_document(data)
+
+    user = loader.load(f"users/{user_id}") or {}
+    streak, last_login = user.get('streak'), user.get('last_login')
+    if not isinstance(streak, int) or streak <= 0 or not isinstance(last_login, datetime):
+        return ActivityLog()
+    last_day = last_login.astimezone(timezone.utc).date() if last_login.tzinfo else last_login.date()
+    if not 0 <= (today_utc() - last_day).days <= 1:
+        return ActivityLog()
+    logging.info(f"Seeded activity log for user {user_id} from a {streak}-day legacy streak")
+    return ActivityLog(last_day - timedelta(days=streak - 1), (1 << streak) - 1)
+
+# Activity logs served from memory; each worker re-reads a user's log once per TTL
+activity_reader = ReadThroughCache(_load_activity, ttl=ACTIVITY_CACHE_TTL, name='activity')
+
+def record_activity(user_id, day):
+    """
+    Marks a day active in the stored log. Runs in a transaction so days recorded by other
+    workers are kept.
+
+    Returns:
+        ActivityLog: The updated log.
+    """
+    client = firebase_service.db
+    log_ref = client.document(activity_path(user_id))
+
+    @firestore.transactional
+    def write(transaction):
+        snapshot = log_ref.get(transaction=transaction)
+        stored = ActivityLog.from_document(snapshot.to_dict()) if snapshot.exists else activity_reader.get(user_id)
+        log = stored.with_day(day)
+        transaction.set(log_ref, {**log.to_document(), 'updated_at': firestore.SERVER_TIMESTAMP})
+        return log
+
+    log = write(client.transaction())
+    loader = get_loader()
+    loader.record_reads(1)
+    loader.record_writes(1)
+    loader.forget(activity_path(user_id))
+    activity_reader.prime(user_id, log)
+    return log
 
 def update_streak(user_id):
     """
     Updates the user's streak based on their login or lesson completion activity.
-    
+    Only the first activity of a day is written; later calls are answered from memory.
+
     Args:
         user_id (str): The user's ID.
 
@@ -12,30 +156,43 @@ def update_streak(user_id):
         int: The updated streak count.
         str: The dynamic motivational message.
     """
-    user_ref = db.collection('users').document(user_id)
-    user_data = user_ref.get().to_dict()
+    today = today_utc()
+    log = activity_reader.get(user_id)
+    if not log.is_active(today):
+        log = record_activity(user_id, today)
 
-    current_streak = user_data.get('streak', 0)
-    last_login = user_data.get('last_login')
+    current_streak = log.current_streak(today)
+    return current_streak, get_streak_message(current_streak)
 
-    # Calculate streak based on consecutive days
-    current_time = firestore.SERVER_TIMESTAMP
-    if last_login and (current_time - last_login).days == 1:
-        current_streak += 1
-    else:
-        current_streak = 1  # Reset streak if not consecutive
+def get_activity_summary(user_id, days=HEATMAP_DAYS):
+    """
+    Returns a user's current and longest streaks and a daily activity heat map.
 
-    user_ref.update({
-        'streak': current_streak,
-        'last_login': current_time
-    })
-    
-    return current_streak, get_streak_message(current_streak)
+    Args:
+        user_id (str): The user's ID.
+        days (int): Number of days in the heat map, ending today.
+
+    Returns:
+        dict: current_streak, longest_streak, active_days and heatmap (start, end, days).
+    """
+    days = max(1, min(int(days), HEATMAP_MAX_DAYS))
+    today = today_utc()
+    log = activity_reader.get(user_id)
+    return {
+        'current_streak': log.current_streak(today),
+        'longest_streak': log.longest_streak(),
+        'active_days': bin(log.bits).count('1'),
+        'heatmap': {
+            'start': (today - timedelta(days=days - 1)).isoformat(),
+            'end': today.isoformat(),
+            'days': log.heatmap(today, days),
+        },
+    }
 
 def get_streak_message(streak):
     """
     Returns a motivational message based on the streak count.
-    
+
     Args:
         streak (int): The user's streak count.
 
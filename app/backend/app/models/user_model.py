@@ -1,6 +1,8 @@
 from firebase_admin import auth, firestore, storage
 from flask import current_app
-from app.services.firebase_service import db
+from app.services.firebase_service import get_loader
+from app.services.token_cache_service import invalidate_user
+from app.services.write_behind_service import get_write_behind
 import jwt
 import os
 import logging
@@ -70,7 +72,7 @@ def create_user(email, password):
         }
         
         # Store user data in Firestore
-        db.collection('users').document(user.uid).set(user_data)  # Changed from user.id to user.uid
+        get_loader().set(f"users/{user.uid}", user_data)  # Changed from user.id to user.uid
         return user.uid  # Changed from user.id to user.uid
         
     except Exception as e:
@@ -96,7 +98,7 @@ def get_user(email):
             current_app.logger.error("No 'uid' found in the user record.")
         
         # Now, access Firestore with user.uid
-        user_data = db.collection('users').document(user.uid).get().to_dict()  # Changed from user.id to user.uid
+        user_data = get_loader().load(f"users/{user.uid}")  # Changed from user.id to user.uid
         
         if user_data is None:
             # If no document exists, create one with basic information
@@ -109,7 +111,7 @@ def get_user(email):
                 'settings': {}
             }
             # Store the new user data
-            db.collection('users').document(user.uid).set(user_data)  # Changed from user.id to user.uid
+            get_loader().set(f"users/{user.uid}", user_data)  # Changed from user.id to user.uid
         
         current_app.logger.info(f"User data fetched from Firestore: {user_data}")
         return user_data
@@ -125,7 +127,8 @@ def update_profile(user_id, profile_data):
     """
     Updates the user's profile information in Firestore.
     """
-    db.collection('users').document(user_id).update(profile_data)
+    get_loader().update(f"users/{user_id}", profile_data)
+    invalidate_user(user_id)
 
 def upload_profile_picture(user_id, file):
     """
@@ -146,9 +149,10 @@ def upload_profile_picture(user_id, file):
     blob.make_public()
     
     # Update Firestore with the profile picture URL
-    db.collection('users').document(user_id).update({
+    get_loader().update(f"users/{user_id}", {
         'profile_picture': blob.public_url
     })
+    invalidate_user(user_id)
     
     return blob.public_url
 
@@ -156,7 +160,8 @@ def update_settings(user_id, settings_data):
     """
     Updates the user's settings in Firestore.
     """
-    db.collection('users').document(user_id).update({'settings': settings_data})
+    get_loader().update(f"users/{user_id}", {'settings': settings_data})
+    invalidate_user(user_id)
 
 def generate_jwt(user_id):
     """
@@ -176,11 +181,10 @@ def get_user_by_id(user_id):
     Retrieves user data from Firestore using the user_id.
     """
     try:
-        # Access Firestore directly with the provided user_id
-        user_doc = db.collection('users').document(user_id).get()
+        # Access Firestore with the provided user_id, reusing this request's read if any
+        user_data = get_loader().load(f"users/{user_id}")
         
-        if user_doc.exists:
-            user_data = user_doc.to_dict()
+        if user_data is not None:
             current_app.logger.info(f"User data fetched for {user_id}: {user_data}")
             return user_data
         else:
@@ -202,13 +206,14 @@ def update_fcm_token(user_id, new_fcm_token):
     Returns:
         None
     """
-    user_ref = db.collection('users').document(user_id)
-    user_data = user_ref.get().to_dict()
+    loader = get_loader()
+    user_data = loader.load(f"users/{user_id}") or {}
 
     # Check if the token is different or needs updating
     current_fcm_token = user_data.get('fcm_token')
     if current_fcm_token != new_fcm_token:
-        user_ref.update({'fcm_token': new_fcm_token})
+        loader.update(f"users/{user_id}", {'fcm_token': new_fcm_token})
+        invalidate_user(user_id)
         logging.info(f"Updated FCM token for user: {user_id}")
 
 def store_user_data(user_data):
@@ -216,11 +221,9 @@ def store_user_data(user_data):
     Stores user data in Firestore.
     """
     try:
-        # Create a reference to the users collection
-        user_ref = db.collection('users').document(user_data['uid'])
-        
         # Set the user data
-        user_ref.set(user_data)
+        get_loader().set(f"users/{user_data['uid']}", user_data)
+        invalidate_user(user_data['uid'])
         
     except Exception as e:
         logging.error(f"Error storing user data in Firestore: {str(e)}")
@@ -231,12 +234,7 @@ def get_user_data(user_id):
     Retrieves user data from Firestore.
     """
     try:
-        user_ref = db.collection('users').document(user_id)
-        user_doc = user_ref.get()
-        
-        if user_doc.exists:
-            return user_doc.to_dict()
-        return None
+        return get_loader().load(f"users/{user_id}")
         
     except Exception as e:
         logging.error(f"Error retrieving user data from Firestore: {str(e)}")
@@ -245,10 +243,16 @@ def get_user_data(user_id):
 def update_last_login(user_id):
     """
     Updates the last login timestamp for a user in Firestore.
+    Goes through the write-behind buffer when it is running, so repeated calls
+    for an active user collapse into one batched write per flush.
     """
+    buffer = get_write_behind()
+    if buffer is not None:
+        buffer.set_fields(f"users/{user_id}", {'last_login': datetime.now(timezone.utc)})
+        return
+
     try:
-        user_ref = db.collection('users').document(user_id)
-        user_ref.update({
+        get_loader().update(f"users/{user_id}", {
             'last_login': datetime.now(timezone.utc)
         })
     except Exception as e:
@@ -260,8 +264,8 @@ def update_user_data(user_id, update_data):
     Updates user data in Firestore.
     """
     try:
-        user_ref = db.collection('users').document(user_id)
-        user_ref.update(update_data)
+        get_loader().update(f"users/{user_id}", update_data)
+        invalidate_user(user_id)
         return True
     except Exception as e:
         current_app.logger.error(f"Error updating user data: {e}")
@@ -5,6 +5,7 @@ from flask import Blueprint, g, request, jsonify, current_app
 from app.models.user_model import create_user, get_user, get_user_by_id, get_user_data, store_user_data, update_last_login, update_profile, update_settings, generate_jwt, upload_profile_picture, User
 from app.services.validation_service import hash_password, validate_password_strength, validate_signup_input, validate_jwt_token, verify_password, generate_password_hash
 from app.services.firebase_service import auth
+from app.services.token_cache_service import invalidate_user, revoke_token
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
 from firebase_admin import auth as firebase_admin_auth
@@ -128,6 +129,20 @@ def upload_profile_picture_route():
     return jsonify({"profile_picture_url": profile_url}), 200
 
 
+# Route for logout
+@auth_bp.route('/logout', methods=['POST'])
+def logout():
+    """
+    Revokes the caller's token so it is rejected on every later request.
+    """
+    token = request.headers.get('Authorization')
+    user_data = validate_jwt_token(token)
+    if not user_data:
+        return jsonify({"error": "Unauthorized"}), 401
+
+    revoke_token(token, user_data.get('exp'))
+    return jsonify({"message": "Logged out successfully"}), 200
+
 @auth_bp.route('/login', methods=['POST'])
 @limiter.limit("10 per minute")
 def login():
@@ -253,6 +268,7 @@ def change_password():
             
         # Update password in Firebase
         auth.update_user(user_id, password=new_password)
+        invalidate_user(user_id)
         
         return jsonify({
             "message": "Password updated successfully"
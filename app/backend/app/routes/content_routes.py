@@ -1,8 +1,13 @@
 # app/routes/content_routes.py
-from flask import Blueprint, jsonify, request
-from app.models.content_model import generate_content, fetch_content
+from flask import Blueprint, Response, current_app, jsonify, request, stream_with_context
+from app.models.content_model import generate_content, fetch_content, fetch_content_hash, iter_content_events
+from app.services.bundle_service import build_delta, get_bundle, get_package, held_chunks, pack
+from app.utils.etag import CONTENT_HASH_FIELD, content_hash, not_modified
 from app.services.validation_service import validate_jwt_token
+import json
 import logging
+import queue
+import threading
 from flask_limiter.util import get_remote_address
 
 # Configure logging for authentication operations
@@ -14,6 +19,17 @@ def log_request(endpoint):
 
 content_bp = Blueprint('content', __name__)
 
+# Seconds between SSE heartbeats while a lesson is still being generated
+STREAM_HEARTBEAT_INTERVAL = 15
+
+def format_stream_event(event, payload, stream_format):
+    """
+    Serializes one generation event as an SSE frame or an NDJSON line.
+    """
+    if stream_format == 'ndjson':
+        return json.dumps({"event": event, "data": payload}, default=str) + "\n"
+    return f"event: {event}\ndata: {json.dumps(payload, default=str)}\n\n"
+
 @content_bp.route('/generate', methods=['POST'])
 def generate_route():
     """
@@ -55,24 +71,257 @@ def generate_route():
     content = generate_content(user_id, topic, level)
     return jsonify(content), 200
 
+@content_bp.route('/generate/stream', methods=['POST'])
+def generate_stream_route():
+    """
+    Streaming variant of /generate that emits each piece of content as soon as it is ready.
+    
+    Headers:
+        - Authorization: Bearer token for user authentication.
+    Query Parameters:
+        - format (str): "sse" (default, text/event-stream) or "ndjson".
+    Body:
+        - topic (str): Topic name.
+        - level (str): Difficulty level.
+
+    Returns:
+        Stream of "summary", "lesson" and "quiz" events followed by "complete" (or "error").
+        The persisted content document is the same as for /generate.
+    """
+    auth_header = request.headers.get('Authorization')
+
+    if not auth_header or not auth_header.startswith('Bearer '):
+        return jsonify({"error": "Unauthorized access"}), 401
+
+    # Extract the token from "Bearer <token>"
+    token_str = auth_header.split(' ')[1]
+
+    # Validate and decode the JWT token
+    decoded_token = validate_jwt_token(token_str)
+    if not decoded_token:
+        return jsonify({"error": "Unauthorized access"}), 401
+
+    user_id = decoded_token.get('uid') if decoded_token else None
+    if not user_id:
+        return jsonify({"error": "Unauthorized - user ID missing"}), 401
+
+    data = request.json or {}
+    topic = data.get('topic')
+    level = data.get('level')
+    stream_format = 'ndjson' if request.args.get('format') == 'ndjson' else 'sse'
+
+    log_request('/generate/stream')
+
+    app = current_app._get_current_object()
+    events = queue.Queue()
+
+    def produce():
+        # Generation runs off the response thread so events can be flushed as they arrive
+        with app.app_context():
+            try:
+                content = generate_content(
+                    user_id, topic, level,
+                    on_event=lambda event, payload: events.put((event, payload))
+                )
+                events.put(('complete', content))
+            except Exception as e:
+                logging.error(f"Streaming generation failed for '{topic}': {str(e)}")
+                events.put(('error', {"error": "Content generation failed"}))
+
+    threading.Thread(target=produce, name='content-stream', daemon=True).start()
+
+    def stream():
+        sent = set()
+        while True:
+            try:
+                event, payload = events.get(timeout=STREAM_HEARTBEAT_INTERVAL)
+            except queue.Empty:
+                if stream_format == 'sse':
+                    yield ": keep-alive\n\n"
+                continue
+
+            if event == 'error':
+                yield format_stream_event(event, payload, stream_format)
+                return
+
+            if event == 'complete':
+                # Cached or coalesced content produces no live events; replay what is missing
+                for replay_event, replay_payload in iter_content_events(payload):
+                    if (replay_event, replay_payload.get('index')) not in sent:
+                        yield format_stream_event(replay_event, replay_payload, stream_format)
+                yield format_stream_event('complete', {
+                    "topic": topic,
+                    "level": payload.get('level', level),
+                    "status": payload.get('status'),
+                    "timestamp": payload.get('timestamp')
+                }, stream_format)
+                return
+
+            sent.add((event, payload.get('index')))
+            yield format_stream_event(event, payload, stream_format)
+
+    mimetype = 'application/x-ndjson' if stream_format == 'ndjson' else 'text/event-stream'
+    return Response(
+        stream_with_context(stream()),
+        mimetype=mimetype,
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
 @content_bp.route('/download/<topic>', methods=['GET'])
 def download_route(topic):
     """
     Endpoint to download content for offline access.
+    Responses carry a strong ETag; a request whose If-None-Match matches it gets a 304
+    without the content document being read.
     
     Headers:
         - Authorization: Bearer token for user authentication.
+        - If-None-Match: ETag of the copy the client already has (optional).
+    Query Parameters:
+        - level (str): Difficulty level (default "beginner").
 
     Returns:
-        Response JSON with content data or error message if not found.
+        Response JSON with content data, 304 if the client's copy is current, or an error message.
     """
     token = request.headers.get('Authorization')
     user_data = validate_jwt_token(token)
     if not user_data:
         return jsonify({"error": "Unauthorized"}), 401
 
+    level = request.args.get('level', 'beginner')
     log_request(f'/download/{topic}')
-    content = fetch_content(topic)
-    if content:
-        return jsonify(content), 200
-    return jsonify({"error": "Content not found"}), 404
\ No newline at end of file
+
+    if request.if_none_match:
+        stored_hash = fetch_content_hash(topic, level)
+        if stored_hash and request.if_none_match.contains_weak(stored_hash):
+            return not_modified(stored_hash)
+
+    try:
+        content = fetch_content(user_data.get('uid') or user_data.get('user_id'), topic, level)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception:
+        content = None
+    if not content:
+        return jsonify({"error": "Content not found"}), 404
+
+    etag = content.get(CONTENT_HASH_FIELD) or content_hash(content)
+    if request.if_none_match.contains_weak(etag):
+        return not_modified(etag)
+    response = jsonify(content)
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response, 200
+
+def bundle_etag(version):
+    """
+    Returns the ETag of the bundle representation this request gets. The gzip and plain
+    JSON bodies are different bytes, so the gzip variant has its own tag.
+    """
+    return f"{version}-gz" if 'gzip' in request.accept_encodings else version
+
+def bundle_response(package, payload, version):
+    """
+    Sends a bundle or delta gzip-compressed when the client accepts it, otherwise as plain JSON.
+    """
+    if 'gzip' in request.accept_encodings:
+        response = Response(package, mimetype='application/json')
+        response.headers['Content-Encoding'] = 'gzip'
+    else:
+        response = jsonify(payload)
+    response.headers['Vary'] = 'Accept-Encoding'
+    response.headers['Cache-Control'] = 'no-cache'
+    response.set_etag(bundle_etag(version))
+    return response
+
+def load_bundle(user_data, topic, level):
+    """
+    Returns (bundle, None), or (None, error response) if the content cannot be loaded.
+    """
+    try:
+        content = fetch_content(user_data.get('uid') or user_data.get('user_id'), topic, level)
+    except ValueError as e:
+        return None, (jsonify({"error": str(e)}), 400)
+    except Exception:
+        content = None
+    if not content:
+        return None, (jsonify({"error": "Content not found"}), 404)
+    return get_bundle(topic, level, content), None
+
+@content_bp.route('/bundle/<topic>', methods=['GET'])
+def bundle_route(topic):
+    """
+    Endpoint to download a compressed offline bundle: a manifest of content-addressed
+    chunks (summary, lessons and quizzes) and the chunks themselves.
+    
+    Headers:
+        - Authorization: Bearer token for user authentication.
+        - If-None-Match: Bundle version the client already has (optional).
+    Query Parameters:
+        - level (str): Difficulty level (default "beginner").
+
+    Returns:
+        The bundle (gzip-compressed if accepted), 304 if the client's version is current,
+        or an error message.
+    """
+    token = request.headers.get('Authorization')
+    user_data = validate_jwt_token(token)
+    if not user_data:
+        return jsonify({"error": "Unauthorized"}), 401
+
+    level = request.args.get('level', 'beginner')
+    log_request(f'/bundle/{topic}')
+
+    if request.if_none_match:
+        stored_hash = fetch_content_hash(topic, level)
+        if stored_hash and request.if_none_match.contains_weak(bundle_etag(stored_hash)):
+            return not_modified(bundle_etag(stored_hash))
+
+    bundle, error = load_bundle(user_data, topic, level)
+    if error:
+        return error
+    version = bundle['manifest']['version']
+    if request.if_none_match.contains_weak(bundle_etag(version)):
+        return not_modified(bundle_etag(version))
+    return bundle_response(get_package(bundle), bundle, version)
+
+@content_bp.route('/bundle/<topic>/delta', methods=['POST'])
+def bundle_delta_route(topic):
+    """
+    Endpoint to update an offline bundle: the client sends the manifest it holds and
+    receives the current manifest with only the chunks it is missing.
+    
+    Headers:
+        - Authorization: Bearer token for user authentication.
+    Query Parameters:
+        - level (str): Difficulty level (default "beginner").
+    Body:
+        - manifest (dict): The client's current manifest, or
+        - have (list): Hashes of the chunks the client holds.
+
+    Returns:
+        The delta (gzip-compressed if accepted), 304 if the client's manifest is current,
+        or an error message.
+    """
+    token = request.headers.get('Authorization')
+    user_data = validate_jwt_token(token)
+    if not user_data:
+        return jsonify({"error": "Unauthorized"}), 401
+
+    level = request.args.get('level', 'beginner')
+    log_request(f'/bundle/{topic}/delta')
+
+    data = request.get_json(silent=True)
+    try:
+        held = held_chunks(data)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    bundle, error = load_bundle(user_data, topic, level)
+    if error:
+        return error
+    version = bundle['manifest']['version']
+    if (data.get('manifest') or {}).get('version') == version:
+        return not_modified(bundle_etag(version))
+    delta = build_delta(bundle, held)
+    return bundle_response(pack(delta), delta, version)
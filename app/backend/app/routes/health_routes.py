@@ -0,0 +1,86 @@
+# app/routes/health_routes.py
+from flask import Blueprint, jsonify, request
+from app.services.http_service import get_pool_stats
+from app.services.prompt_cache_service import get_prompt_cache
+from app.services.circuit_breaker_service import get_circuit_states
+from app.services.caching_service import get_cache_stats
+from app.services.token_cache_service import get_token_cache_stats
+from app.services.write_behind_service import get_write_behind
+from app.services.validation_service import validate_jwt_token
+
+health_bp = Blueprint('health', __name__)
+
+@health_bp.before_request
+def require_token():
+    """
+    Serves the operational statistics below only to authenticated callers.
+    """
+    token = request.headers.get('Authorization')
+    if not token or not validate_jwt_token(token):
+        return jsonify({"error": "Unauthorized"}), 401
+
+@health_bp.route('/transport', methods=['GET'])
+def transport_stats_route():
+    """
+    Reports outbound HTTP pool statistics per host.
+
+    Returns:
+        JSON response with request counts, connection reuse ratio and pool waits.
+    """
+    return jsonify({"pools": get_pool_stats()}), 200
+
+@health_bp.route('/prompt-cache', methods=['GET'])
+def prompt_cache_stats_route():
+    """
+    Reports hit and miss counters for the model prompt/response cache.
+
+    Returns:
+        JSON response with cache counters, or enabled=false when the cache is off.
+    """
+    prompt_cache = get_prompt_cache()
+    if prompt_cache is None:
+        return jsonify({"enabled": False}), 200
+    return jsonify({"enabled": True, **prompt_cache.stats()}), 200
+
+@health_bp.route('/circuits', methods=['GET'])
+def circuit_states_route():
+    """
+    Reports the circuit breaker state of each inference endpoint.
+
+    Returns:
+        JSON response with state, rolling error rate and latency per model URL.
+    """
+    return jsonify({"circuits": get_circuit_states()}), 200
+
+@health_bp.route('/cache', methods=['GET'])
+def cache_stats_route():
+    """
+    Reports per-tier hit, miss and eviction counters for the content cache.
+
+    Returns:
+        JSON response with L1 (in-process) and L2 (Redis) statistics.
+    """
+    return jsonify(get_cache_stats()), 200
+
+@health_bp.route('/token-cache', methods=['GET'])
+def token_cache_stats_route():
+    """
+    Reports hit, miss and revocation counters for the verified token cache.
+
+    Returns:
+        JSON response with token cache counters and sizes.
+    """
+    return jsonify(get_token_cache_stats()), 200
+
+@health_bp.route('/write-behind', methods=['GET'])
+def write_behind_stats_route():
+    """
+    Reports pending and flushed counts for the write-behind buffer.
+
+    Returns:
+        JSON response with buffer counters, or enabled=false when it is not running.
+    """
+    buffer = get_write_behind()
+    if buffer is None:
+        return jsonify({"enabled": False}), 200
+    return jsonify({"enabled": True, **buffer.stats()}), 200
@@ -0,0 +1,122 @@
+# app/routes/job_routes.py
+from flask import Blueprint, jsonify, request
+from app.services.job_service import get_job_queue, JOB_TYPES
+from app.services.validation_service import validate_jwt_token
+import logging
+from flask_limiter.util import get_remote_address
+
+job_bp = Blueprint('jobs', __name__)
+
+# Configure logging for error tracking and debugging
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+# Longest a client may long-poll for a job result
+MAX_JOB_WAIT_SECONDS = 30
+
+# Payload fields each job type requires
+REQUIRED_FIELDS = {
+    'generate_content': ['topic', 'level'],
+    'generate_quizzes': ['lesson_content'],
+    'text_to_speech': ['text'],
+}
+
+# Helper function to log incoming requests for debugging and tracing
+def log_request(endpoint):
+    logging.info(f"Request received at {endpoint} from IP: {get_remote_address()}")
+
+def get_user_id():
+    """
+    Validates the Authorization header and returns the caller's user ID, or None.
+    """
+    auth_header = request.headers.get('Authorization')
+    if not auth_header or not auth_header.startswith('Bearer '):
+        return None
+    decoded_token = validate_jwt_token(auth_header.split(' ')[1])
+    if not decoded_token:
+        return None
+    return decoded_token.get('uid')
+
+@job_bp.route('/', methods=['POST'])
+def enqueue_job_route():
+    """
+    Enqueues a long-running job.
+
+    Headers:
+        - Authorization: Bearer token for user authentication.
+    Body:
+        - type (str): "generate_content", "generate_quizzes" or "text_to_speech".
+        - payload (dict): Job arguments (topic/level, lesson_content or text).
+        - priority (int, optional): Higher runs first.
+
+    Returns:
+        202 with the job ID and status. Identical queued or running work returns the existing job.
+    """
+    user_id = get_user_id()
+    if not user_id:
+        return jsonify({"error": "Unauthorized access"}), 401
+
+    data = request.json or {}
+    job_type = data.get('type')
+    payload = data.get('payload') or {}
+
+    if job_type not in JOB_TYPES:
+        return jsonify({"error": f"type must be one of: {', '.join(JOB_TYPES)}"}), 400
+
+    missing = [name for name in REQUIRED_FIELDS.get(job_type, []) if not payload.get(name)]
+    if missing:
+        return jsonify({"error": "Missing required fields", "required_fields": missing}), 400
+
+    try:
+        priority = int(data.get('priority', 0))
+    except (TypeError, ValueError):
+        return jsonify({"error": "priority must be an integer"}), 400
+
+    if job_type == 'generate_content':
+        payload['user_id'] = user_id
+
+    log_request('/jobs')
+    job = get_job_queue().submit(job_type, payload, user_id=user_id, priority=priority)
+    response = jsonify({"job_id": job.id, "status": job.status})
+    response.headers['Location'] = f"{request.base_url.rstrip('/')}/{job.id}"
+    return response, 202
+
+@job_bp.route('/<job_id>', methods=['GET'])
+def job_status_route(job_id):
+    """
+    Returns a job's status and, once finished, its result.
+
+    Headers:
+        - Authorization: Bearer token for user authentication.
+    Query Parameters:
+        - wait (int, optional): Seconds to long-poll for completion (max 30).
+
+    Returns:
+        JSON with the job's status, result and error.
+    """
+    user_id = get_user_id()
+    if not user_id:
+        return jsonify({"error": "Unauthorized access"}), 401
+
+    try:
+        wait = min(max(float(request.args.get('wait', 0)), 0), MAX_JOB_WAIT_SECONDS)
+    except ValueError:
+        return jsonify({"error": "wait must be a number"}), 400
+
+    queue = get_job_queue()
+    job = queue.get(job_id)
+    if job is None or not queue.can_view(job, user_id):
+        return jsonify({"error": "Job not found"}), 404
+
+    if wait:
+        job = queue.wait(job_id, wait) or job
+
+    return jsonify({
+        "job_id": job.id,
+        "type": job.type,
+        "status": job.status,
+        "result": job.result,
+        "error": job.error,
+        "created_at": job.created_at,
+        "started_at": job.started_at,
+        "finished_at": job.finished_at
+    }), 200
@@ -1,8 +1,10 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request, jsonify, stream_with_context
 from app.services.validation_service import validate_jwt_token, validate_lesson_input
-from app.models.lesson_model import fetch_all_lessons, fetch_lesson_by_id, mark_lesson_complete, download_lesson, delete_downloaded_lesson, fetch_progress
+from app.utils.etag import CONTENT_HASH_FIELD, not_modified
+from app.models.lesson_model import LESSONS_PAGE_SIZE, fetch_all_lessons, fetch_lesson_by_id, mark_lesson_complete, download_lesson, delete_downloaded_lesson, fetch_progress
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
+import json
 import logging
 import time
 
@@ -43,13 +45,18 @@ def retry_operation(func, max_retries=3, backoff_factor=2, *args, **kwargs):
 @limiter.limit("20 per minute")  # Apply rate limiting to prevent excessive requests
 def get_lessons():
     """
-    Fetch all available lessons for the user.
+    Fetch a page of the available lessons for the user, streamed as JSON.
     
     Headers:
     - Authorization: Bearer token for user authentication.
     
+    Query Params:
+    - limit: Page size (default 20, max 100).
+    - cursor: The next_cursor returned with the previous page.
+    
     Returns:
-    - 200: List of lessons for the user.
+    - 200: Lessons (id, title, level) and the cursor for the next page, or null on the last page.
+    - 400: Invalid cursor.
     - 401: Unauthorized if JWT token is invalid.
     - 500: Internal server error for unexpected issues.
     """
@@ -75,17 +82,39 @@ def get_lessons():
     
     log_request('/lessons')
     
-    # Retry fetching lessons in case of database failures
-    lessons = retry_operation(
-        fetch_all_lessons, 
-        max_retries=3, 
-        backoff_factor=2, 
-        user_id=user_id
-    )
-    
-    if lessons:
-        return jsonify({"lessons": lessons}), 200
-    return jsonify({"error": "Failed to retrieve lessons. Please try again later."}), 500
+    try:
+        page = fetch_all_lessons(
+            user_id,
+            limit=request.args.get('limit', LESSONS_PAGE_SIZE, type=int),
+            cursor=request.args.get('cursor')
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    # The first read happens before the response starts, so a failing query is still a 500
+    lessons = iter(page)
+    try:
+        first = next(lessons, None)
+    except Exception as e:
+        logging.error(f"Failed to fetch lessons: {str(e)}")
+        return jsonify({"error": "Failed to retrieve lessons. Please try again later."}), 500
+
+    def stream():
+        # Lessons are written out as they are read, so memory stays O(1) per request
+        yield '{"lessons": ['
+        if first is not None:
+            yield json.dumps(first, default=str)
+            try:
+                for lesson in lessons:
+                    yield ',' + json.dumps(lesson, default=str)
+            except Exception as e:
+                # Headers are already sent: end the page with an error and a cursor to resume from
+                logging.error(f"Failed to stream lessons: {str(e)}")
+                yield '], "next_cursor": ' + json.dumps(page.resume_cursor()) + ', "error": "Listing interrupted; resume from next_cursor."}'
+                return
+        yield '], "next_cursor": ' + json.dumps(page.next_cursor) + '}'
+
+    return Response(stream_with_context(stream()), mimetype='application/json')
 
 @lesson_bp.route('/<lesson_id>', methods=['GET'])
 @limiter.limit("10 per minute")
@@ -101,6 +130,7 @@ def get_lesson(lesson_id):
     
     Returns:
     - 200: The requested lesson.
+    - 304: The client's copy (If-None-Match) is current.
     - 401: Unauthorized if JWT token is invalid.
     - 404: Lesson not found.
     - 500: Internal server error for unexpected issues.
@@ -131,7 +161,13 @@ def get_lesson(lesson_id):
         )
         
         if lesson:
-            return jsonify({"lesson": lesson}), 200
+            etag = lesson[CONTENT_HASH_FIELD]
+            if request.if_none_match.contains_weak(etag):
+                return not_modified(etag)
+            response = jsonify({"lesson": lesson})
+            response.set_etag(etag)
+            response.headers['Cache-Control'] = 'no-cache'
+            return response, 200
         return jsonify({"error": "Lesson not found."}), 404
             
     except Exception as e:
@@ -3,7 +3,7 @@ from app.services.notification_service import send_fcm_notification, update_fcm_
 from app.services.validation_service import validate_jwt_token, validate_notification_input
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
-from app.services.firebase_service import db
+from app.services.firebase_service import get_loader
 import logging
 import time
 
@@ -54,8 +54,7 @@ def send_notification_route():
         return jsonify({"error": "user_id, title, and body are required"}), 400
 
     # Fetch the user's FCM token
-    user_ref = db.collection('users').document(user_id)
-    user_data = user_ref.get().to_dict()
+    user_data = get_loader().load(f"users/{user_id}") or {}
     fcm_token = user_data.get('fcm_token')
 
     if not fcm_token:
@@ -96,8 +95,7 @@ def subscribe_to_notifications():
     update_fcm_token(user_id, fcm_token) # Update the FCM token
 
     # Store the user's notification preferences
-    user_ref = db.collection('users').document(user_id)
-    user_ref.update({
+    get_loader().update(f"users/{user_id}", {
         'subscriptions': subscriptions # Update the user's subscribed notification types
     })
     
@@ -1,5 +1,6 @@
 from flask import Blueprint, request, jsonify
 from app.models.quiz_model import generate_quiz, fetch_quiz, submit_quiz, reset_quiz
+from app.services.grading_service import submit_batch
 from app.services.validation_service import validate_jwt_token
 
 quiz_bp = Blueprint('quiz', __name__)
@@ -51,6 +52,41 @@ def submit_quiz_route(quiz_id):
     score = submit_quiz(user_data['user_id'], quiz_id, answers)
     return jsonify({"score": score}), 200
 
+@quiz_bp.route('/submit-batch', methods=['POST'])
+def submit_batch_route():
+    """
+    Grades many quiz submissions in one call, e.g. a classroom at the end of a session,
+    and returns each score with aggregate statistics for the batch.
+
+    Body:
+        - submissions (list): {"quiz_id", "answers", "user_id"} objects. user_id defaults to
+          the caller; grading other users' quizzes requires the "grader" custom claim.
+    """
+    token = request.headers.get('Authorization')
+    user_data = validate_jwt_token(token)
+    if not user_data:
+        return jsonify({"error": "Unauthorized"}), 401
+
+    caller_id = user_data.get('uid') or user_data.get('user_id')
+    submissions = (request.get_json(silent=True) or {}).get('submissions')
+    if not isinstance(submissions, list):
+        return jsonify({"error": "Submissions are required"}), 400
+
+    submissions = [
+        {**submission, 'user_id': submission.get('user_id') or caller_id} if isinstance(submission, dict) else submission
+        for submission in submissions
+    ]
+    if not user_data.get('grader') and any(
+        isinstance(submission, dict) and submission['user_id'] != caller_id for submission in submissions
+    ):
+        return jsonify({"error": "Not allowed to grade other users' quizzes"}), 403
+
+    try:
+        graded = submit_batch(submissions)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify(graded), 200
+
 @quiz_bp.route('/reset/<quiz_id>', methods=['PUT'])
 def reset_quiz_route(quiz_id):
     """
@@ -1,6 +1,6 @@
 # app/routes/search_routes.py
 from flask import Blueprint, jsonify, request
-from app.services.search_service import search_topics
+from app.services.search_service import ranked_search, SEARCH_DEFAULT_LIMIT
 from app.services.validation_service import validate_jwt_token
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
@@ -25,15 +25,18 @@ search_bp = Blueprint('search', __name__)
 def search_route():
     """
     Searches for topics across different categories based on user input.
+    Results are ranked by relevance across topic names and generated content.
     
     Headers:
         - Authorization: Bearer token for user authentication.
     Query Parameters:
         - query (str): The search term.
         - category (str): The search category (e.g., "all", "in_progress", "completed", "downloaded").
+        - limit (int): Maximum number of results (default 20, max 100).
+        - cursor (str): The next_cursor returned with the previous page.
     
     Returns:
-        JSON response with search results or an error message.
+        JSON response with search results and the next page cursor, or an error message.
     """
     token = request.headers.get('Authorization')
     user_data = validate_jwt_token(token)
@@ -42,7 +45,12 @@ def search_route():
 
     query = request.args.get('query', '').strip()
     category = request.args.get('category', 'all')
+    limit = request.args.get('limit', SEARCH_DEFAULT_LIMIT, type=int)
+    cursor = request.args.get('cursor')
     
     log_request('/search')
-    results = search_topics(user_data['user_id'], query, category)
-    return jsonify({"results": results}), 200
+    try:
+        results, next_cursor = ranked_search(user_data['user_id'], query, category, limit, cursor)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify({"results": results, "next_cursor": next_cursor}), 200
@@ -1,5 +1,5 @@
 from flask import Blueprint, request, jsonify
-from app.models.streak_model import update_streak
+from app.models.streak_model import HEATMAP_DAYS, get_activity_summary, update_streak
 from app.services.validation_service import validate_jwt_token
 
 streak_bp = Blueprint('streak', __name__)
@@ -16,3 +16,20 @@ def track_streak_route():
 
     streak, message = update_streak(user_data['user_id'])
     return jsonify({"streak": streak, "message": message}), 200
+
+@streak_bp.route('/heatmap', methods=['GET'])
+def streak_heatmap_route():
+    """
+    Returns the user's current and longest streaks and a daily activity heat map.
+
+    Query Parameters:
+        - days (int): Days in the heat map, ending today (default 365).
+    """
+    token = request.headers.get('Authorization')
+    user_data = validate_jwt_token(token)
+    if not user_data:
+        return jsonify({"error": "Unauthorized"}), 401
+
+    days = request.args.get('days', HEATMAP_DAYS, type=int)
+    summary = get_activity_summary(user_data.get('uid') or user_data.get('user_id'), days)
+    return jsonify(summary), 200
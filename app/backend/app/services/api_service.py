@@ -8,9 +8,18 @@ import os
 import logging
 from time import sleep
 import random
-from typing import List, Dict, Union, Optional
+import threading
+import heapq
+import itertools
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import List, Dict, Union, Optional, Iterable
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
 from dotenv import load_dotenv
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from app.services.http_service import http_post
+from app.services.prompt_cache_service import get_prompt_cache, PromptCache
+from app.services.circuit_breaker_service import get_breaker, CircuitOpenError
 
 # Configure logging for error tracking and debugging
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
@@ -30,19 +39,129 @@ headers = {
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 
+# Per-key token bucket: KEY_CALLS_PER_WINDOW calls refilled evenly over KEY_WINDOW_SECONDS
+KEY_CALLS_PER_WINDOW = int(os.getenv('HF_KEY_CALLS_PER_MINUTE', 50))
+KEY_WINDOW_SECONDS = 60
+# Cooldown applied to a key on a 429 without a usable Retry-After header
+DEFAULT_RETRY_AFTER = 60
+# Longest a caller blocks waiting for any key of a model to become available
+KEY_ACQUIRE_TIMEOUT = float(os.getenv('HF_KEY_ACQUIRE_TIMEOUT', 60))
+
 @dataclass
 class APIConfig:
     """Configuration for API endpoints and keys"""
     url: str
     key: str
     last_used: float = 0
-    calls_remaining: int = 50  # Adjust based on your tier
+    calls_remaining: float = KEY_CALLS_PER_WINDOW  # Token bucket level, refilled continuously
+    capacity: int = KEY_CALLS_PER_WINDOW  # Adjust based on your tier
+    refill_per_second: float = KEY_CALLS_PER_WINDOW / KEY_WINDOW_SECONDS
+    blocked_until: float = 0  # Monotonic time set from Retry-After on 429s
+    updated_at: float = field(default_factory=time.monotonic)
+    version: int = 0  # Bumped on every reschedule to invalidate stale heap entries
+
+    def refill(self, now: float) -> None:
+        """Adds the tokens earned since the last refill"""
+        elapsed = max(0.0, now - self.updated_at)
+        self.calls_remaining = min(self.capacity, self.calls_remaining + elapsed * self.refill_per_second)
+        self.updated_at = now
+
+    def ready_at(self, now: float) -> float:
+        """Earliest monotonic time at which this key can serve a call"""
+        if self.calls_remaining >= 1:
+            ready = now
+        else:
+            ready = now + (1 - self.calls_remaining) / self.refill_per_second
+        return max(ready, self.blocked_until)
+
+class KeyScheduler:
+    """
+    Min-heap of API keys for one model, ordered by when each key can next serve a call.
+    All state changes happen under a single condition variable.
+    """
+    def __init__(self, configs: Iterable[APIConfig]):
+        self._heap = []
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+        now = time.monotonic()
+        for config in configs:
+            self._push(config, now)
+
+    def _push(self, config: APIConfig, now: float) -> None:
+        config.version += 1
+        heapq.heappush(self._heap, (config.ready_at(now), next(self._sequence), config.version, config))
+
+    def acquire(self, timeout: float = 0) -> Optional[APIConfig]:
+        """
+        Takes one call from the key that becomes available first.
+
+        Args:
+            timeout (float): Seconds to block waiting for a key; 0 returns immediately.
+
+        Returns:
+            APIConfig or None if no key became available before the timeout.
+        """
+        deadline = time.monotonic() + timeout
+        with self._condition:
+            while True:
+                now = time.monotonic()
+                ready_at, _, version, config = self._heap[0]
+                if version != config.version:
+                    heapq.heappop(self._heap)
+                    continue
+
+                config.refill(now)
+                ready = config.ready_at(now)
+                if ready <= now:
+                    heapq.heappop(self._heap)
+                    config.calls_remaining -= 1
+                    config.last_used = time.time()
+                    self._push(config, now)
+                    return config
+
+                if ready != ready_at:
+                    heapq.heapreplace(self._heap, (ready, next(self._sequence), version, config))
+
+                remaining = deadline - now
+                if remaining <= 0:
+                    return None
+                self._condition.wait(min(ready - now, remaining))
+
+    def penalize(self, config: APIConfig, retry_after: float) -> None:
+        """Empties a rate-limited key's bucket and blocks it for retry_after seconds"""
+        with self._condition:
+            now = time.monotonic()
+            config.refill(now)
+            config.calls_remaining = min(config.calls_remaining, 0)
+            config.blocked_until = max(config.blocked_until, now + retry_after)
+            self._push(config, now)
+            self._condition.notify_all()
+
+def parse_retry_after(value: Optional[str]) -> float:
+    """
+    Parses a Retry-After header given either as seconds or as an HTTP date.
+    """
+    if not value:
+        return DEFAULT_RETRY_AFTER
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+        return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return DEFAULT_RETRY_AFTER
 
 class HuggingFaceManager:
     def __init__(self):
         load_dotenv()
         self.api_keys = self._load_api_keys()
         self.endpoints = self._initialize_endpoints()
+        self.schedulers = {
+            model_name: KeyScheduler(configs.values())
+            for model_name, configs in self.endpoints.items()
+        }
         
     def _load_api_keys(self) -> list[str]:
         """Load multiple API keys from environment variables"""
@@ -73,78 +192,106 @@ class HuggingFaceManager:
             }
         return endpoints
     
-    def _get_next_available_config(self, model_name: str) -> Optional[APIConfig]:
-        """Get the next available API configuration with the longest rest"""
+    def _get_next_available_config(self, model_name: str, timeout: float = 0) -> Optional[APIConfig]:
+        """Get the API configuration that can serve a call soonest, waiting up to timeout"""
         if model_name not in self.endpoints:
             raise ValueError(f"Unknown model: {model_name}")
-            
-        configs = self.endpoints[model_name]
-        current_time = time.time()
-        
-        # Sort by last used time to implement round-robin with cooldown
-        available_configs = sorted(
-            configs.values(),
-            key=lambda x: (x.calls_remaining <= 0, x.last_used)
-        )
-        
-        for config in available_configs:
-            # If it's been more than 60 seconds since last use, reset the counter
-            if current_time - config.last_used > 60:
-                config.calls_remaining = 50
-            
-            if config.calls_remaining > 0:
-                return config
-                
-        return None
+
+        return self.schedulers[model_name].acquire(timeout)
 
     def make_request(
         self,
         model_name: str,
         payload: Dict[str, any],
         timeout: int = 10,
-        max_retries: int = 3
+        max_retries: int = 3,
+        use_cache: bool = True
     ) -> Dict[str, any]:
-        """Make an API request with automatic key rotation and rate limiting"""
+        """Make an API request with automatic key rotation, rate limiting and response caching"""
+        prompt_cache = get_prompt_cache() if use_cache else None
+        cache_key = PromptCache.make_key(model_name, payload) if prompt_cache else None
+        if prompt_cache:
+            cached = prompt_cache.get(cache_key)
+            if cached is not None:
+                return cached
+
+        if model_name not in self.endpoints:
+            raise ValueError(f"Unknown model: {model_name}")
+        # All keys of a model share one endpoint, and so one circuit
+        breaker = get_breaker(next(iter(self.endpoints[model_name].values())).url)
+
         for attempt in range(max_retries):
-            config = self._get_next_available_config(model_name)
+            # Checked before acquiring a key, which can block for up to KEY_ACQUIRE_TIMEOUT,
+            # so callers fail fast and no key budget is spent on an endpoint known to be down
+            if not breaker.allow():
+                raise CircuitOpenError(breaker.name)
+
+            config = self._get_next_available_config(model_name, timeout=KEY_ACQUIRE_TIMEOUT)
             if not config:
-                wait_time = min(30, 2 ** attempt)
-                time.sleep(wait_time)
-                continue
-                
+                breaker.release()
+                break
+
+            headers = {
+                "Authorization": f"Bearer {config.key}",
+                "Content-Type": "application/json"
+            }
+
+            started = time.monotonic()
             try:
-                headers = {
-                    "Authorization": f"Bearer {config.key}",
-                    "Content-Type": "application/json"
-                }
-                
-                response = requests.post(
+                response = http_post(
                     config.url,
                     headers=headers,
                     json=payload,
                     timeout=timeout
                 )
-                
-                config.last_used = time.time()
-                config.calls_remaining -= 1
-                
-                if response.status_code == 429:  # Too Many Requests
-                    config.calls_remaining = 0
-                    continue
-                    
-                response.raise_for_status()
-                return response.json()
-                
             except requests.exceptions.Timeout:
+                breaker.record(False, time.monotonic() - started)
                 print(f"Timeout with key for {model_name}. Trying another key...")
                 continue
             except requests.exceptions.RequestException as e:
+                breaker.record(False, time.monotonic() - started)
                 print(f"Error with key for {model_name}: {str(e)}")
                 if attempt == max_retries - 1:
                     raise
-                    
+                continue
+
+            # A 429 is a per-key quota problem, not an unhealthy endpoint
+            breaker.record(response.status_code < 500, time.monotonic() - started)
+
+            if response.status_code == 429:  # Too Many Requests
+                retry_after = parse_retry_after(response.headers.get('Retry-After'))
+                self.schedulers[model_name].penalize(config, retry_after)
+                continue
+
+            try:
+                response.raise_for_status()
+            except requests.exceptions.RequestException as e:
+                print(f"Error with key for {model_name}: {str(e)}")
+                if attempt == max_retries - 1:
+                    raise
+                continue
+
+            result = response.json()
+            if prompt_cache:
+                prompt_cache.set(cache_key, result)
+            return result
+
         raise Exception("All API keys exhausted or rate limited")
 
+_shared_manager: Optional[HuggingFaceManager] = None
+_shared_manager_lock = threading.Lock()
+
+def get_hf_manager() -> HuggingFaceManager:
+    """
+    Returns the process-wide HuggingFaceManager so key budgets survive across requests.
+    """
+    global _shared_manager
+    if _shared_manager is None:
+        with _shared_manager_lock:
+            if _shared_manager is None:
+                _shared_manager = HuggingFaceManager()
+    return _shared_manager
+
 def clean_ai_response(response: str) -> str:
     """Clean AI response by removing unwanted characters and formatting"""
     # Remove [INST] and [/INST] tags
@@ -158,22 +305,55 @@ def clean_ai_response(response: str) -> str:
     
     return response.strip()
 
-def retry_request(url, headers, payload, retries=3, backoff_factor=2):
+def retry_request(func, *args, circuit=None, fallback=None, retries=RETRY_ATTEMPTS, backoff_factor=RETRY_BACKOFF):
+    """
+    Calls func(*args), retrying while the model is loading (503), through the
+    circuit breaker of the given endpoint.
+
+    Args:
+        func (callable): Makes the request and raises on failure.
+        circuit (str): Endpoint URL whose circuit breaker guards the call.
+        fallback: Returned when the circuit is open or all attempts fail.
+
+    Returns:
+        The result of func, or fallback.
+    """
+    breaker = get_breaker(circuit) if circuit else None
     delay = 1  # Initial delay
     for attempt in range(retries):
+        if breaker and not breaker.allow():
+            logging.warning(f"Circuit open for {circuit}; using fallback response.")
+            return fallback
+        started = time.monotonic()
         try:
-            response = requests.post(url, headers=headers, json=payload)
-            response.raise_for_status()  # Raises HTTPError for bad responses
-            return response.json()
+            result = func(*args)
         except requests.exceptions.HTTPError as e:
-            if response.status_code == 503 and attempt < retries - 1:
+            if breaker:
+                breaker.record(False, time.monotonic() - started)
+            if e.response is not None and e.response.status_code == 503 and attempt < retries - 1:
                 print(f"503 Error. Retrying in {delay} seconds...")
                 time.sleep(delay)
                 delay *= backoff_factor
-            else:
-                print(f"Request failed: {e}")
-                return {"error": "Service unavailable, please try again later."}
-    return {"error": "Max retries exceeded."}
+                continue
+            print(f"Request failed: {e}")
+            return fallback
+        except Exception as e:
+            if breaker:
+                breaker.record(False, time.monotonic() - started)
+            print(f"Request failed: {e}")
+            return fallback
+        if breaker:
+            breaker.record(True, time.monotonic() - started)
+        return result
+    return fallback
+
+def _generated_text(data, default: str = "") -> str:
+    """Extracts generated_text from either a list or a dict inference response"""
+    if isinstance(data, list) and data:
+        data = data[0]
+    if isinstance(data, dict):
+        return data.get("generated_text", default)
+    return default
 
 # Language code mapping for T5-BASE
 LANGUAGE_CODES = {
@@ -195,7 +375,7 @@ def translate_text(text: str, target_language: str) -> str:
     target_lang_code = LANGUAGE_CODES.get(target_language.lower(), 'eng_Latn')
     
     try:
-        response = requests.post(
+        response = http_post(
             url,
             headers=headers,
             json={
@@ -239,12 +419,12 @@ def ask_ai(question, context=None, input_format="text"):
             """
             Makes a request to BlenderBot for conversational AI response.
             """
-            response = requests.post(bb_url, headers=headers, json={"inputs": question})
+            response = http_post(bb_url, headers=headers, json={"inputs": question})
             response.raise_for_status()
-            return response.json().get("generated_text", "")
+            return _generated_text(response.json(), "")
 
         # Attempt to get an answer from BlenderBot
-        answer = retry_request(request_blenderbot)
+        answer = retry_request(request_blenderbot, circuit=bb_url, fallback="")
 
         # If BlenderBot returns nothing, fallback to Mistral 7B
         if not answer:
@@ -253,11 +433,11 @@ def ask_ai(question, context=None, input_format="text"):
                 """
                 Makes a request to Mistral-7B for fallback response generation.
                 """
-                response = requests.post(mistral_url, headers=headers, json={"inputs": question})
+                response = http_post(mistral_url, headers=headers, json={"inputs": question})
                 response.raise_for_status()
-                return response.json().get("generated_text", "I'm here to help!")
+                return _generated_text(response.json(), "I'm here to help!")
 
-            answer = retry_request(request_mistral_7b)
+            answer = retry_request(request_mistral_7b, circuit=mistral_url, fallback="I'm here to help!")
 
     # Step 3: Output format based on input format (voice or text)
     if input_format == "voice":
@@ -321,7 +501,7 @@ def generate_topic_summary(
     Generate topic summary using improved API management
     """
     if api_manager is None:
-        api_manager = HuggingFaceManager()
+        api_manager = get_hf_manager()
     
     # Clean and structured prompt
     prompt = {
@@ -384,7 +564,7 @@ def generate_lessons(
     Generate lessons with improved API management
     """
     if api_manager is None:
-        api_manager = HuggingFaceManager()
+        api_manager = get_hf_manager()
         
     def generate_single_lesson(outline: str) -> str:
         prompt = {
@@ -427,17 +607,62 @@ REQUIREMENTS:
     return lessons
 
 
-def generate_quizzes(lesson_content: str) -> List[Dict[str, Union[str, List[str], str]]]:
+# Quiz generation settings
+QUIZ_TOTAL_QUESTIONS = 10
+QUIZ_BATCH_SIZE = 3  # Smaller batch size for more reliable generation
+QUIZ_MAX_BATCH_ATTEMPTS = 3  # Batches issued per needed batch, including retries
+QUIZ_GENERATION_WORKERS = int(os.getenv('QUIZ_GENERATION_WORKERS', 4))
+QUIZ_DUPLICATE_THRESHOLD = 0.8  # Token overlap above which two questions count as duplicates
+
+def _question_tokens(question: str) -> frozenset:
+    """Normalized word set used to compare questions"""
+    return frozenset(re.findall(r'[a-z0-9]+', question.lower()))
+
+def remove_near_duplicates(
+    questions: List[Dict[str, Union[str, List[str], str]]],
+    threshold: float = QUIZ_DUPLICATE_THRESHOLD
+) -> List[Dict[str, Union[str, List[str], str]]]:
+    """
+    Drops questions whose wording overlaps an earlier question by at least threshold (Jaccard).
+
+    Args:
+        questions (list): Parsed quiz questions, in order of preference.
+        threshold (float): Similarity at or above which a question is a duplicate.
+
+    Returns:
+        list: Questions with near-duplicates removed, original order preserved.
+    """
+    unique = []
+    seen = []
+    for question in questions:
+        tokens = _question_tokens(question.get("question", ""))
+        if not tokens:
+            continue
+        if any(len(tokens & other) / len(tokens | other) >= threshold for other in seen):
+            continue
+        seen.append(tokens)
+        unique.append(question)
+    return unique
+
+def generate_quizzes(
+    lesson_content: str,
+    api_manager: Optional[HuggingFaceManager] = None
+) -> List[Dict[str, Union[str, List[str], str]]]:
     """
     Generates multiple-choice quiz questions using Mistral-7B.
+
+    Batches are requested concurrently through the managed key pool and generation
+    stops as soon as enough distinct valid questions exist.
     
     Args:
-        topic (str): The topic for which quiz questions are generated.
+        lesson_content (str): The lesson the quiz questions are generated from.
+        api_manager (HuggingFaceManager): Optional manager; defaults to the shared one.
         
     Returns:
         list: List of formatted questions with answer choices and correct answers.
     """
-    url = "https://api-inference.huggingface.co/models/mistralai/Mistral-7B-Instruct-v0.3"
+    if api_manager is None:
+        api_manager = get_hf_manager()
     
     def format_mistral_prompt(instruction: str) -> str:
         """Formats the prompt in Mistral's expected style"""
@@ -475,8 +700,8 @@ def generate_quizzes(lesson_content: str) -> List[Dict[str, Union[str, List[str]
             
         return [q for q in questions if len(q["choices"]) == 4 and q["correct_answer"]]
     
-    def request_questions(batch_size: int = 3) -> List[Dict[str, Union[str, List[str], str]]]:
-        """Requests a batch of questions from Mistral"""
+    def request_questions(batch_size: int, seed: int) -> List[Dict[str, Union[str, List[str], str]]]:
+        """Requests a batch of questions from Mistral; the seed keeps batches distinct"""
         prompt = format_mistral_prompt(
             f"Generate {batch_size} multiple-choice questions about {lesson_content}. "
             "For each question:\n"
@@ -488,21 +713,21 @@ def generate_quizzes(lesson_content: str) -> List[Dict[str, Union[str, List[str]
         )
         
         try:
-            response = requests.post(
-                url,
-                headers=headers,
-                json={
+            data = api_manager.make_request(
+                model_name="mistral-7b-instruct-v0.3",
+                payload={
                     "inputs": prompt,
                     "parameters": {
                         "max_new_tokens": 512,
                         "temperature": 0.7,
                         "top_p": 0.9,
-                        "return_full_text": False
+                        "return_full_text": False,
+                        "seed": seed
                     }
-                }
+                },
+                timeout=30,
+                max_retries=1
             )
-            response.raise_for_status()
-            data = response.json()
             
             if isinstance(data, list) and data:
                 return parse_quiz_response(data[0].get("generated_text", ""))
@@ -511,40 +736,35 @@ def generate_quizzes(lesson_content: str) -> List[Dict[str, Union[str, List[str]
             return []
             
         except Exception as e:
-            print(f"Error generating questions: {e}")
+            logging.error(f"Error generating questions: {e}")
             return []
     
-    def retry_request(batch_size: int = 3) -> List[Dict[str, Union[str, List[str], str]]]:
-        """Implements retry logic with exponential backoff"""
-        max_attempts = 3
-        base_delay = 1
-        
-        for attempt in range(max_attempts):
-            questions = request_questions(batch_size)
-            if questions:
-                return questions
-                
-            print(f"Attempt {attempt + 1} failed.")
-            if attempt < max_attempts - 1:
-                delay = base_delay * (2 ** attempt)
-                print(f"Retrying in {delay} seconds...")
-                time.sleep(delay)
-        
-        return []
-    
-    # Generate questions in smaller batches
-    total_questions = 10
+    total_questions = QUIZ_TOTAL_QUESTIONS
+    batch_size = QUIZ_BATCH_SIZE
+    batches_needed = -(-total_questions // batch_size)
+    max_batches = batches_needed * QUIZ_MAX_BATCH_ATTEMPTS
     quiz_pool = []
-    batch_size = 3  # Smaller batch size for more reliable generation
-    
-    for i in range(0, total_questions, batch_size):
-        questions_batch = retry_request(batch_size)
-        quiz_pool.extend(questions_batch)
-        
-        if len(quiz_pool) >= total_questions:
-            break
-            
-        time.sleep(2)  # Rate limiting
+
+    executor = ThreadPoolExecutor(
+        max_workers=max(1, min(QUIZ_GENERATION_WORKERS, batches_needed)),
+        thread_name_prefix='quiz-gen'
+    )
+    try:
+        pending = {executor.submit(request_questions, batch_size, seed) for seed in range(batches_needed)}
+        issued = batches_needed
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                quiz_pool = remove_near_duplicates(quiz_pool + future.result())
+            if len(quiz_pool) >= total_questions:
+                break
+            # Top up with fresh batches when the in-flight ones cannot fill the quiz
+            while issued < max_batches and len(quiz_pool) + len(pending) * batch_size < total_questions:
+                pending.add(executor.submit(request_questions, batch_size, issued))
+                issued += 1
+    finally:
+        # Do not wait on batches that are no longer needed
+        executor.shutdown(wait=False, cancel_futures=True)
     
     # Fallback question if generation fails
     if not quiz_pool:
@@ -590,18 +810,18 @@ def text_to_speech(text):
     waveglow_url = "https://api-inference.huggingface.co/models/facebook/waveglow"
     
     def request_tacotron():
-        response = requests.post(tacotron_url, headers=headers, json={"inputs": text})
+        response = http_post(tacotron_url, headers=headers, json={"inputs": text})
         response.raise_for_status()
         return response.content
     
     def request_waveglow(audio):
-        response = requests.post(waveglow_url, headers=headers, json={"inputs": audio})
+        response = http_post(waveglow_url, headers=headers, json={"inputs": audio})
         response.raise_for_status()
         return response.content
 
-    tacotron_audio = retry_request(request_tacotron)
+    tacotron_audio = retry_request(request_tacotron, circuit=tacotron_url)
     if tacotron_audio:
-        return retry_request(request_waveglow, tacotron_audio)
+        return retry_request(request_waveglow, tacotron_audio, circuit=waveglow_url)
     return None
 
 def speech_to_text(audio_data):
@@ -612,11 +832,11 @@ def speech_to_text(audio_data):
     files = {"file": audio_data}
     
     def request():
-        response = requests.post(url, headers=headers, files=files)
+        response = http_post(url, headers=headers, files=files)
         response.raise_for_status()
         return response.json().get("text", "Transcription failed.")
     
-    return retry_request(request)
+    return retry_request(request, circuit=url)
 
 def send_fcm_notification(user_token, title, body):
     """
@@ -646,7 +866,7 @@ def send_fcm_notification(user_token, title, body):
     }
 
     try:
-        response = requests.post(url, json=payload, headers=headers)
+        response = http_post(url, json=payload, headers=headers)
         response.raise_for_status()
         return response.json()
     except requests.exceptions.HTTPError as err:
@@ -0,0 +1,125 @@
+# app/services/bundle_service.py
+import os
+import gzip
+import hashlib
+import logging
+from typing import Any, Dict, Iterable, List, Set, Tuple
+from app.models.content_model import iter_content_events
+from app.services.caching_service import LRUCache, get_cache
+from app.utils.etag import CONTENT_HASH_FIELD, canonical_json, content_hash
+
+# Configure logging for error tracking and debugging
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+BUNDLE_FORMAT = 1
+# Bundles are keyed by content version, so they never go stale; this only bounds storage
+BUNDLE_CACHE_TIMEOUT = int(os.getenv('BUNDLE_CACHE_TIMEOUT', 24 * 3600))
+# Per-worker budget for compressed full bundles
+BUNDLE_PACKAGE_CACHE_MAX_BYTES = int(os.getenv('BUNDLE_PACKAGE_CACHE_MAX_BYTES', 16 * 1024 * 1024))
+BUNDLE_COMPRESSION_LEVEL = int(os.getenv('BUNDLE_COMPRESSION_LEVEL', 6))
+
+_packages = LRUCache(BUNDLE_PACKAGE_CACHE_MAX_BYTES)
+
+def chunk_hash(value: Any) -> str:
+    """Content address of a chunk: SHA-256 of its canonical JSON encoding"""
+    return hashlib.sha256(canonical_json(value)).hexdigest()
+
+def chunk_content(content: Dict[str, Any]) -> List[Tuple[str, Any]]:
+    """
+    Splits content into named chunks: the summary with lesson outlines, then each lesson
+    and each quiz, so an edit to one lesson changes only that lesson's chunk.
+    """
+    chunks = []
+    for event, payload in iter_content_events(content):
+        if event == 'summary':
+            chunks.append(('summary', payload))
+        elif event == 'lesson':
+            chunks.append((f"lesson:{payload['index']}", {'outline': payload['outline'], 'lesson': payload['lesson']}))
+        elif event == 'quiz':
+            chunks.append((f"quiz:{payload['index']}", payload['quiz']))
+    return chunks
+
+def build_bundle(topic: str, level: str, content: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Builds the offline bundle for a content version.
+
+    Args:
+        topic (str): Topic name.
+        level (str): Difficulty level.
+        content (dict): Generated or stored content.
+
+    Returns:
+        dict: {"manifest": ..., "chunks": {hash: value}}. The manifest lists each chunk's
+        name, hash and encoded size in order; identical chunks are stored once.
+    """
+    entries = []
+    chunks = {}
+    for name, value in chunk_content(content):
+        digest = chunk_hash(value)
+        entries.append({'name': name, 'hash': digest, 'size': len(canonical_json(value))})
+        chunks[digest] = value
+    manifest = {
+        'format': BUNDLE_FORMAT,
+        'topic': topic,
+        'level': level,
+        'version': content.get(CONTENT_HASH_FIELD) or content_hash(content),
+        'chunks': entries,
+    }
+    return {'manifest': manifest, 'chunks': chunks}
+
+def get_bundle(topic: str, level: str, content: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Returns the bundle for the given content, building it once per content version and
+    sharing it between workers through the two-tier cache.
+    """
+    version = content.get(CONTENT_HASH_FIELD) or content_hash(content)
+    key = f"bundle:{version}"
+    bundle = get_cache().get(key)
+    if bundle is None:
+        bundle = build_bundle(topic, level, content)
+        get_cache().set(key, bundle, BUNDLE_CACHE_TIMEOUT)
+        logging.info(f"Built offline bundle for '{topic}' ({level}): {len(bundle['chunks'])} chunks")
+    return bundle
+
+def pack(payload: Dict[str, Any]) -> bytes:
+    """Gzip-compresses the canonical JSON encoding of a bundle or delta"""
+    return gzip.compress(canonical_json(payload), compresslevel=BUNDLE_COMPRESSION_LEVEL, mtime=0)
+
+def get_package(bundle: Dict[str, Any]) -> bytes:
+    """
+    Returns the compressed full bundle, compressing each version once per worker.
+    """
+    key = bundle['manifest']['version']
+    package = _packages.get(key)
+    if package is None:
+        package = pack(bundle)
+        _packages.set(key, package, BUNDLE_CACHE_TIMEOUT)
+    return package
+
+def held_chunks(data: Any) -> Set[str]:
+    """
+    Returns the chunk hashes a client already holds, from a delta request body of the form
+    {"manifest": {...}} (the client's current manifest) or {"have": [hash, ...]}.
+
+    Raises:
+        ValueError: If the body has neither form, or its manifest is not an object.
+    """
+    if not isinstance(data, dict):
+        raise ValueError("Request body must be a JSON object")
+    if data.get('manifest') is not None and not isinstance(data['manifest'], dict):
+        raise ValueError("'manifest' must be an object")
+    if isinstance(data.get('have'), list):
+        hashes: Iterable[Any] = data['have']
+    elif isinstance(data.get('manifest'), dict) and isinstance(data['manifest'].get('chunks'), list):
+        hashes = [entry.get('hash') for entry in data['manifest']['chunks'] if isinstance(entry, dict)]
+    else:
+        raise ValueError("Request body must include 'manifest' or 'have'")
+    return {digest for digest in hashes if isinstance(digest, str)}
+
+def build_delta(bundle: Dict[str, Any], held: Set[str]) -> Dict[str, Any]:
+    """
+    Returns the current manifest with only the chunks the client does not hold.
+    The client rebuilds the bundle from the manifest, its own chunks and these.
+    """
+    missing = {digest: value for digest, value in bundle['chunks'].items() if digest not in held}
+    return {'manifest': bundle['manifest'], 'chunks': missing}
@@ -1,40 +1,408 @@
-from flask_caching import Cache
+import os
+import json
+import time
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable, Optional
+from redis.exceptions import RedisError
+from app.services.redis_service import get_redis
+
+# In-process (L1) budget in bytes of serialized values, per worker
+CACHE_L1_MAX_BYTES = int(os.getenv('CACHE_L1_MAX_BYTES', 64 * 1024 * 1024))
+# L1 entries expire sooner than L2 so workers pick up shared changes
+CACHE_L1_TIMEOUT = int(os.getenv('CACHE_L1_TIMEOUT', 300))
+# Shared (L2) Redis entries
+CACHE_L2_TIMEOUT = int(os.getenv('CACHE_L2_TIMEOUT', 3600))
+CACHE_NAMESPACE = 'brightmind'
+
+# Read-through cache in front of Firestore collections
+READ_THROUGH_TTL = float(os.getenv('READ_THROUGH_TTL', 300))
+# Missing documents are remembered briefly so unknown keys do not hit Firestore each time
+READ_THROUGH_NEGATIVE_TTL = float(os.getenv('READ_THROUGH_NEGATIVE_TTL', 30))
+# After the TTL an entry is still served for this long while it is refreshed in the background
+READ_THROUGH_STALE_TTL = float(os.getenv('READ_THROUGH_STALE_TTL', 3600))
+READ_THROUGH_MAX_ENTRIES = int(os.getenv('READ_THROUGH_MAX_ENTRIES', 1024))
+
+class LRUCache:
+    """
+    In-process LRU cache bounded by the total size of the serialized values it holds.
+    """
+    def __init__(self, max_bytes: int = CACHE_L1_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.evicted_bytes = 0
+        self.expirations = 0
+        self._entries = OrderedDict()  # key -> (data, expires_at)
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            data, expires_at = entry
+            if expires_at <= time.monotonic():
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return data
+
+    def set(self, key: str, data: bytes, timeout: int) -> None:
+        if len(data) > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (data, time.monotonic() + timeout)
+            self.bytes += len(data)
+            while self.bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self.evicted_bytes += len(self._entries[oldest][0])
+                self._remove(oldest)
+                self.evictions += 1
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def _remove(self, key: str) -> None:
+        data, _ = self._entries.pop(key)
+        self.bytes -= len(data)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': round(self.hits / lookups, 4) if lookups else 0.0,
+                'entries': len(self._entries),
+                'bytes': self.bytes,
+                'max_bytes': self.max_bytes,
+                'evictions': self.evictions,
+                'evicted_bytes': self.evicted_bytes,
+                'expirations': self.expirations,
+            }
+
+class TwoTierCache:
+    """
+    JSON cache with a per-worker LRU (L1) in front of a shared Redis-protocol store (L2).
+    Without a configured Redis client it behaves as an L1-only cache.
+    """
+    def __init__(self, l1: LRUCache, l1_timeout: int = CACHE_L1_TIMEOUT, l2_timeout: int = CACHE_L2_TIMEOUT,
+                 namespace: str = CACHE_NAMESPACE):
+        self.l1 = l1
+        self.l1_timeout = l1_timeout
+        self.l2_timeout = l2_timeout
+        self.namespace = namespace
+        self.l2_hits = 0
+        self.l2_misses = 0
+        self.l2_errors = 0
+        self._lock = threading.Lock()
+
+    def _l2_key(self, key: str) -> str:
+        return f"{self.namespace}:{key}"
+
+    def _count(self, counter: str) -> None:
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def get(self, key: str) -> Optional[Any]:
+        data = self.l1.get(key)
+        if data is not None:
+            return json.loads(data)
+
+        client = get_redis()
+        if client is None:
+            return None
+        try:
+            data = client.get(self._l2_key(key))
+        except RedisError as e:
+            self._count('l2_errors')
+            logging.warning(f"L2 cache read failed for {key}: {e}")
+            return None
+        if data is None:
+            self._count('l2_misses')
+            return None
+
+        self._count('l2_hits')
+        self.l1.set(key, data, self.l1_timeout)
+        return json.loads(data)
+
+    def set(self, key: str, value: Any, timeout: Optional[int] = None) -> None:
+        data = json.dumps(value, default=str).encode('utf-8')
+        self.l1.set(key, data, min(timeout or self.l1_timeout, self.l1_timeout))
+
+        client = get_redis()
+        if client is None:
+            return
+        try:
+            client.set(self._l2_key(key), data, ex=timeout or self.l2_timeout)
+        except RedisError as e:
+            self._count('l2_errors')
+            logging.warning(f"L2 cache write failed for {key}: {e}")
+
+    def delete(self, key: str) -> None:
+        self.l1.delete(key)
+        client = get_redis()
+        if client is None:
+            return
+        try:
+            client.delete(self._l2_key(key))
+        except RedisError as e:
+            self._count('l2_errors')
+            logging.warning(f"L2 cache delete failed for {key}: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.l2_hits + self.l2_misses
+            l2 = {
+                'enabled': get_redis() is not None,
+                'hits': self.l2_hits,
+                'misses': self.l2_misses,
+                'hit_ratio': round(self.l2_hits / lookups, 4) if lookups else 0.0,
+                'errors': self.l2_errors,
+            }
+        return {'l1': self.l1.stats(), 'l2': l2}
+
+_read_through_caches: Dict[str, 'ReadThroughCache'] = {}
+
+class _ReadEntry:
+    __slots__ = ('value', 'fresh_until', 'stale_until', 'refreshing')
+
+    def __init__(self, value: Any, fresh_until: float, stale_until: float):
+        self.value = value
+        self.fresh_until = fresh_until
+        self.stale_until = stale_until
+        self.refreshing = False
+
+class ReadThroughCache:
+    """
+    In-process read-through cache for documents loaded by a loader function.
+
+    Hits return the cached object without copying, so callers must treat it as read-only.
+    A loader result of None is stored as a short-lived negative entry. Entries past their
+    TTL are served while one background refresh replaces them (stale-while-revalidate).
+    """
+    def __init__(
+        self,
+        loader: Callable[[Hashable], Optional[Any]],
+        ttl: float = READ_THROUGH_TTL,
+        negative_ttl: float = READ_THROUGH_NEGATIVE_TTL,
+        stale_ttl: float = READ_THROUGH_STALE_TTL,
+        max_entries: int = READ_THROUGH_MAX_ENTRIES,
+        name: str = 'read-through'
+    ):
+        self.loader = loader
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.stale_ttl = stale_ttl
+        self.max_entries = max_entries
+        self.name = name
+        self.hits = 0
+        self.stale_hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+        self.loads = 0
+        self.refreshes = 0
+        self.load_errors = 0
+        self.evictions = 0
+        self._entries = OrderedDict()  # key -> _ReadEntry
+        self._lock = threading.Lock()
+        self._key_locks: Dict[Hashable, threading.Lock] = {}
+        self._executor = None
+        _read_through_caches[name] = self
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """
+        Returns the cached value for key, loading it on a miss.
+
+        Raises:
+            Exception: Whatever the loader raises on a synchronous load.
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if now < entry.fresh_until:
+                    self._entries.move_to_end(key)
+                    if entry.value is None:
+                        self.negative_hits += 1
+                    else:
+                        self.hits += 1
+                    return entry.value
+                if entry.value is not None and now < entry.stale_until:
+                    self._entries.move_to_end(key)
+                    self.stale_hits += 1
+                    if not entry.refreshing:
+                        entry.refreshing = True
+                        self._refresh_executor().submit(self._refresh, key)
+                    return entry.value
+            self.misses += 1
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        # One load per key; concurrent callers wait for it and reuse the result
+        with key_lock:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None and time.monotonic() < entry.fresh_until:
+                    return entry.value
+            try:
+                value = self._load(key)
+            finally:
+                with self._lock:
+                    self._key_locks.pop(key, None)
+            return value
+
+    def prime(self, key: Hashable, value: Any) -> None:
+        """Stores a value that was just written, so the next read needs no load"""
+        with self._lock:
+            self._store(key, value, time.monotonic())
+
+    def peek(self, key: Hashable) -> Optional[Any]:
+        """Returns the cached value for key if one is held, without loading or refreshing it"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() < entry.stale_until:
+                return entry.value
+        return None
+
+    def invalidate(self, key: Hashable) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def _load(self, key: Hashable) -> Optional[Any]:
+        try:
+            value = self.loader(key)
+        except Exception:
+            with self._lock:
+                self.load_errors += 1
+            raise
+        with self._lock:
+            self.loads += 1
+            self._store(key, value, time.monotonic())
+        return value
+
+    def _refresh(self, key: Hashable) -> None:
+        try:
+            value = self.loader(key)
+        except Exception as e:
+            logging.warning(f"{self.name} refresh failed for {key}: {e}")
+            with self._lock:
+                self.load_errors += 1
+                entry = self._entries.get(key)
+                if entry is not None:
+                    entry.refreshing = False
+            return
+        with self._lock:
+            self.refreshes += 1
+            self._store(key, value, time.monotonic())
+
+    def _store(self, key: Hashable, value: Any, now: float) -> None:
+        if value is None:
+            entry = _ReadEntry(None, now + self.negative_ttl, now + self.negative_ttl)
+        else:
+            entry = _ReadEntry(value, now + self.ttl, now + self.ttl + self.stale_ttl)
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def _refresh_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix=f"{self.name}-refresh")
+        return self._executor
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.stale_hits + self.negative_hits + self.misses
+            served = lookups - self.misses
+            return {
+                'hits': self.hits,
+                'stale_hits': self.stale_hits,
+                'negative_hits': self.negative_hits,
+                'misses': self.misses,
+                'hit_ratio': round(served / lookups, 4) if lookups else 0.0,
+                'loads': self.loads,
+                'refreshes': self.refreshes,
+                'load_errors': self.load_errors,
+                'evictions': self.evictions,
+                'entries': len(self._entries),
+            }
 
 # Define cache as None initially
 cache = None
 
 def init_cache(app):
     """
-    Initializes cache with app context.
+    Initializes the two-tier cache with app configuration.
     """
     global cache  # Use the global cache variable
-    cache = Cache(config={'CACHE_TYPE': 'SimpleCache', 'CACHE_DEFAULT_TIMEOUT': 300})
-    cache.init_app(app)
+    cache = TwoTierCache(
+        LRUCache(app.config.get('CACHE_L1_MAX_BYTES', CACHE_L1_MAX_BYTES)),
+        l1_timeout=app.config.get('CACHE_L1_TIMEOUT', CACHE_L1_TIMEOUT),
+        l2_timeout=app.config.get('CACHE_L2_TIMEOUT', CACHE_L2_TIMEOUT)
+    )
+    return cache
+
+def get_cache():
+    """
+    Returns the initialized two-tier cache.
+    """
+    if cache:
+        return cache
+    raise RuntimeError("Cache not initialized. Call init_cache(app) first.")
 
-def cache_content(topic, content):
+def _normalize(part):
+    return ' '.join(str(part).split()).lower()
+
+def content_cache_key(topic, level=None, language='english'):
+    """
+    Builds the cache key for generated content, namespaced by topic, level and language.
+    """
+    return f"content:{_normalize(topic)}:{_normalize(level) if level else 'any'}:{_normalize(language)}"
+
+def cache_content(topic, content, level=None, language='english'):
     """
     Caches the generated content for efficient future retrieval.
-    
+
     Args:
-        topic (str): Topic name to use as cache key.
+        topic (str): Topic name.
         content (dict): Content data to cache.
+        level (str): Difficulty level of the content.
+        language (str): Language of the content.
     """
-    if cache:
-        cache.set(topic, content)
-    else:
-        raise RuntimeError("Cache not initialized. Call init_cache(app) first.")
+    get_cache().set(content_cache_key(topic, level, language), content)
 
-def get_cached_content(topic):
+def get_cached_content(topic, level=None, language='english'):
     """
     Retrieves cached content for a topic if available.
-    
+
     Args:
-        topic (str): Topic name to look up in cache.
-    
+        topic (str): Topic name.
+        level (str): Difficulty level of the content.
+        language (str): Language of the content.
+
     Returns:
         dict or None: Cached content, or None if cache miss.
     """
-    if cache:
-        return cache.get(topic)
-    else:
-        raise RuntimeError("Cache not initialized. Call init_cache(app) first.")
\ No newline at end of file
+    return get_cache().get(content_cache_key(topic, level, language))
+
+def get_cache_stats():
+    """
+    Returns per-tier hit, miss and eviction counters, plus read-through cache counters.
+    """
+    stats = get_cache().stats()
+    stats['read_through'] = {name: reader.stats() for name, reader in list(_read_through_caches.items())}
+    return stats
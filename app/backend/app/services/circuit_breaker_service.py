@@ -0,0 +1,162 @@
+# app/services/circuit_breaker_service.py
+import os
+import time
+import logging
+import threading
+from collections import deque
+from typing import Any, Dict
+
+# Configure logging for error tracking and debugging
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+# Rolling window the error and latency rates are computed over
+CIRCUIT_WINDOW_SECONDS = float(os.getenv('CIRCUIT_WINDOW_SECONDS', 60))
+# Calls needed in the window before the circuit may open
+CIRCUIT_MIN_CALLS = int(os.getenv('CIRCUIT_MIN_CALLS', 5))
+CIRCUIT_ERROR_RATE = float(os.getenv('CIRCUIT_ERROR_RATE', 0.5))
+# Calls slower than this count as slow; the circuit opens when too many are slow
+CIRCUIT_SLOW_CALL_SECONDS = float(os.getenv('CIRCUIT_SLOW_CALL_SECONDS', 20))
+CIRCUIT_SLOW_CALL_RATE = float(os.getenv('CIRCUIT_SLOW_CALL_RATE', 0.8))
+# How long an open circuit rejects calls before letting probes through
+CIRCUIT_OPEN_SECONDS = float(os.getenv('CIRCUIT_OPEN_SECONDS', 30))
+CIRCUIT_HALF_OPEN_PROBES = int(os.getenv('CIRCUIT_HALF_OPEN_PROBES', 1))
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+class CircuitOpenError(Exception):
+    """Raised when a call is rejected because the endpoint's circuit is open"""
+    def __init__(self, name: str):
+        super().__init__(f"Circuit open for {name}")
+        self.name = name
+
+class CircuitBreaker:
+    """
+    Tracks the health of one inference endpoint over a rolling window and
+    short-circuits calls while it is failing or too slow.
+    """
+    def __init__(
+        self,
+        name: str,
+        window_seconds: float = CIRCUIT_WINDOW_SECONDS,
+        min_calls: int = CIRCUIT_MIN_CALLS,
+        error_rate: float = CIRCUIT_ERROR_RATE,
+        slow_call_seconds: float = CIRCUIT_SLOW_CALL_SECONDS,
+        slow_call_rate: float = CIRCUIT_SLOW_CALL_RATE,
+        open_seconds: float = CIRCUIT_OPEN_SECONDS,
+        half_open_probes: int = CIRCUIT_HALF_OPEN_PROBES
+    ):
+        self.name = name
+        self.window_seconds = window_seconds
+        self.min_calls = min_calls
+        self.error_rate = error_rate
+        self.slow_call_seconds = slow_call_seconds
+        self.slow_call_rate = slow_call_rate
+        self.open_seconds = open_seconds
+        self.half_open_probes = half_open_probes
+        self.state = CLOSED
+        self.opened_at = 0.0
+        self.times_opened = 0
+        self.rejected = 0
+        self._probes_in_flight = 0
+        self._calls = deque()  # (timestamp, success, latency)
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """
+        Returns True if a call may proceed. Every allowed call must be followed by record().
+        """
+        with self._lock:
+            now = time.monotonic()
+            if self.state == OPEN:
+                if now < self.opened_at + self.open_seconds:
+                    self.rejected += 1
+                    return False
+                self.state = HALF_OPEN
+                self._probes_in_flight = 0
+                logging.info(f"Circuit for {self.name} half-open; probing")
+            if self.state == HALF_OPEN:
+                if self._probes_in_flight >= self.half_open_probes:
+                    self.rejected += 1
+                    return False
+                self._probes_in_flight += 1
+            return True
+
+    def release(self) -> None:
+        """Returns the slot of an allowed call that was never made, without recording an outcome"""
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self._probes_in_flight = max(0, self._probes_in_flight - 1)
+
+    def record(self, success: bool, latency: float) -> None:
+        """Records the outcome of an allowed call"""
+        with self._lock:
+            now = time.monotonic()
+            if self.state == HALF_OPEN:
+                self._probes_in_flight = max(0, self._probes_in_flight - 1)
+                if success and latency < self.slow_call_seconds:
+                    self._calls.clear()
+                    self.state = CLOSED
+                    logging.info(f"Circuit for {self.name} closed")
+                else:
+                    self._trip(now)
+                return
+
+            self._calls.append((now, success, latency))
+            self._trim(now)
+            total = len(self._calls)
+            if self.state == CLOSED and total >= self.min_calls:
+                failures = sum(1 for _, ok, _ in self._calls if not ok)
+                slow = sum(1 for _, _, elapsed in self._calls if elapsed >= self.slow_call_seconds)
+                if failures / total >= self.error_rate or slow / total >= self.slow_call_rate:
+                    self._trip(now)
+
+    def _trip(self, now: float) -> None:
+        self.state = OPEN
+        self.opened_at = now
+        self.times_opened += 1
+        logging.warning(f"Circuit for {self.name} opened for {self.open_seconds}s")
+
+    def _trim(self, now: float) -> None:
+        while self._calls and self._calls[0][0] < now - self.window_seconds:
+            self._calls.popleft()
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            now = time.monotonic()
+            self._trim(now)
+            total = len(self._calls)
+            latencies = sorted(elapsed for _, _, elapsed in self._calls)
+            failures = sum(1 for _, ok, _ in self._calls if not ok)
+            return {
+                'state': self.state,
+                'calls_in_window': total,
+                'error_rate': round(failures / total, 4) if total else 0.0,
+                'p50_latency_ms': round(latencies[total // 2] * 1000, 1) if total else None,
+                'p95_latency_ms': round(latencies[min(total - 1, int(total * 0.95))] * 1000, 1) if total else None,
+                'times_opened': self.times_opened,
+                'rejected': self.rejected,
+                'retry_in_seconds': round(max(0.0, self.opened_at + self.open_seconds - now), 1) if self.state == OPEN else 0,
+            }
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+def get_breaker(name: str) -> CircuitBreaker:
+    """
+    Returns the process-wide circuit breaker for an endpoint (usually its model URL).
+    """
+    breaker = _breakers.get(name)
+    if breaker is None:
+        with _breakers_lock:
+            breaker = _breakers.setdefault(name, CircuitBreaker(name))
+    return breaker
+
+def get_circuit_states() -> Dict[str, Dict[str, Any]]:
+    """
+    Returns a snapshot of every circuit breaker.
+    """
+    with _breakers_lock:
+        breakers = list(_breakers.values())
+    return {breaker.name: breaker.snapshot() for breaker in breakers}
@@ -0,0 +1,138 @@
+# app/services/coalescing_service.py
+import os
+import json
+import time
+import uuid
+import logging
+import threading
+from typing import Any, Callable, Dict
+from redis.exceptions import RedisError
+from app.services.redis_service import get_redis
+
+# Configure logging for error tracking and debugging
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+# How long a worker may hold the shared generation lock before it expires
+COALESCE_LOCK_TTL = int(os.getenv('COALESCE_LOCK_TTL', 900))
+# How long the leader's result stays available to followers in other workers
+COALESCE_RESULT_TTL = int(os.getenv('COALESCE_RESULT_TTL', 120))
+# Longest a follower waits on another worker before generating itself
+COALESCE_WAIT_TIMEOUT = float(os.getenv('COALESCE_WAIT_TIMEOUT', 900))
+COALESCE_POLL_INTERVAL = 0.5
+
+class _Call:
+    """An in-flight call that concurrent callers in this process wait on"""
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+_in_flight: Dict[str, _Call] = {}
+_in_flight_lock = threading.Lock()
+
+def coalesce_key(topic: str, level: str) -> str:
+    """
+    Builds the coalescing key from a normalized topic and level.
+    """
+    normalized_topic = ' '.join(str(topic).split()).lower()
+    return f"{normalized_topic}:{str(level).strip().lower()}"
+
+def single_flight(key: str, func: Callable[[], Any]) -> Any:
+    """
+    Runs func at most once at a time per key. Concurrent callers in this process wait
+    for the in-flight call; callers in other workers wait on a lock in Redis.
+
+    Args:
+        key (str): Coalescing key, see coalesce_key.
+        func (callable): Zero-argument function producing a JSON-serializable result.
+
+    Returns:
+        The result of the single in-flight call.
+    """
+    with _in_flight_lock:
+        call = _in_flight.get(key)
+        leader = call is None
+        if leader:
+            call = _in_flight[key] = _Call()
+
+    if not leader:
+        logging.info(f"Waiting on in-flight call for '{key}'")
+        call.event.wait()
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    try:
+        call.result = _run_across_workers(key, func)
+        return call.result
+    except Exception as e:
+        call.error = e
+        raise
+    finally:
+        with _in_flight_lock:
+            _in_flight.pop(key, None)
+        call.event.set()
+
+def _run_across_workers(key: str, func: Callable[[], Any]) -> Any:
+    """
+    Takes the shared lock for key and runs func, or waits for the worker holding it.
+    """
+    client = get_redis()
+    if client is None:
+        return func()
+
+    lock_key = f"coalesce:lock:{key}"
+    result_key = f"coalesce:result:{key}"
+    token = uuid.uuid4().hex
+    deadline = time.monotonic() + COALESCE_WAIT_TIMEOUT
+
+    while True:
+        try:
+            acquired = client.set(lock_key, token, nx=True, ex=COALESCE_LOCK_TTL)
+        except RedisError as e:
+            logging.warning(f"Shared coalescing lock unavailable, running locally: {e}")
+            return func()
+
+        if acquired:
+            try:
+                result = func()
+                try:
+                    client.set(result_key, json.dumps(result, default=str), ex=COALESCE_RESULT_TTL)
+                except RedisError as e:
+                    logging.warning(f"Failed to publish coalesced result for '{key}': {e}")
+                return result
+            finally:
+                _release_lock(client, lock_key, token)
+
+        # Another worker is running the call; wait for it to publish its result
+        logging.info(f"Waiting on another worker for '{key}'")
+        try:
+            while client.exists(lock_key) and time.monotonic() < deadline:
+                time.sleep(COALESCE_POLL_INTERVAL)
+            published = client.get(result_key)
+        except RedisError as e:
+            logging.warning(f"Lost shared coalescing store, running locally: {e}")
+            return func()
+
+        if published:
+            return json.loads(published)
+        if time.monotonic() >= deadline:
+            logging.warning(f"Timed out waiting on another worker for '{key}', running locally")
+            return func()
+        # The other worker failed without a result; try to take over
+
+def _release_lock(client, lock_key: str, token: str) -> None:
+    """
+    Deletes the lock only if this caller still owns it.
+    """
+    try:
+        with client.pipeline() as pipe:
+            pipe.watch(lock_key)
+            if pipe.get(lock_key) in (token, token.encode()):
+                pipe.multi()
+                pipe.delete(lock_key)
+                pipe.execute()
+            else:
+                pipe.unwatch()
+    except RedisError as e:
+        logging.warning(f"Failed to release coalescing lock {lock_key}: {e}")
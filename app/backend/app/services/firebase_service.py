@@ -1,7 +1,10 @@
 import firebase_admin
 from firebase_admin import credentials, firestore, auth
+from concurrent.futures import ThreadPoolExecutor
+from flask import g, has_request_context
 import logging
 import time
+import os
 
 
 # Configure logging for error tracking and debugging
@@ -9,6 +12,10 @@ logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(
 
 db = None  # Global Firestore client variable, initialized in initialize_firebase
 
+# Batched reads: documents per get_all call and chunks fetched in parallel
+GET_ALL_CHUNK_SIZE = int(os.getenv('FIRESTORE_GET_ALL_CHUNK_SIZE', 100))
+GET_ALL_MAX_WORKERS = int(os.getenv('FIRESTORE_GET_ALL_MAX_WORKERS', 4))
+
 # Retry logic for Firebase operations with exponential backoff
 def retry_operation(func, max_retries=3, backoff_factor=2, *args, **kwargs):
     attempt = 0
@@ -94,6 +101,48 @@ def get_document(collection_name, document_id):
 
     return retry_operation(fetch_document, max_retries=3)
 
+def get_documents(collection_name, document_ids, field_paths=None, chunk_size=GET_ALL_CHUNK_SIZE, max_workers=GET_ALL_MAX_WORKERS):
+    """
+    Fetch several documents from a Firestore collection by ID with batched get_all calls.
+    
+    Parameters:
+    - collection_name: The name (or path) of the Firestore collection.
+    - document_ids: The IDs of the documents to fetch; duplicates are fetched once.
+    - field_paths: Optional list of fields to return instead of whole documents.
+    - chunk_size: Documents per get_all call.
+    - max_workers: Chunks fetched concurrently.
+    
+    Returns:
+    - A dict of document ID to document data. Missing documents, and chunks that
+      still fail after retries, are left out.
+    """
+    if db is None:
+        raise ValueError("Firestore client has not been initialized.")
+    collection_ref = db.collection(collection_name)
+    refs = [collection_ref.document(document_id) for document_id in dict.fromkeys(document_ids)]
+    if not refs:
+        return {}
+    chunks = [refs[i:i + chunk_size] for i in range(0, len(refs), chunk_size)]
+
+    def fetch_chunk(chunk):
+        return retry_operation(lambda: list(db.get_all(chunk, field_paths=field_paths)), max_retries=3)
+
+    if len(chunks) == 1:
+        results = [fetch_chunk(chunks[0])]
+    else:
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(chunks))) as executor:
+            results = list(executor.map(fetch_chunk, chunks))
+
+    documents = {}
+    for snapshots in results:
+        if snapshots is None:
+            logging.error(f"Batched read from {collection_name} failed; returning partial results")
+            continue
+        for snapshot in snapshots:
+            if snapshot.exists:
+                documents[snapshot.id] = snapshot.to_dict()
+    return documents
+
 def set_document(collection_name, document_id, data):
     """
     Add or update a document in a Firestore collection.
@@ -135,4 +184,134 @@ def delete_document(collection_name, document_id):
         logging.info(f"Document {document_id} deleted from collection {collection_name}")
         return True
 
-    return retry_operation(remove_document, max_retries=3)
\ No newline at end of file
+    return retry_operation(remove_document, max_retries=3)
+
+class RequestLoader:
+    """
+    Request-scoped document loader. Reads of the same document path within a request
+    are served from memory, reads queued with prime() are fetched together in one
+    get_all call, and reads and writes are counted for the request metrics.
+
+    Returned documents are shallow copies; writes made through the loader keep its
+    memoized copy current, so a read after a write does not go back to Firestore.
+    """
+    def __init__(self):
+        self.documents = {}  # path -> dict, or None for a missing document
+        self.queued = []
+        self.reads = 0
+        self.writes = 0
+        self.memo_hits = 0
+
+    def prime(self, *paths):
+        """Queues documents to be fetched together with the next load"""
+        self.queued.extend(path for path in paths if path not in self.documents)
+
+    def load(self, path):
+        """
+        Returns the document at path as a dict, or None if it does not exist.
+        """
+        if path in self.documents:
+            self.memo_hits += 1
+        else:
+            self.prime(path)
+            self._fetch_queued()
+        document = self.documents.get(path)
+        return dict(document) if document is not None else None
+
+    def load_many(self, paths):
+        """
+        Returns a dict of path to document (or None) for several documents in one batch.
+        """
+        self.prime(*paths)
+        self._fetch_queued()
+        return {path: self.load(path) for path in paths}
+
+    def _fetch_queued(self):
+        paths = list(dict.fromkeys(path for path in self.queued if path not in self.documents))
+        self.queued = []
+        if not paths:
+            return
+        if db is None:
+            raise ValueError("Firestore client has not been initialized.")
+        snapshots = db.get_all([db.document(path) for path in paths])
+        found = {snapshot.reference.path: snapshot for snapshot in snapshots}
+        self.reads += len(paths)
+        for path in paths:
+            snapshot = found.get(path)
+            self.documents[path] = snapshot.to_dict() if snapshot is not None and snapshot.exists else None
+
+    def set(self, path, data, merge=False):
+        """Sets the document at path, like DocumentReference.set"""
+        db.document(path).set(data, merge=merge)
+        self.writes += 1
+        if merge:
+            current = self.documents.get(path)
+            if current is None:
+                # The rest of the document is unknown
+                self.documents.pop(path, None)
+                return
+            data = {**current, **data}
+        self._remember(path, data)
+
+    def update(self, path, fields):
+        """Updates fields of the document at path, like DocumentReference.update"""
+        db.document(path).update(fields)
+        self.writes += 1
+        current = self.documents.get(path)
+        if current is not None:
+            self._remember(path, {**current, **fields})
+
+    def delete(self, path):
+        """Deletes the document at path"""
+        db.document(path).delete()
+        self.writes += 1
+        self.documents[path] = None
+
+    def _remember(self, path, data):
+        # Server-side values (timestamps, increments) and nested field paths are only
+        # known after a re-read, so such documents are dropped from the memo instead
+        if any('.' in str(key) or type(value).__module__.startswith('google.cloud.firestore') for key, value in data.items()):
+            self.documents.pop(path, None)
+        else:
+            self.documents[path] = data
+
+    def forget(self, *paths):
+        """Drops memoized documents that were written outside the loader, e.g. in a transaction"""
+        for path in paths:
+            self.documents.pop(path, None)
+
+    def record_reads(self, count):
+        """Counts documents read outside the loader, e.g. by a query stream"""
+        self.reads += count
+
+    def record_writes(self, count=1):
+        """Counts writes made outside the loader"""
+        self.writes += count
+
+def get_loader():
+    """
+    Returns the current request's loader. Outside a request a fresh loader is
+    returned, so nothing is memoized across calls.
+    """
+    if not has_request_context():
+        return RequestLoader()
+    loader = getattr(g, 'firestore_loader', None)
+    if loader is None:
+        loader = g.firestore_loader = RequestLoader()
+    return loader
+
+def init_request_metrics(app):
+    """
+    Reports each request's Firestore read and write counts in response headers and the log.
+    """
+    @app.after_request
+    def report_firestore_usage(response):
+        loader = getattr(g, 'firestore_loader', None)
+        if loader is not None:
+            response.headers['X-Firestore-Reads'] = str(loader.reads)
+            response.headers['X-Firestore-Writes'] = str(loader.writes)
+            logging.info(
+                f"Firestore usage: {loader.reads} reads ({loader.memo_hits} served from request memo), "
+                f"{loader.writes} writes"
+            )
+        return response
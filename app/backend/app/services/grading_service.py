@@ -0,0 +1,186 @@
+# app/services/grading_service.py
+from app.services import firebase_service
+from app.services.firebase_service import get_loader
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+import logging
+import os
+
+# Configure logging for error tracking and debugging
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+# Largest number of submissions graded in one call
+GRADING_MAX_BATCH = int(os.getenv('GRADING_MAX_BATCH', 500))
+# Score (percent) at or above which an attempt counts as passed in batch stats
+QUIZ_PASS_SCORE = float(os.getenv('QUIZ_PASS_SCORE', 60))
+# Firestore allows at most 500 writes per batch
+BATCH_WRITE_LIMIT = 500
+
+def normalize_answer(answer: Any) -> Optional[str]:
+    """Answers compare case- and whitespace-insensitively; None means unanswered"""
+    if answer is None:
+        return None
+    return ' '.join(str(answer).split()).casefold()
+
+def build_answer_key(questions: List[Dict[str, Any]]) -> Dict[str, List[Any]]:
+    """
+    Builds the answer key stored with a quiz when it is created.
+
+    Returns:
+        dict: {"ids": question ids, "answers": normalized correct answers}, in quiz order.
+    """
+    return {
+        'ids': [str(question.get('id')) for question in questions],
+        'answers': [normalize_answer(question.get('correct_answer')) for question in questions],
+    }
+
+def grade(
+    answer_keys: List[Dict[str, List[Any]]],
+    submissions: List[Dict[str, Any]],
+    lesson_ids: Optional[List[Optional[str]]] = None
+) -> Dict[str, Any]:
+    """
+    Grades many submissions at once. Every (submission, question) pair is flattened into
+    one array, answers are mapped to integer codes, and the comparison and per-submission
+    and per-question tallies are single vectorized operations.
+
+    Args:
+        answer_keys: One answer key per submission.
+        submissions: Question id to answer, one dict per submission.
+        lesson_ids: The lesson each submission's quiz belongs to. Question ids are only
+            unique within a lesson (generated ids like "q0" repeat), so per-question
+            stats are kept per (lesson id, question id).
+
+    Returns:
+        dict: "correct", "total" and "scores" arrays (one entry per submission) and
+        "question_accuracy" ((lesson id, question id) to fraction answered correctly).
+    """
+    if lesson_ids is None:
+        lesson_ids = [None] * len(submissions)
+    codes: Dict[str, int] = {}
+    attempt_index, question_codes, expected, given = [], [], [], []
+    question_ids: Dict[Tuple[Optional[str], str], int] = {}
+    for attempt, (key, answers, lesson_id) in enumerate(zip(answer_keys, submissions, lesson_ids)):
+        normalized = {str(question_id): normalize_answer(answer) for question_id, answer in (answers or {}).items()}
+        for question_id, correct in zip(key['ids'], key['answers']):
+            attempt_index.append(attempt)
+            question_codes.append(question_ids.setdefault((lesson_id, question_id), len(question_ids)))
+            # Unanswered questions and questions without a correct answer never match
+            expected.append(codes.setdefault(correct, len(codes)) if correct is not None else -1)
+            answer = normalized.get(question_id)
+            given.append(codes.setdefault(answer, len(codes)) if answer is not None else -2)
+
+    count = len(submissions)
+    attempt_index = np.asarray(attempt_index, dtype=np.int64)
+    question_codes = np.asarray(question_codes, dtype=np.int64)
+    matches = (np.asarray(expected, dtype=np.int64) == np.asarray(given, dtype=np.int64)).astype(np.float64)
+
+    correct = np.bincount(attempt_index, weights=matches, minlength=count)
+    total = np.bincount(attempt_index, minlength=count).astype(np.float64)
+    scores = np.divide(correct * 100.0, total, out=np.zeros(count), where=total > 0)
+
+    asked = np.bincount(question_codes, minlength=len(question_ids))
+    right = np.bincount(question_codes, weights=matches, minlength=len(question_ids))
+    accuracy = np.divide(right, asked, out=np.zeros(len(question_ids)), where=asked > 0)
+    return {
+        'correct': correct.astype(np.int64),
+        'total': total.astype(np.int64),
+        'scores': scores,
+        'question_accuracy': {question_id: float(accuracy[code]) for question_id, code in question_ids.items()},
+    }
+
+def summarize(scores: np.ndarray, question_accuracy: Dict[Tuple[Optional[str], str], float]) -> Dict[str, Any]:
+    """
+    Aggregate statistics for a graded batch.
+    """
+    if not len(scores):
+        return {'count': 0}
+    histogram, _ = np.histogram(scores, bins=10, range=(0, 100))
+    hardest = sorted(question_accuracy.items(), key=lambda item: (item[1], str(item[0][0]), item[0][1]))[:5]
+    return {
+        'count': int(len(scores)),
+        'mean': round(float(scores.mean()), 2),
+        'median': round(float(np.median(scores)), 2),
+        'std': round(float(scores.std()), 2),
+        'min': round(float(scores.min()), 2),
+        'max': round(float(scores.max()), 2),
+        'pass_rate': round(float((scores >= QUIZ_PASS_SCORE).mean()), 4),
+        'histogram': histogram.tolist(),
+        'hardest_questions': [
+            {'lesson_id': lesson_id, 'id': question_id, 'accuracy': round(value, 4)}
+            for (lesson_id, question_id), value in hardest
+        ],
+    }
+
+def submit_batch(submissions: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Grades a batch of quiz submissions and stores the scores.
+
+    All quiz documents are read with one batched get, graded together, and the results
+    written with batched writes (up to 500 per commit).
+
+    Args:
+        submissions: Dicts with "user_id", "quiz_id" and "answers" (question id to answer).
+
+    Returns:
+        dict: "results" (one per submission, in order, with the score or an error) and
+        "stats" (aggregates over the graded submissions).
+
+    Raises:
+        ValueError: If the batch is empty, too large, or a submission is malformed.
+    """
+    if not submissions:
+        raise ValueError("At least one submission is required")
+    if len(submissions) > GRADING_MAX_BATCH:
+        raise ValueError(f"At most {GRADING_MAX_BATCH} submissions can be graded at once")
+    for submission in submissions:
+        if not isinstance(submission, dict) or not submission.get('user_id') or not submission.get('quiz_id'):
+            raise ValueError("Each submission needs a user_id and a quiz_id")
+        if not isinstance(submission.get('answers') or {}, dict):
+            raise ValueError("Submission answers must be an object of question id to answer")
+
+    loader = get_loader()
+    paths = [f"users/{submission['user_id']}/quizzes/{submission['quiz_id']}" for submission in submissions]
+    quizzes = loader.load_many(paths)
+
+    graded = [index for index, path in enumerate(paths) if quizzes[path] is not None]
+    keys, lesson_ids = [], []
+    for index in graded:
+        quiz = quizzes[paths[index]]
+        # Quizzes created before answer keys were stored are keyed from their questions
+        keys.append(quiz.get('answer_key') or build_answer_key(quiz.get('questions', [])))
+        lesson_ids.append(quiz.get('lesson_id'))
+    outcome = grade(keys, [submissions[index].get('answers') or {} for index in graded], lesson_ids)
+
+    results: List[Dict[str, Any]] = [
+        {'user_id': submission['user_id'], 'quiz_id': submission['quiz_id'], 'error': 'Quiz not found'}
+        for submission in submissions
+    ]
+    updates = []
+    for position, index in enumerate(graded):
+        score = float(outcome['scores'][position])
+        correct = int(outcome['correct'][position])
+        total = int(outcome['total'][position])
+        results[index] = {
+            'user_id': submissions[index]['user_id'],
+            'quiz_id': submissions[index]['quiz_id'],
+            'score': score,
+            'correct': correct,
+            'total': total,
+        }
+        updates.append((paths[index], {'completed': True, 'score': score, 'correct_count': correct}))
+
+    _write_results(updates)
+    return {'results': results, 'stats': summarize(outcome['scores'], outcome['question_accuracy'])}
+
+def _write_results(updates):
+    """Applies quiz updates with batched writes"""
+    loader = get_loader()
+    client = firebase_service.db
+    for start in range(0, len(updates), BATCH_WRITE_LIMIT):
+        batch = client.batch()
+        for path, fields in updates[start:start + BATCH_WRITE_LIMIT]:
+            batch.update(client.document(path), fields)
+        batch.commit()
+    loader.record_writes(len(updates))
+    loader.forget(*[path for path, _ in updates])
@@ -0,0 +1,158 @@
+# app/services/http_service.py
+import os
+import time
+import logging
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, Any, Optional, Tuple, Union
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Configure logging for error tracking and debugging
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+# Pool sizing, overridable per deployment to match the gunicorn worker/thread count
+HTTP_POOL_MAXSIZE = int(os.getenv('HTTP_POOL_MAXSIZE', 10))
+HF_POOL_MAXSIZE = int(os.getenv('HF_POOL_MAXSIZE', HTTP_POOL_MAXSIZE))
+FCM_POOL_MAXSIZE = int(os.getenv('FCM_POOL_MAXSIZE', HTTP_POOL_MAXSIZE))
+
+# Default (connect, read) timeout applied when a caller does not pass one
+HTTP_CONNECT_TIMEOUT = float(os.getenv('HTTP_CONNECT_TIMEOUT', 5))
+HTTP_READ_TIMEOUT = float(os.getenv('HTTP_READ_TIMEOUT', 30))
+DEFAULT_TIMEOUT = (HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT)
+
+# Hosts that get a dedicated, explicitly sized pool
+POOLED_HOSTS = {
+    'api-inference.huggingface.co': HF_POOL_MAXSIZE,
+    'fcm.googleapis.com': FCM_POOL_MAXSIZE,
+}
+
+@dataclass
+class HostPool:
+    """Keep-alive connection pool and usage counters for a single host"""
+    host: str
+    maxsize: int
+    adapter: HTTPAdapter
+    slots: threading.BoundedSemaphore
+    requests: int = 0
+    waits: int = 0
+    wait_seconds: float = 0.0
+    in_flight: int = 0
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+    def acquire(self):
+        """Take a connection slot, recording how long the caller had to wait"""
+        if not self.slots.acquire(blocking=False):
+            started = time.monotonic()
+            self.slots.acquire()
+            with self.lock:
+                self.waits += 1
+                self.wait_seconds += time.monotonic() - started
+        with self.lock:
+            self.requests += 1
+            self.in_flight += 1
+
+    def release(self):
+        with self.lock:
+            self.in_flight -= 1
+        self.slots.release()
+
+    def connections_opened(self) -> int:
+        """Number of TCP/TLS connections urllib3 had to open for this host"""
+        pools = self.adapter.poolmanager.pools
+        opened = 0
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is not None:
+                opened += getattr(pool, 'num_connections', 0)
+        return opened
+
+    def stats(self) -> Dict[str, Any]:
+        with self.lock:
+            requests_made = self.requests
+            waits = self.waits
+            wait_seconds = self.wait_seconds
+            in_flight = self.in_flight
+        opened = self.connections_opened()
+        reused = max(0, requests_made - opened)
+        return {
+            'maxsize': self.maxsize,
+            'requests': requests_made,
+            'connections_opened': opened,
+            'reuse_ratio': round(reused / requests_made, 4) if requests_made else 0.0,
+            'in_flight': in_flight,
+            'waits': waits,
+            'avg_wait_ms': round(wait_seconds / waits * 1000, 2) if waits else 0.0,
+        }
+
+_session = requests.Session()
+_pools: Dict[str, HostPool] = {}
+_pools_lock = threading.Lock()
+
+def _get_host_pool(url: str) -> HostPool:
+    """
+    Returns the pool for the URL's host, mounting a dedicated adapter on first use.
+    """
+    parts = urlsplit(url)
+    host = parts.hostname or ''
+    pool = _pools.get(host)
+    if pool is not None:
+        return pool
+
+    with _pools_lock:
+        pool = _pools.get(host)
+        if pool is None:
+            maxsize = POOLED_HOSTS.get(host, HTTP_POOL_MAXSIZE)
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=maxsize, pool_block=True)
+            _session.mount(f"{parts.scheme}://{host}", adapter)
+            pool = HostPool(
+                host=host,
+                maxsize=maxsize,
+                adapter=adapter,
+                slots=threading.BoundedSemaphore(maxsize)
+            )
+            _pools[host] = pool
+        return pool
+
+def http_request(
+    method: str,
+    url: str,
+    timeout: Optional[Union[float, Tuple[float, float]]] = None,
+    **kwargs
+) -> requests.Response:
+    """
+    Sends a request through the shared keep-alive session.
+
+    Args:
+        method (str): HTTP method.
+        url (str): Target URL.
+        timeout: Per-call timeout; defaults to (HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT).
+        **kwargs: Passed through to requests (headers, json, data, files...).
+
+    Returns:
+        requests.Response: The response object.
+    """
+    pool = _get_host_pool(url)
+    pool.acquire()
+    try:
+        return _session.request(method, url, timeout=timeout or DEFAULT_TIMEOUT, **kwargs)
+    finally:
+        pool.release()
+
+def http_post(url: str, **kwargs) -> requests.Response:
+    """Sends a POST request through the shared keep-alive session."""
+    return http_request('POST', url, **kwargs)
+
+def http_get(url: str, **kwargs) -> requests.Response:
+    """Sends a GET request through the shared keep-alive session."""
+    return http_request('GET', url, **kwargs)
+
+def get_pool_stats() -> Dict[str, Dict[str, Any]]:
+    """
+    Returns per-host pool statistics (requests, connection reuse ratio, waits).
+    """
+    with _pools_lock:
+        pools = list(_pools.values())
+    return {pool.host: pool.stats() for pool in pools}
@@ -0,0 +1,455 @@
+# app/services/job_service.py
+import os
+import json
+import time
+import uuid
+import heapq
+import atexit
+import base64
+import logging
+import itertools
+import threading
+from dataclasses import dataclass, field, asdict
+from typing import Any, Callable, Dict, List, Optional
+from redis.exceptions import RedisError
+from app.services.redis_service import get_redis
+from app.services.coalescing_service import coalesce_key
+from app.services.api_service import generate_quizzes, text_to_speech
+
+# Configure logging for error tracking and debugging
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+# Worker threads per process pulling jobs from the queue
+JOB_WORKERS = int(os.getenv('JOB_WORKERS', 4))
+# "memory" or "redis"; defaults to redis when a shared store is configured
+JOB_BACKEND = os.getenv('JOB_BACKEND')
+# Concurrent jobs per model and process, e.g. "mistral-7b-instruct-v0.3=2,tacotron2=1"
+JOB_MODEL_CONCURRENCY = os.getenv('JOB_MODEL_CONCURRENCY', '')
+JOB_DEFAULT_MODEL_CONCURRENCY = int(os.getenv('JOB_DEFAULT_MODEL_CONCURRENCY', 2))
+# How long finished jobs and their results are kept
+JOB_RESULT_TTL = int(os.getenv('JOB_RESULT_TTL', 3600))
+JOB_POLL_INTERVAL = 0.5
+
+QUEUED = 'queued'
+RUNNING = 'running'
+SUCCEEDED = 'succeeded'
+FAILED = 'failed'
+FINISHED_STATUSES = {SUCCEEDED, FAILED}
+
+@dataclass
+class Job:
+    """A unit of background work and its outcome"""
+    id: str
+    type: str
+    payload: Dict[str, Any]
+    user_id: Optional[str] = None
+    priority: int = 0  # Higher runs first
+    status: str = QUEUED
+    result: Any = None
+    error: Optional[str] = None
+    dedupe_key: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'Job':
+        return cls(**data)
+
+@dataclass
+class JobType:
+    """A runnable job type and the model whose concurrency limit it counts against"""
+    name: str
+    model: str
+    run: Callable[[Dict[str, Any]], Any]
+    dedupe_key: Optional[Callable[[Dict[str, Any]], Optional[str]]] = None
+
+JOB_TYPES: Dict[str, JobType] = {}
+
+def register_job_type(name, model, run, dedupe_key=None):
+    """
+    Registers a job type that can be enqueued by name.
+    """
+    JOB_TYPES[name] = JobType(name=name, model=model, run=run, dedupe_key=dedupe_key)
+
+def parse_model_limits(spec: str) -> Dict[str, int]:
+    """
+    Parses "model=limit,model=limit" into a dictionary.
+    """
+    limits = {}
+    for item in spec.split(','):
+        if '=' not in item:
+            continue
+        model, limit = item.split('=', 1)
+        try:
+            limits[model.strip()] = max(1, int(limit))
+        except ValueError:
+            logging.warning(f"Ignoring invalid model concurrency limit: {item}")
+    return limits
+
+class InMemoryJobBackend:
+    """Process-local priority queue; jobs do not survive a restart"""
+    def __init__(self):
+        self._jobs: Dict[str, Job] = {}
+        self._queue: List[tuple] = []
+        self._dedupe: Dict[str, str] = {}
+        self._watchers: Dict[str, set] = {}
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+
+    def enqueue(self, job: Job) -> Job:
+        with self._condition:
+            if job.dedupe_key:
+                existing = self._jobs.get(self._dedupe.get(job.dedupe_key))
+                if existing and existing.status not in FINISHED_STATUSES:
+                    return existing
+                self._dedupe[job.dedupe_key] = job.id
+            self._jobs[job.id] = job
+            heapq.heappush(self._queue, (-job.priority, next(self._sequence), job.id))
+            self._condition.notify_all()
+            return job
+
+    def dequeue(self, reserve, release, timeout: float) -> Optional[Job]:
+        deadline = time.monotonic() + timeout
+        with self._condition:
+            while True:
+                for entry in sorted(self._queue):
+                    job = self._jobs[entry[2]]
+                    if reserve(job.type):
+                        self._queue.remove(entry)
+                        heapq.heapify(self._queue)
+                        job.status = RUNNING
+                        job.started_at = time.time()
+                        return job
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return None
+                self._condition.wait(remaining)
+
+    def save(self, job: Job) -> None:
+        with self._condition:
+            self._jobs[job.id] = job
+            if job.status in FINISHED_STATUSES:
+                if job.dedupe_key and self._dedupe.get(job.dedupe_key) == job.id:
+                    del self._dedupe[job.dedupe_key]
+                self._expire_finished()
+            self._condition.notify_all()
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._condition:
+            return self._jobs.get(job_id)
+
+    def wait(self, job_id: str, timeout: float) -> Optional[Job]:
+        deadline = time.monotonic() + timeout
+        with self._condition:
+            while True:
+                job = self._jobs.get(job_id)
+                remaining = deadline - time.monotonic()
+                if job is None or job.status in FINISHED_STATUSES or remaining <= 0:
+                    return job
+                self._condition.wait(remaining)
+
+    def add_watcher(self, job_id: str, user_id: str) -> None:
+        with self._condition:
+            self._watchers.setdefault(job_id, set()).add(user_id)
+
+    def is_watcher(self, job_id: str, user_id: str) -> bool:
+        with self._condition:
+            return user_id in self._watchers.get(job_id, ())
+
+    def notify(self) -> None:
+        with self._condition:
+            self._condition.notify_all()
+
+    def _expire_finished(self) -> None:
+        cutoff = time.time() - JOB_RESULT_TTL
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job.status in FINISHED_STATUSES and (job.finished_at or 0) < cutoff
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+            self._watchers.pop(job_id, None)
+
+class RedisJobBackend:
+    """Queue shared by all workers through a Redis-protocol store"""
+    def __init__(self, client, namespace: str = 'jobs'):
+        self.client = client
+        self.namespace = namespace
+
+    def _job_key(self, job_id):
+        return f"{self.namespace}:job:{job_id}"
+
+    def _dedupe_key(self, dedupe_key):
+        return f"{self.namespace}:dedupe:{dedupe_key}"
+
+    def _watchers_key(self, job_id):
+        return f"{self.namespace}:watchers:{job_id}"
+
+    @property
+    def _queue_key(self):
+        return f"{self.namespace}:queue"
+
+    @staticmethod
+    def _score(job: Job) -> float:
+        # Higher priority first, FIFO within a priority
+        return -job.priority * 10 ** 10 + job.created_at
+
+    def enqueue(self, job: Job) -> Job:
+        if job.dedupe_key:
+            dedupe_key = self._dedupe_key(job.dedupe_key)
+            if not self.client.set(dedupe_key, job.id, nx=True, ex=JOB_RESULT_TTL):
+                current = self.client.get(dedupe_key)
+                existing = self.get(current.decode()) if current else None
+                if existing and existing.status not in FINISHED_STATUSES:
+                    return existing
+                self.client.set(dedupe_key, job.id, ex=JOB_RESULT_TTL)
+        self._write(job)
+        self.client.zadd(self._queue_key, {job.id: self._score(job)})
+        return job
+
+    def dequeue(self, reserve, release, timeout: float) -> Optional[Job]:
+        deadline = time.monotonic() + timeout
+        while True:
+            for raw_id in self.client.zrange(self._queue_key, 0, 49):
+                job = self.get(raw_id.decode())
+                if job is None:
+                    self.client.zrem(self._queue_key, raw_id)
+                    continue
+                if not reserve(job.type):
+                    continue
+                # Only the worker whose ZREM succeeds owns the job
+                if self.client.zrem(self._queue_key, raw_id):
+                    job.status = RUNNING
+                    job.started_at = time.time()
+                    self._write(job)
+                    return job
+                release(job.type)
+            if time.monotonic() >= deadline:
+                return None
+            time.sleep(JOB_POLL_INTERVAL)
+
+    def save(self, job: Job) -> None:
+        self._write(job)
+        if job.status in FINISHED_STATUSES and job.dedupe_key:
+            dedupe_key = self._dedupe_key(job.dedupe_key)
+            current = self.client.get(dedupe_key)
+            if current and current.decode() == job.id:
+                self.client.delete(dedupe_key)
+
+    def get(self, job_id: str) -> Optional[Job]:
+        data = self.client.get(self._job_key(job_id))
+        return Job.from_dict(json.loads(data)) if data else None
+
+    def wait(self, job_id: str, timeout: float) -> Optional[Job]:
+        deadline = time.monotonic() + timeout
+        while True:
+            job = self.get(job_id)
+            if job is None or job.status in FINISHED_STATUSES or time.monotonic() >= deadline:
+                return job
+            time.sleep(JOB_POLL_INTERVAL)
+
+    def add_watcher(self, job_id: str, user_id: str) -> None:
+        key = self._watchers_key(job_id)
+        self.client.sadd(key, user_id)
+        # Outlives the finished job, whose TTL starts when it is saved
+        self.client.expire(key, 2 * JOB_RESULT_TTL)
+
+    def is_watcher(self, job_id: str, user_id: str) -> bool:
+        return bool(self.client.sismember(self._watchers_key(job_id), user_id))
+
+    def notify(self) -> None:
+        pass
+
+    def _write(self, job: Job) -> None:
+        ttl = JOB_RESULT_TTL if job.status in FINISHED_STATUSES else None
+        self.client.set(self._job_key(job.id), json.dumps(job.to_dict(), default=str), ex=ttl)
+
+class JobQueue:
+    """Worker pool running queued jobs with a concurrency limit per model"""
+    def __init__(self, backend, workers: int = JOB_WORKERS, model_limits: Optional[Dict[str, int]] = None, app=None):
+        self.backend = backend
+        self.workers = workers
+        self.model_limits = model_limits or {}
+        self.app = app
+        self._slots: Dict[str, threading.BoundedSemaphore] = {}
+        self._slots_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+
+    def start(self) -> None:
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f'job-worker-{i}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout: float = 5) -> None:
+        self._stop.set()
+        self.backend.notify()
+        for thread in self._threads:
+            thread.join(timeout)
+
+    def submit(self, job_type: str, payload: Dict[str, Any], user_id: Optional[str] = None,
+               priority: int = 0, dedupe_key: Optional[str] = None) -> Job:
+        """
+        Enqueues a job, returning the already queued or running job with the same dedupe key if any.
+        A user who submits work that joins another user's job is recorded as a watcher of it,
+        so they can read its status too.
+
+        Raises:
+            ValueError: If the job type is unknown.
+        """
+        if job_type not in JOB_TYPES:
+            raise ValueError(f"Unknown job type: {job_type}")
+        if dedupe_key is None and JOB_TYPES[job_type].dedupe_key:
+            dedupe_key = JOB_TYPES[job_type].dedupe_key(payload)
+        job = Job(
+            id=uuid.uuid4().hex,
+            type=job_type,
+            payload=payload,
+            user_id=user_id,
+            priority=priority,
+            dedupe_key=dedupe_key
+        )
+        queued = self.backend.enqueue(job)
+        if user_id and queued.user_id and queued.user_id != user_id:
+            self.backend.add_watcher(queued.id, user_id)
+        return queued
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self.backend.get(job_id)
+
+    def can_view(self, job: Job, user_id: str) -> bool:
+        """True if the user submitted the job or joined it through deduplication"""
+        return not job.user_id or job.user_id == user_id or self.backend.is_watcher(job.id, user_id)
+
+    def wait(self, job_id: str, timeout: float) -> Optional[Job]:
+        return self.backend.wait(job_id, timeout)
+
+    def _slot(self, model: str) -> threading.BoundedSemaphore:
+        with self._slots_lock:
+            if model not in self._slots:
+                limit = self.model_limits.get(model, JOB_DEFAULT_MODEL_CONCURRENCY)
+                self._slots[model] = threading.BoundedSemaphore(limit)
+            return self._slots[model]
+
+    def _reserve(self, job_type: str) -> bool:
+        handler = JOB_TYPES.get(job_type)
+        return handler is not None and self._slot(handler.model).acquire(blocking=False)
+
+    def _release(self, job_type: str) -> None:
+        self._slot(JOB_TYPES[job_type].model).release()
+        self.backend.notify()
+
+    def _work(self) -> None:
+        while not self._stop.is_set():
+            try:
+                job = self.backend.dequeue(self._reserve, self._release, timeout=1.0)
+            except RedisError as e:
+                logging.error(f"Job backend unavailable: {e}")
+                time.sleep(1)
+                continue
+            if job is None:
+                continue
+            try:
+                self._run(job)
+            finally:
+                self._release(job.type)
+
+    def _run(self, job: Job) -> None:
+        logging.info(f"Running job {job.id} ({job.type})")
+        try:
+            if self.app is not None:
+                with self.app.app_context():
+                    job.result = JOB_TYPES[job.type].run(job.payload)
+            else:
+                job.result = JOB_TYPES[job.type].run(job.payload)
+            job.status = SUCCEEDED
+        except Exception as e:
+            logging.error(f"Job {job.id} ({job.type}) failed: {str(e)}")
+            job.status = FAILED
+            job.error = str(e)
+        job.finished_at = time.time()
+        try:
+            self.backend.save(job)
+        except RedisError as e:
+            logging.error(f"Failed to store result of job {job.id}: {e}")
+
+def _run_generate_content(payload):
+    # Imported here: content_model binds the Firestore client at import time,
+    # and this module is imported by create_app before Firebase is initialized
+    from app.models.content_model import generate_content
+    return generate_content(payload['user_id'], payload['topic'], payload['level'])
+
+def _dedupe_generate_content(payload):
+    return f"generate_content:{coalesce_key(payload['topic'], payload['level'])}"
+
+def _run_generate_quizzes(payload):
+    return generate_quizzes(payload['lesson_content'])
+
+def _run_text_to_speech(payload):
+    audio = text_to_speech(payload['text'])
+    if not audio:
+        raise RuntimeError("Text-to-Speech failed")
+    if isinstance(audio, (bytes, bytearray)):
+        audio = base64.b64encode(audio).decode('ascii')
+    return {'audio': audio, 'content_type': 'audio/mpeg'}
+
+register_job_type('generate_content', 'mistral-7b-instruct-v0.3', _run_generate_content, _dedupe_generate_content)
+register_job_type('generate_quizzes', 'mistral-7b-instruct-v0.3', _run_generate_quizzes)
+register_job_type('text_to_speech', 'tacotron2', _run_text_to_speech)
+
+job_queue: Optional[JobQueue] = None  # Initialized in init_jobs
+
+def select_job_backend(app, client):
+    """
+    Picks the job backend. Jobs must be shared across workers, since a status poll can
+    reach any of them, so the in-memory backend is only used when chosen explicitly
+    (JOB_BACKEND=memory, for a single-process deployment) or in debug and testing.
+
+    Raises:
+        RuntimeError: If Redis is required but REDIS_URL is not set.
+    """
+    backend_name = app.config.get('JOB_BACKEND') or JOB_BACKEND
+    if backend_name == 'memory':
+        logging.warning("Using the in-memory job backend; jobs are only visible to this process.")
+        return InMemoryJobBackend()
+    if client is not None:
+        return RedisJobBackend(client)
+    if backend_name == 'redis' or not (app.debug or app.testing):
+        raise RuntimeError(
+            "The job backend needs Redis: set REDIS_URL, or JOB_BACKEND=memory for a single-process deployment."
+        )
+    logging.warning("REDIS_URL is not set; using the in-memory job backend.")
+    return InMemoryJobBackend()
+
+def init_jobs(app):
+    """
+    Creates the job queue for the app and starts its worker pool.
+
+    Raises:
+        RuntimeError: If Redis is required but REDIS_URL is not set.
+    """
+    global job_queue
+    backend = select_job_backend(app, get_redis())
+
+    job_queue = JobQueue(
+        backend,
+        workers=JOB_WORKERS,
+        model_limits=parse_model_limits(JOB_MODEL_CONCURRENCY),
+        app=app
+    )
+    job_queue.start()
+    atexit.register(job_queue.stop)
+    return job_queue
+
+def get_job_queue() -> JobQueue:
+    """
+    Returns the app's job queue.
+    """
+    if job_queue is None:
+        raise RuntimeError("Job queue not initialized. Call init_jobs(app) first.")
+    return job_queue
@@ -1,6 +1,7 @@
 # app/services/lesson_service.py
-from app.services.firebase_service import db
-from datetime import datetime, timedelta
+from app.models.progress_model import get_progress_summary
+
+RECENT_LESSONS_LIMIT = 3
 
 def get_recent_lessons(user_id):
     """
@@ -10,12 +11,7 @@ def get_recent_lessons(user_id):
         user_id (str): The user ID for personalized data retrieval.
     
     Returns:
-        list: A list of dictionaries, each representing a recent lesson.
+        list: A list of dictionaries, each a recent lesson's progress fields and its lesson_id.
     """
-    # Retrieve lessons sorted by most recent completion/access timestamp
-    lessons_ref = db.collection('users').document(user_id).collection('progress')
-    recent_lessons_query = lessons_ref.order_by('last_accessed', direction="DESCENDING").limit(3)
-    
-    # Fetch recent lessons
-    recent_lessons = [doc.to_dict() for doc in recent_lessons_query.stream()]
-    return recent_lessons
+    # The progress summary keeps lessons ordered by most recent completion/access
+    return get_progress_summary(user_id).get('recent', [])[:RECENT_LESSONS_LIMIT]
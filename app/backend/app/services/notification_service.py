@@ -2,6 +2,7 @@ import requests
 import os
 import logging
 import time
+from app.services.http_service import http_post
 
 # Load FCM Server Key securely from environment variables
 FCM_SERVER_KEY = os.getenv('FCM_SERVER_KEY')
@@ -49,7 +50,7 @@ def send_fcm_notification(user_token, message_title, message_body):
     }
 
     try:
-        response = requests.post(url, json=payload, headers=headers)
+        response = http_post(url, json=payload, headers=headers)
         response.raise_for_status()  # Ensure we catch non-200 responses
         return response.json()
     except requests.exceptions.HTTPError as err:
@@ -117,7 +118,7 @@ def update_fcm_token(user_id, old_token, new_token):
 
     # Use retry logic for the token update operation
     def perform_update():
-        response = requests.post(url, json=payload, headers=headers)
+        response = http_post(url, json=payload, headers=headers)
         response.raise_for_status()
         return response.json()
 
@@ -0,0 +1,165 @@
+# app/services/prompt_cache_service.py
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from typing import Any, Dict, Optional
+
+# Configure logging for error tracking and debugging
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+PROMPT_CACHE_ENABLED = os.getenv('PROMPT_CACHE_ENABLED', 'true').lower() != 'false'
+PROMPT_CACHE_PATH = os.getenv('PROMPT_CACHE_PATH', 'prompt_cache.db')
+PROMPT_CACHE_MAX_BYTES = int(os.getenv('PROMPT_CACHE_MAX_BYTES', 256 * 1024 * 1024))
+PROMPT_CACHE_TTL = int(os.getenv('PROMPT_CACHE_TTL', 7 * 24 * 3600))
+
+class PromptCache:
+    """
+    Content-addressed, on-disk cache of model responses with TTLs and LRU eviction.
+    Backed by SQLite so entries survive restarts and are shared by workers on one host.
+    """
+    def __init__(self, path: str, max_bytes: int = PROMPT_CACHE_MAX_BYTES, ttl: int = PROMPT_CACHE_TTL):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=10)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS prompt_cache (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                expires_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS prompt_cache_lru ON prompt_cache (last_access)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS prompt_cache_expiry ON prompt_cache (expires_at)")
+        # Running total of entry sizes, kept by triggers so every process sharing the file
+        # sees the same figure and eviction never has to sum the table
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS prompt_cache_meta (
+                id INTEGER PRIMARY KEY CHECK (id = 0),
+                total_bytes INTEGER NOT NULL
+            )
+        """)
+        self._conn.executescript("""
+            BEGIN IMMEDIATE;
+            INSERT OR IGNORE INTO prompt_cache_meta (id, total_bytes)
+                SELECT 0, COALESCE(SUM(size), 0) FROM prompt_cache;
+            CREATE TRIGGER IF NOT EXISTS prompt_cache_size_insert AFTER INSERT ON prompt_cache BEGIN
+                UPDATE prompt_cache_meta SET total_bytes = total_bytes + NEW.size WHERE id = 0;
+            END;
+            CREATE TRIGGER IF NOT EXISTS prompt_cache_size_update AFTER UPDATE OF size ON prompt_cache BEGIN
+                UPDATE prompt_cache_meta SET total_bytes = total_bytes + NEW.size - OLD.size WHERE id = 0;
+            END;
+            CREATE TRIGGER IF NOT EXISTS prompt_cache_size_delete AFTER DELETE ON prompt_cache BEGIN
+                UPDATE prompt_cache_meta SET total_bytes = total_bytes - OLD.size WHERE id = 0;
+            END;
+            COMMIT;
+        """)
+
+    @staticmethod
+    def make_key(model_name: str, payload: Dict[str, Any]) -> str:
+        """
+        Hashes the model name, prompt and generation parameters into a cache key.
+        """
+        canonical = json.dumps({'model': model_name, 'payload': payload}, sort_keys=True, separators=(',', ':'))
+        return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[Any]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM prompt_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            value, expires_at = row
+            if expires_at <= now:
+                self._conn.execute("DELETE FROM prompt_cache WHERE key = ?", (key,))
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE prompt_cache SET last_access = ? WHERE key = ?", (now, key))
+            self.hits += 1
+        return json.loads(value)
+
+    def set(self, key: str, value: Any, ttl: Optional[int] = None) -> None:
+        serialized = json.dumps(value)
+        size = len(serialized.encode('utf-8'))
+        if size > self.max_bytes:
+            return
+        now = time.time()
+        with self._lock:
+            # An upsert rather than INSERT OR REPLACE, whose implicit delete skips the size trigger
+            self._conn.execute(
+                "INSERT INTO prompt_cache (key, value, size, expires_at, last_access) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET value = excluded.value, size = excluded.size, "
+                "expires_at = excluded.expires_at, last_access = excluded.last_access",
+                (key, serialized, size, now + (ttl or self.ttl), now)
+            )
+            self._evict(now)
+
+    def _evict(self, now: float) -> None:
+        """Drops expired entries, then least recently used ones until under max_bytes"""
+        self._conn.execute("DELETE FROM prompt_cache WHERE expires_at <= ?", (now,))
+        total = self._total_bytes()
+        while total > self.max_bytes:
+            rows = self._conn.execute(
+                "SELECT key, size FROM prompt_cache ORDER BY last_access LIMIT 32"
+            ).fetchall()
+            if not rows:
+                break
+            for key, size in rows:
+                if total <= self.max_bytes:
+                    break
+                self._conn.execute("DELETE FROM prompt_cache WHERE key = ?", (key,))
+                total -= size
+                self.evictions += 1
+
+    def _total_bytes(self) -> int:
+        return self._conn.execute("SELECT total_bytes FROM prompt_cache_meta WHERE id = 0").fetchone()[0]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM prompt_cache").fetchone()[0]
+            total = self._total_bytes()
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': round(self.hits / lookups, 4) if lookups else 0.0,
+                'evictions': self.evictions,
+                'entries': entries,
+                'bytes': total,
+                'max_bytes': self.max_bytes,
+            }
+
+_prompt_cache: Optional[PromptCache] = None
+_prompt_cache_lock = threading.Lock()
+
+def get_prompt_cache() -> Optional[PromptCache]:
+    """
+    Returns the process-wide prompt cache, or None if it is disabled or unavailable.
+    """
+    global _prompt_cache, PROMPT_CACHE_ENABLED
+    if not PROMPT_CACHE_ENABLED:
+        return None
+    if _prompt_cache is None:
+        with _prompt_cache_lock:
+            if _prompt_cache is None:
+                try:
+                    _prompt_cache = PromptCache(PROMPT_CACHE_PATH)
+                except sqlite3.Error as e:
+                    logging.error(f"Prompt cache unavailable, continuing without it: {e}")
+                    PROMPT_CACHE_ENABLED = False
+                    return None
+    return _prompt_cache
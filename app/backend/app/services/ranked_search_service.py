@@ -0,0 +1,338 @@
+# app/services/ranked_search_service.py
+import os
+import re
+import math
+import time
+import heapq
+import base64
+import logging
+import threading
+from collections import Counter
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+from app.services import firebase_service
+
+# Configure logging for error tracking and debugging
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+# BM25 parameters: term frequency saturation and length normalization
+BM25_K1 = float(os.getenv('BM25_K1', 1.2))
+BM25_B = float(os.getenv('BM25_B', 0.75))
+# Matches on a corrected (misspelled) query term count for this fraction of an exact match
+TYPO_PENALTY = 0.5
+# Terms shorter than this are never typo-corrected
+TYPO_MIN_LENGTH = 4
+# Full reload interval used when the content snapshot listener cannot be started
+CONTENT_INDEX_REFRESH_SECONDS = float(os.getenv('CONTENT_INDEX_REFRESH_SECONDS', 300))
+
+# Field weights; per-level content fields are named "<field>:<level>"
+FIELD_WEIGHTS = {
+    'name': 3.0,
+    'description': 1.5,
+    'summary': 1.5,
+    'lessons': 1.0,
+}
+
+STOPWORDS = {
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for', 'from', 'how', 'in', 'into', 'is', 'it',
+    'its', 'of', 'on', 'or', 'that', 'the', 'this', 'to', 'was', 'what', 'when', 'with', 'you', 'your',
+}
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+# (suffix, replacement), longest first; a stem keeps at least three characters
+_SUFFIXES = (
+    ('ational', 'ate'), ('ization', 'ize'), ('fulness', 'ful'), ('iveness', 'ive'),
+    ('ingly', ''), ('sses', 'ss'), ('ies', 'y'), ('ment', ''), ('ness', ''),
+    ('ing', ''), ('edly', ''), ('ed', ''), ('ly', ''), ('s', ''),
+)
+
+def stem(word: str) -> str:
+    """
+    Light suffix-stripping stemmer so "learning", "learned" and "learns" share a term.
+    """
+    if len(word) <= 3:
+        return word
+    for suffix, replacement in _SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) + len(replacement) >= 3:
+            if suffix == 's' and word.endswith(('ss', 'us', 'is')):
+                return word
+            return word[:-len(suffix)] + replacement
+    return word
+
+def tokenize(text: str) -> List[str]:
+    """
+    Lowercases, splits on non-alphanumerics, drops stopwords and stems.
+    """
+    return [stem(token) for token in TOKEN_PATTERN.findall(str(text).lower()) if token not in STOPWORDS]
+
+def _deletes(term: str) -> Set[str]:
+    return {term[:i] + term[i + 1:] for i in range(len(term))}
+
+def _within_one_edit(a: str, b: str) -> bool:
+    """True if a and b differ by at most one insertion, deletion, substitution or adjacent swap"""
+    if a == b:
+        return True
+    if abs(len(a) - len(b)) > 1:
+        return False
+    if len(a) == len(b):
+        diffs = [i for i in range(len(a)) if a[i] != b[i]]
+        if len(diffs) == 1:
+            return True
+        return len(diffs) == 2 and diffs[1] == diffs[0] + 1 and a[diffs[0]] == b[diffs[1]] and a[diffs[1]] == b[diffs[0]]
+    if len(a) > len(b):
+        a, b = b, a
+    i = 0
+    while i < len(a) and a[i] == b[i]:
+        i += 1
+    return a[i:] == b[i + 1:]
+
+def _text_of(value: Any) -> str:
+    """Flattens nested lesson structures (lists, or maps written by sanitize_for_firestore) into text"""
+    if isinstance(value, dict):
+        return ' '.join(_text_of(value[key]) for key in sorted(value, key=lambda k: int(k) if str(k).isdigit() else 0))
+    if isinstance(value, (list, tuple)):
+        return ' '.join(_text_of(item) for item in value)
+    return '' if value is None else str(value)
+
+def encode_cursor(offset: int) -> str:
+    return base64.urlsafe_b64encode(str(offset).encode('ascii')).decode('ascii')
+
+def decode_cursor(cursor: Optional[str]) -> int:
+    """
+    Raises:
+        ValueError: If the cursor was not produced by encode_cursor.
+    """
+    if not cursor:
+        return 0
+    try:
+        offset = int(base64.urlsafe_b64decode(cursor.encode('ascii')).decode('ascii'))
+    except Exception:
+        raise ValueError("Invalid cursor")
+    if offset < 0:
+        raise ValueError("Invalid cursor")
+    return offset
+
+class SearchEngine:
+    """
+    Incrementally maintained BM25 index. Each document is a set of named text fields
+    whose weighted term frequencies are combined (BM25F-style) into one score.
+    """
+    def __init__(self, k1: float = BM25_K1, b: float = BM25_B):
+        self.k1 = k1
+        self.b = b
+        self.fields: Dict[str, Dict[str, Counter]] = {}  # key -> field -> term counts
+        self.meta: Dict[str, Dict[str, Any]] = {}
+        self.lengths: Dict[str, float] = {}
+        self.postings: Dict[str, Dict[str, float]] = {}  # term -> key -> weighted tf
+        self.deletion_index: Dict[str, Set[str]] = {}  # one-character deletion -> terms
+        self.total_length = 0.0
+        self._lock = threading.RLock()
+
+    @staticmethod
+    def _weight(field: str) -> float:
+        return FIELD_WEIGHTS.get(field.split(':', 1)[0], 1.0)
+
+    def update_document(self, key: str, fields: Dict[str, Any], meta: Optional[Dict[str, Any]] = None) -> None:
+        """
+        Indexes or replaces the given fields of a document, keeping its other fields.
+
+        Args:
+            key (str): Document key.
+            fields (dict): Field name to text (or nested lesson structure).
+            meta (dict): Extra data merged into the document's metadata.
+        """
+        with self._lock:
+            document = dict(self.fields.get(key, {}))
+            for field, value in fields.items():
+                document[field] = Counter(tokenize(_text_of(value)))
+            merged_meta = {**self.meta.get(key, {}), **(meta or {})}
+            self.remove_document(key)
+            self.fields[key] = document
+            self.meta[key] = merged_meta
+
+            weighted = Counter()
+            length = 0.0
+            for field, counts in document.items():
+                weight = self._weight(field)
+                for term, count in counts.items():
+                    weighted[term] += weight * count
+                    length += weight * count
+            for term, tf in weighted.items():
+                posting = self.postings.get(term)
+                if posting is None:
+                    posting = self.postings[term] = {}
+                    for deleted in _deletes(term):
+                        self.deletion_index.setdefault(deleted, set()).add(term)
+                posting[key] = tf
+            self.lengths[key] = length
+            self.total_length += length
+
+    def remove_document(self, key: str) -> None:
+        with self._lock:
+            document = self.fields.pop(key, None)
+            if document is None:
+                return
+            self.meta.pop(key, None)
+            self.total_length -= self.lengths.pop(key, 0.0)
+            for term in set().union(*document.values()):
+                posting = self.postings[term]
+                del posting[key]
+                if not posting:
+                    del self.postings[term]
+                    for deleted in _deletes(term):
+                        terms = self.deletion_index.get(deleted)
+                        if terms is not None:
+                            terms.discard(term)
+                            if not terms:
+                                del self.deletion_index[deleted]
+
+    def _expand(self, term: str) -> List[Tuple[str, float]]:
+        """Returns (indexed term, weight) for a query term, correcting it if it is unknown"""
+        if term in self.postings:
+            return [(term, 1.0)]
+        if len(term) < TYPO_MIN_LENGTH:
+            return []
+        candidates = set(self.deletion_index.get(term, ()))
+        for deleted in _deletes(term):
+            if deleted in self.postings:
+                candidates.add(deleted)
+            candidates |= self.deletion_index.get(deleted, set())
+        return [(candidate, TYPO_PENALTY) for candidate in candidates if _within_one_edit(term, candidate)]
+
+    def search(self, query: str, k: int, accept: Optional[Callable[[str], bool]] = None) -> List[Tuple[str, float]]:
+        """
+        Returns the k best (key, score) pairs for a query, best first.
+
+        Args:
+            query (str): Free-text query.
+            k (int): Number of results to return.
+            accept: Optional predicate on document keys (e.g. a category filter).
+        """
+        with self._lock:
+            count = len(self.lengths)
+            if not count or k <= 0:
+                return []
+            average_length = self.total_length / count or 1.0
+            scores: Dict[str, float] = {}
+            for term in set(tokenize(query)):
+                for indexed, weight in self._expand(term):
+                    posting = self.postings[indexed]
+                    idf = math.log(1 + (count - len(posting) + 0.5) / (len(posting) + 0.5))
+                    for key, tf in posting.items():
+                        norm = self.k1 * (1 - self.b + self.b * self.lengths[key] / average_length)
+                        scores[key] = scores.get(key, 0.0) + weight * idf * tf * (self.k1 + 1) / (tf + norm)
+            if accept is not None:
+                scores = {key: score for key, score in scores.items() if accept(key)}
+            return heapq.nlargest(k, scores.items(), key=lambda item: (item[1], item[0]))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {'documents': len(self.lengths), 'terms': len(self.postings)}
+
+def topic_key(topic: str) -> str:
+    """Normalizes a topic name into the key its topic and content documents share"""
+    return ' '.join(str(topic).split()).lower()
+
+search_engine = SearchEngine()
+_content_listener = None
+_content_poller: Optional[threading.Thread] = None
+_content_lock = threading.Lock()
+
+def get_search_engine() -> SearchEngine:
+    return search_engine
+
+def index_topic(topic_id: str, data: Dict[str, Any]) -> None:
+    """
+    Indexes a document from the topics collection.
+    """
+    name = data.get('name', '')
+    search_engine.update_document(
+        topic_key(name or topic_id),
+        {'name': name, 'description': data.get('description', '')},
+        {'topic_id': topic_id, 'name': name}
+    )
+
+def unindex_topic(name: str) -> None:
+    """
+    Removes a deleted topic's own fields, keeping any generated content indexed under its name.
+    """
+    key = topic_key(name)
+    if key not in search_engine.fields:
+        return
+    search_engine.update_document(key, {'name': '', 'description': ''}, {'topic_id': None})
+    if not search_engine.lengths.get(key):
+        search_engine.remove_document(key)
+
+def index_content(topic: str, level: str, content: Dict[str, Any]) -> None:
+    """
+    Indexes generated content for a topic and level, next to the topic's name.
+    Called by generate_content after it persists new content, and for every content
+    change the snapshot listener delivers, so all workers see it.
+    """
+    key = topic_key(topic)
+    with search_engine._lock:
+        levels = set(search_engine.meta.get(key, {}).get('levels', [])) | {level}
+        search_engine.update_document(
+            key,
+            {f'summary:{level}': content.get('summary', ''), f'lessons:{level}': content.get('lessons', [])},
+            {'name': search_engine.meta.get(key, {}).get('name') or topic, 'levels': sorted(levels)}
+        )
+
+def unindex_content(topic: str, level: str) -> None:
+    """
+    Removes deleted content for a topic and level, keeping the topic's own fields indexed.
+    """
+    key = topic_key(topic)
+    with search_engine._lock:
+        if key not in search_engine.fields:
+            return
+        levels = set(search_engine.meta.get(key, {}).get('levels', [])) - {level}
+        search_engine.update_document(key, {f'summary:{level}': '', f'lessons:{level}': ''}, {'levels': sorted(levels)})
+        if not search_engine.lengths.get(key) and not search_engine.meta.get(key, {}).get('topic_id'):
+            search_engine.remove_document(key)
+
+def _content_of(doc) -> Tuple[str, str, Dict[str, Any]]:
+    """Returns (topic, level, data) for a content snapshot, whose id is <topic>_<level>"""
+    data = doc.to_dict() or {}
+    topic, _, level = doc.id.rpartition('_')
+    return topic or doc.id, data.get('level', level), data
+
+def _on_content_snapshot(snapshots, changes, read_time) -> None:
+    for change in changes:
+        topic, level, data = _content_of(change.document)
+        try:
+            if change.type.name == 'REMOVED':
+                unindex_content(topic, level)
+            else:
+                index_content(topic, level, data)
+        except Exception as e:
+            logging.error(f"Failed to index content for '{topic}': {e}")
+
+def _poll_content(client) -> None:
+    while True:
+        try:
+            for doc in client.collection('content').select(['summary', 'lessons', 'level']).stream():
+                index_content(*_content_of(doc))
+        except Exception as e:
+            logging.error(f"Content search index refresh failed: {e}")
+        time.sleep(CONTENT_INDEX_REFRESH_SECONDS)
+
+def init_ranked_search(app=None) -> None:
+    """
+    Keeps the search index current with a snapshot listener on the content collection,
+    the way TopicIndex.start does for topics. The listener's first callback delivers
+    the existing content, and every later change reaches every worker. Falls back to
+    periodic full reloads if the listener cannot be started.
+    """
+    global _content_listener, _content_poller
+    with _content_lock:
+        if _content_listener is not None or _content_poller is not None:
+            return
+        client = firebase_service.db
+        try:
+            _content_listener = client.collection('content').on_snapshot(_on_content_snapshot)
+            logging.info("Content search index listening for changes.")
+        except Exception as e:
+            logging.warning(f"Content snapshot listener unavailable, polling instead: {e}")
+            _content_poller = threading.Thread(target=_poll_content, args=(client,), name='search-content-index', daemon=True)
+            _content_poller.start()
@@ -1,47 +1,241 @@
 # app/services/recommendation_service.py
-from app.services.firebase_service import db
+from app.services import firebase_service
+from app.services.firebase_service import get_documents
+from app.services.search_service import get_topic_index
+from app.models.progress_model import get_progress_summary, topic_stats_path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import numpy as np
+from scipy import sparse
+import threading
+import logging
 import random
+import time
+import os
+
+# Configure logging for error tracking and debugging
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+# How often the topic graph is rebuilt from topics and their learner counts
+RECOMMENDATION_GRAPH_REFRESH_SECONDS = float(os.getenv('RECOMMENDATION_GRAPH_REFRESH_SECONDS', 900))
+# Edge weights: curated related_topics links versus topics studied by the same users
+RELATED_TOPIC_WEIGHT = float(os.getenv('RELATED_TOPIC_WEIGHT', 1.0))
+CO_OCCURRENCE_WEIGHT = float(os.getenv('CO_OCCURRENCE_WEIGHT', 0.5))
+RECOMMENDATION_LIMIT = 10
+# Firestore allows at most 500 writes per batch
+BATCH_WRITE_LIMIT = 500
+
+class TopicGraph:
+    """
+    Weighted, symmetric topic-to-topic graph held as a SciPy sparse matrix.
+
+    Edges come from each topic's related_topics list and from co-occurrence in user
+    progress (cosine-normalized, so popular topics do not dominate). Recommending for
+    several seed topics is a single sparse matrix-vector product.
+    """
+    def __init__(self, topic_ids: List[str], topics: Dict[str, Dict[str, Any]], matrix: sparse.csr_matrix):
+        self.topic_ids = topic_ids
+        self.positions = {topic_id: position for position, topic_id in enumerate(topic_ids)}
+        self.topics = topics
+        self.matrix = matrix
+        self.built_at = time.time()
+
+    @classmethod
+    def build(cls, topics: Dict[str, Dict[str, Any]], stats: Dict[str, Dict[str, Any]]) -> 'TopicGraph':
+        """
+        Args:
+            topics: Topic id to topic document.
+            stats: Topic id to its topic_stats document: "learners" (users who studied it)
+                and "co_learners" (other topic id to users who studied both).
+        """
+        topic_ids = sorted(topics)
+        positions = {topic_id: position for position, topic_id in enumerate(topic_ids)}
+        size = len(topic_ids)
+
+        rows, cols = [], []
+        for topic_id, data in topics.items():
+            for related_id in data.get('related_topics') or []:
+                if related_id in positions and related_id != topic_id:
+                    rows.append(positions[topic_id])
+                    cols.append(positions[related_id])
+        related = sparse.csr_matrix((np.ones(len(rows)), (rows, cols)), shape=(size, size))
+        related = ((related + related.T) > 0).astype(np.float64)
+
+        rows, cols, counts = [], [], []
+        degree = np.zeros(size)
+        for topic_id, data in stats.items():
+            position = positions.get(topic_id)
+            if position is None:
+                continue
+            degree[position] = data.get('learners') or 0
+            for other_id, count in (data.get('co_learners') or {}).items():
+                if other_id in positions and other_id != topic_id and count:
+                    rows.append(position)
+                    cols.append(positions[other_id])
+                    counts.append(float(count))
+        co_occurrence = sparse.csr_matrix((counts, (rows, cols)), shape=(size, size))
+        # Both sides of a pair are counted in the same transaction; averaging keeps the matrix symmetric
+        co_occurrence = (co_occurrence + co_occurrence.T) / 2
+        inverse_root = sparse.diags(1.0 / np.sqrt(np.maximum(degree, 1.0)))
+        co_occurrence = inverse_root @ co_occurrence @ inverse_root
+
+        matrix = (RELATED_TOPIC_WEIGHT * related + CO_OCCURRENCE_WEIGHT * co_occurrence).tocsr()
+        return cls(topic_ids, dict(topics), matrix)
+
+    def recommend(self, seed_ids: Iterable[str], limit: int = RECOMMENDATION_LIMIT, exclude: Iterable[str] = ()) -> List[Dict[str, Any]]:
+        """
+        Returns up to limit topics most strongly connected to all seeds, best first.
+        Seeds themselves and excluded ids are never returned; equal scores are ordered randomly.
+        """
+        seeds = [self.positions[seed] for seed in set(seed_ids) if seed in self.positions]
+        if not seeds:
+            return []
+        vector = np.zeros(len(self.topic_ids))
+        vector[seeds] = 1.0
+        scores = self.matrix @ vector
+        scores[seeds] = 0.0
+        excluded = [self.positions[topic_id] for topic_id in exclude if topic_id in self.positions]
+        scores[excluded] = 0.0
+
+        candidates = np.flatnonzero(scores > 0)
+        if len(candidates) > limit:
+            candidates = candidates[np.argpartition(-scores[candidates], limit - 1)[:limit]]
+        order = np.lexsort((np.random.random(len(candidates)), -scores[candidates]))
+        return [self.topics[self.topic_ids[position]] for position in candidates[order]]
+
+    def sample(self, limit: int = RECOMMENDATION_LIMIT) -> List[Dict[str, Any]]:
+        """Returns random topics, for users with nothing to seed recommendations from"""
+        chosen = random.sample(self.topic_ids, min(limit, len(self.topic_ids)))
+        return [self.topics[topic_id] for topic_id in chosen]
+
+_graph: Optional[TopicGraph] = None
+# Held while the graph is built, so concurrent first requests wait for one build
+_build_lock = threading.RLock()
+_refresher: Optional[threading.Thread] = None
+
+def stats_from_memberships(memberships: Iterable[Tuple[str, str]]) -> Dict[str, Dict[str, Any]]:
+    """
+    Computes topic_stats documents (learners and co_learners per topic) from
+    (user id, topic id) pairs.
+    """
+    by_user: Dict[str, set] = {}
+    for user_id, topic_id in memberships:
+        by_user.setdefault(user_id, set()).add(topic_id)
+    stats: Dict[str, Dict[str, Any]] = {}
+    for topic_ids in by_user.values():
+        for topic_id in topic_ids:
+            entry = stats.setdefault(topic_id, {'learners': 0, 'co_learners': {}})
+            entry['learners'] += 1
+            for other_id in topic_ids:
+                if other_id != topic_id:
+                    entry['co_learners'][other_id] = entry['co_learners'].get(other_id, 0) + 1
+    return stats
+
+def _progress_memberships() -> Iterable[Tuple[str, str]]:
+    """Yields (user id, topic id) for every progress document, without reading their fields"""
+    for doc in firebase_service.db.collection_group('progress').select([]).stream():
+        user_ref = doc.reference.parent.parent
+        if user_ref is not None:
+            yield user_ref.id, doc.id
+
+def backfill_topic_stats() -> int:
+    """
+    Computes topic_stats from every user's progress and stores it, replacing what is there.
+    Run once per deployment (flask backfill-topic-stats) for progress written before the
+    counts were kept; from then on progress writes keep them current. Progress written
+    while it runs may be counted twice.
+
+    Returns:
+        int: Number of topic_stats documents written.
+    """
+    client = firebase_service.db
+    items = list(stats_from_memberships(_progress_memberships()).items())
+    for start in range(0, len(items), BATCH_WRITE_LIMIT):
+        batch = client.batch()
+        for topic_id, fields in items[start:start + BATCH_WRITE_LIMIT]:
+            batch.set(client.document(topic_stats_path(topic_id)), fields)
+        batch.commit()
+    logging.info(f"Topic stats backfilled for {len(items)} topics")
+    return len(items)
+
+def _load_topic_stats() -> Dict[str, Dict[str, Any]]:
+    """Reads the topic_stats collection: one document per topic, however many users there are"""
+    return {doc.id: doc.to_dict() or {} for doc in firebase_service.db.collection('topic_stats').stream()}
+
+def refresh_topic_graph() -> TopicGraph:
+    """
+    Rebuilds the topic graph from the topic index and the topic_stats learner counts.
+    """
+    global _graph
+    with _build_lock:
+        started = time.monotonic()
+        graph = TopicGraph.build(get_topic_index().snapshot(), _load_topic_stats())
+        _graph = graph
+    logging.info(f"Topic graph rebuilt: {len(graph.topic_ids)} topics, {graph.matrix.nnz} edges in {time.monotonic() - started:.2f}s")
+    return graph
+
+def _refresh_loop():
+    while True:
+        try:
+            refresh_topic_graph()
+        except Exception as e:
+            logging.error(f"Topic graph refresh failed: {e}")
+        time.sleep(RECOMMENDATION_GRAPH_REFRESH_SECONDS)
+
+def init_recommendation_graph(app=None):
+    """
+    Builds the topic graph in the background and rebuilds it periodically.
+    """
+    global _refresher
+    if _refresher is None:
+        _refresher = threading.Thread(target=_refresh_loop, name='topic-graph', daemon=True)
+        _refresher.start()
+
+def get_topic_graph() -> TopicGraph:
+    """
+    Returns the current topic graph. On a cold start the first caller builds it and
+    concurrent callers wait for that build instead of starting their own.
+    """
+    graph = _graph
+    if graph is None:
+        with _build_lock:
+            graph = _graph
+            if graph is None:
+                graph = refresh_topic_graph()
+    return graph
 
 def get_recommended_lessons(user_id, recent_topic_ids=[], screen='home'):
     """
     Fetches recommended lessons based on user preferences and screen context.
-    
+
     Args:
         user_id (str): The ID of the user for personalized recommendations.
         recent_topic_ids (list): List of recently viewed topic IDs.
         screen (str): The screen context for recommendations ("home" or "downloaded").
-    
+
     Returns:
         list: A list of recommended lesson topics.
     """
     recommendations = []
-    topics_ref = db.collection('topics')
 
     if screen == 'home':
-        # Home screen: Get related topics or other relevant topics not based on popularity
-        for topic_id in recent_topic_ids:
-            related_topics = [doc.to_dict() for doc in topics_ref.where('related_topics', 'array_contains', topic_id).limit(5).stream()]
-            recommendations.extend(related_topics)
-        
-        # If no recent topics provided, fetch a general list of topics (non-popular)
+        # Home screen: topics most connected to the recent ones, scored in one pass over the graph
+        graph = get_topic_graph()
+        recommendations = graph.recommend(recent_topic_ids, RECOMMENDATION_LIMIT)
+
+        # If no recent topics provided, fall back to a random selection (non-popular)
         if not recommendations:
-            general_topics = [doc.to_dict() for doc in topics_ref.limit(10).stream()]
-            recommendations.extend(general_topics)
+            recommendations = graph.sample(RECOMMENDATION_LIMIT)
+        return recommendations
 
     elif screen == 'downloaded':
         # Downloaded screen: Recommend topics that the user started but hasn't downloaded
-        user_progress = db.collection('users').document(user_id).collection('progress').where('status', '==', 'in_progress').stream()
-        in_progress_ids = {doc.id for doc in user_progress}
-
-        user_downloads = db.collection('users').document(user_id).collection('downloads').stream()
-        downloaded_ids = {doc.id for doc in user_downloads}
+        summary = get_progress_summary(user_id)
+        in_progress_ids = set(summary.get('in_progress', []))
+        downloaded_ids = set(summary.get('downloaded', []))
 
-        # Topics in progress but not downloaded
-        recommendations = [
-            doc.to_dict() for doc in topics_ref.stream() 
-            if doc.id in in_progress_ids and doc.id not in downloaded_ids
-        ]
+        # Topics in progress but not downloaded, fetched by id
+        recommendations = list(get_documents('topics', in_progress_ids - downloaded_ids).values())
 
     # Randomize and limit recommendations for variety and performance
     random.shuffle(recommendations)
-    return recommendations[:10]
\ No newline at end of file
+    return recommendations[:10]
@@ -0,0 +1,37 @@
+# app/services/redis_service.py
+import os
+import logging
+from redis import Redis
+
+# Configure logging for error tracking and debugging
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+REDIS_URL = os.getenv('REDIS_URL')
+
+redis_client = None  # Shared Redis client, initialized in init_redis
+
+def init_redis(app):
+    """
+    Connects the shared Redis client used for cross-worker coordination.
+    Features that rely on it fall back to per-process behaviour when REDIS_URL is unset.
+    """
+    global redis_client
+    url = app.config.get('REDIS_URL') or REDIS_URL
+    if not url:
+        logging.info("REDIS_URL not set; shared-store features will run per process.")
+        return None
+    redis_client = Redis.from_url(url)
+    return redis_client
+
+def get_redis():
+    """
+    Returns the shared Redis client, or None if Redis is not configured.
+    """
+    return redis_client
+
+def set_redis_client(client):
+    """
+    Replaces the shared client (e.g. with a fakeredis instance in tests).
+    """
+    global redis_client
+    redis_client = client
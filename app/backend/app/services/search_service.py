@@ -1,59 +1,294 @@
 # app/services/search_service.py
-from app.services.firebase_service import db
+import os
+import time
+import logging
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Set
+from app.services import firebase_service
+from app.services.firebase_service import get_documents
+from app.models.progress_model import STATUS_SETS, get_progress_summary
+from app.services.ranked_search_service import decode_cursor, encode_cursor, get_search_engine, index_topic, unindex_topic
+
+# Configure logging for error tracking and debugging
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+# How long a search waits for the first index build before loading topics itself
+SEARCH_INDEX_READY_TIMEOUT = float(os.getenv('SEARCH_INDEX_READY_TIMEOUT', 5))
+# Full reload interval used when the snapshot listener cannot be started
+SEARCH_INDEX_REFRESH_SECONDS = float(os.getenv('SEARCH_INDEX_REFRESH_SECONDS', 300))
+NGRAM_SIZE = 3
+SEARCH_DEFAULT_LIMIT = 20
+SEARCH_MAX_LIMIT = 100
+
+def _ngrams(text: str, size: int) -> Set[str]:
+    return {text[i:i + size] for i in range(len(text) - size + 1)}
+
+class TopicIndex:
+    """
+    In-memory n-gram inverted index over topic names.
+
+    Every name is indexed by its 1-, 2- and 3-character substrings, so a query is
+    answered by intersecting the posting sets of its n-grams and confirming the
+    substring match on the few candidates left. Matching is the same
+    case-insensitive substring test search_topics has always used.
+    """
+    def __init__(self):
+        self.topics: Dict[str, Dict[str, Any]] = {}
+        self.names: Dict[str, str] = {}
+        self.postings: Dict[str, Set[str]] = {}
+        self.ready = threading.Event()
+        self._lock = threading.RLock()
+        self._listener = None
+        self._poller: Optional[threading.Thread] = None
+
+    def upsert(self, topic_id: str, data: Dict[str, Any]) -> None:
+        """Adds or replaces one topic"""
+        with self._lock:
+            previous = self.topics.get(topic_id)
+            if previous is not None and previous.get('name', '') != data.get('name', ''):
+                unindex_topic(previous.get('name', '') or topic_id)
+            self._remove_postings(topic_id)
+            name = str(data.get('name', '')).lower()
+            self.topics[topic_id] = data
+            index_topic(topic_id, data)
+            self.names[topic_id] = name
+            for size in range(1, NGRAM_SIZE + 1):
+                for gram in _ngrams(name, size):
+                    self.postings.setdefault(gram, set()).add(topic_id)
+
+    def remove(self, topic_id: str) -> None:
+        """Drops one topic and its postings"""
+        with self._lock:
+            previous = self.topics.get(topic_id)
+            if previous is not None:
+                unindex_topic(previous.get('name', '') or topic_id)
+            self._remove_postings(topic_id)
+
+    def _remove_postings(self, topic_id: str) -> None:
+        with self._lock:
+            name = self.names.pop(topic_id, None)
+            self.topics.pop(topic_id, None)
+            if name is None:
+                return
+            for size in range(1, NGRAM_SIZE + 1):
+                for gram in _ngrams(name, size):
+                    posting = self.postings.get(gram)
+                    if posting is not None:
+                        posting.discard(topic_id)
+                        if not posting:
+                            del self.postings[gram]
+
+    def replace_all(self, documents: Iterable[Any]) -> None:
+        """Rebuilds the index from a full set of topic snapshots"""
+        with self._lock:
+            snapshots = list(documents)
+            current = {doc.id for doc in snapshots}
+            for topic_id in [topic_id for topic_id in self.topics if topic_id not in current]:
+                self.remove(topic_id)
+            for doc in snapshots:
+                self.upsert(doc.id, doc.to_dict() or {})
+        self.ready.set()
+
+    def match_ids(self, query: str) -> Set[str]:
+        """
+        Returns the ids of topics whose lowercase name contains query.
+        """
+        query = query.lower()
+        with self._lock:
+            if not query:
+                return set(self.names)
+            size = min(NGRAM_SIZE, len(query))
+            grams = sorted(_ngrams(query, size), key=lambda gram: len(self.postings.get(gram, ())))
+            candidates = set(self.postings.get(grams[0], ()))
+            for gram in grams[1:]:
+                if not candidates:
+                    break
+                candidates &= self.postings.get(gram, set())
+            if len(query) <= NGRAM_SIZE:
+                return candidates
+            return {topic_id for topic_id in candidates if query in self.names[topic_id]}
+
+    def search(self, query: str, allowed_ids: Optional[Set[str]] = None) -> List[Dict[str, Any]]:
+        """
+        Returns matching topics in document id order, optionally limited to allowed_ids.
+        """
+        with self._lock:
+            ids = self.match_ids(query)
+            if allowed_ids is not None:
+                ids &= allowed_ids
+            return [self.topics[topic_id] for topic_id in sorted(ids)]
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Returns a copy of the indexed topics keyed by id"""
+        with self._lock:
+            return dict(self.topics)
+
+    def _on_snapshot(self, snapshots, changes, read_time) -> None:
+        with self._lock:
+            for change in changes:
+                if change.type.name == 'REMOVED':
+                    self.remove(change.document.id)
+                else:
+                    self.upsert(change.document.id, change.document.to_dict() or {})
+        self.ready.set()
+
+    def start(self, client) -> None:
+        """
+        Keeps the index current with a snapshot listener on the topics collection.
+        The listener's first callback delivers every topic, which builds the index.
+        Falls back to periodic full reloads if the listener cannot be started.
+        """
+        try:
+            self._listener = client.collection('topics').on_snapshot(self._on_snapshot)
+            logging.info("Topic search index listening for changes.")
+        except Exception as e:
+            logging.warning(f"Topic snapshot listener unavailable, polling instead: {e}")
+            self._poller = threading.Thread(target=self._poll, args=(client,), name='topic-index', daemon=True)
+            self._poller.start()
+
+    def _poll(self, client) -> None:
+        while True:
+            try:
+                self.replace_all(client.collection('topics').stream())
+            except Exception as e:
+                logging.error(f"Topic index refresh failed: {e}")
+            time.sleep(SEARCH_INDEX_REFRESH_SECONDS)
+
+    def stop(self) -> None:
+        if self._listener is not None:
+            self._listener.unsubscribe()
+            self._listener = None
+
+topic_index = None  # Process-wide index, initialized in init_search_index
+_topic_index_lock = threading.Lock()
+
+def init_search_index(app=None):
+    """
+    Builds the topic index in the background and keeps it current.
+    """
+    global topic_index
+    with _topic_index_lock:
+        if topic_index is None:
+            topic_index = TopicIndex()
+            topic_index.start(firebase_service.db)
+    return topic_index
+
+def get_topic_index():
+    """
+    Returns a ready topic index, loading topics directly if the first build has not arrived.
+    """
+    index = topic_index or init_search_index()
+    if not index.ready.wait(SEARCH_INDEX_READY_TIMEOUT):
+        logging.warning("Topic index not ready; loading topics directly.")
+        index.replace_all(firebase_service.db.collection('topics').stream())
+    return index
+
+def _category_topic_ids(user_id, category):
+    """
+    Returns the topic ids a category is limited to, None for "all", or an empty set
+    for an unknown category.
+    """
+    if category == 'all':
+        return None
+    if category in STATUS_SETS:
+        return set(get_progress_summary(user_id).get(category, []))
+    return set()
+
+def _user_topics(topic_ids):
+    """
+    Returns the topics for a user's progress or downloads, keyed by id.
+    Served from the index once it is built; before that only these documents are
+    fetched, with batched reads, rather than the whole catalogue.
+    """
+    index = topic_index
+    if index is not None and index.ready.is_set():
+        with index._lock:
+            return {topic_id: index.topics[topic_id] for topic_id in topic_ids if topic_id in index.topics}
+    return get_documents('topics', topic_ids)
+
+def _substring_ids(topics, query):
+    query = query.lower()
+    return {topic_id for topic_id, topic in topics.items() if query in str(topic.get('name', '')).lower()}
+
+def ranked_search(user_id, query, category='all', limit=SEARCH_DEFAULT_LIMIT, cursor=None):
+    """
+    Searches topic names, descriptions and generated summaries and lessons, best match first.
+
+    Topics are ranked by BM25 relevance. Topics whose names contain the query as a
+    substring but share no terms with it follow, so nothing the plain search found is lost.
+
+    Args:
+        user_id (str): The user ID for personalized data.
+        query (str): Search term.
+        category (str): Category to search within ("all", "in_progress", "completed", "downloaded").
+        limit (int): Maximum number of results to return.
+        cursor (str): Cursor returned with the previous page, if any.
+
+    Returns:
+        tuple: (results, next_cursor); next_cursor is None on the last page.
+
+    Raises:
+        ValueError: If the cursor is invalid.
+    """
+    offset = decode_cursor(cursor)
+    limit = max(1, min(int(limit), SEARCH_MAX_LIMIT))
+    engine = get_search_engine()
+    allowed_ids = _category_topic_ids(user_id, category)
+    if allowed_ids is None:
+        index = get_topic_index()
+        # Copied under the lock so topics removed by the listener meanwhile are still found
+        with index._lock:
+            topics = dict(index.topics)
+            substring_ids = index.match_ids(query)
+    elif not allowed_ids:
+        return [], None
+    else:
+        topics = _user_topics(allowed_ids)
+        substring_ids = _substring_ids(topics, query)
+
+    def accept(key):
+        return allowed_ids is None or engine.meta.get(key, {}).get('topic_id') in allowed_ids
+
+    # One extra result tells us whether another page exists
+    wanted = offset + limit + 1
+    results = []
+    seen = set()
+    for key, score in engine.search(query, wanted, accept):
+        meta = engine.meta.get(key, {})
+        topic_id = meta.get('topic_id')
+        topic = topics.get(topic_id) if topic_id else None
+        result = dict(topic) if topic else {'name': meta.get('name', key)}
+        if meta.get('levels'):
+            result['levels'] = meta['levels']
+        result['score'] = round(score, 4)
+        results.append(result)
+        seen.add(topic_id)
+
+    if len(results) < wanted:
+        for topic_id in sorted(substring_ids - seen):
+            if len(results) >= wanted:
+                break
+            if topic_id in topics:
+                results.append({**topics[topic_id], 'score': 0.0})
+
+    page = results[offset:offset + limit]
+    next_cursor = encode_cursor(offset + limit) if len(results) > offset + limit else None
+    return page, next_cursor
 
 def search_topics(user_id, query, category):
     """
     Searches topics within a specified category based on user input.
-    
+
     Args:
         user_id (str): The user ID for personalized data.
         query (str): Search term to filter topics.
         category (str): Category to search within ("all", "in_progress", "completed", "downloaded").
-    
+
     Returns:
         list: Topics matching the search criteria within the specified category.
     """
-    query = query.lower()
-    results = []
-
-    # Reference to topics collection
-    collection_ref = db.collection('topics')
-
-    if category == 'all':
-        # Fetch all topics that match the query
-        results = [
-            doc.to_dict() for doc in collection_ref.stream()
-            if query in doc.to_dict().get('name', '').lower()
-        ]
-    
-    elif category == 'in_progress':
-        # Fetch only topics marked as "in progress" by the user
-        user_progress = db.collection('users').document(user_id).collection('progress').where('status', '==', 'in_progress').stream()
-        in_progress_ids = {doc.id for doc in user_progress}
-
-        results = [
-            doc.to_dict() for doc in collection_ref.stream()
-            if doc.id in in_progress_ids and query in doc.to_dict().get('name', '').lower()
-        ]
-    
-    elif category == 'completed':
-        # Fetch only topics marked as "completed" by the user
-        user_progress = db.collection('users').document(user_id).collection('progress').where('status', '==', 'completed').stream()
-        completed_ids = {doc.id for doc in user_progress}
-
-        results = [
-            doc.to_dict() for doc in collection_ref.stream()
-            if doc.id in completed_ids and query in doc.to_dict().get('name', '').lower()
-        ]
-    
-    elif category == 'downloaded':
-        # Fetch only topics downloaded by the user
-        user_downloads = db.collection('users').document(user_id).collection('downloads').stream()
-        downloaded_ids = {download.id for download in user_downloads}
-
-        results = [
-            doc.to_dict() for doc in collection_ref.stream()
-            if doc.id in downloaded_ids and query in doc.to_dict().get('name', '').lower()
-        ]
-
-    return results
\ No newline at end of file
+    allowed_ids = _category_topic_ids(user_id, category)
+    if allowed_ids is None:
+        return get_topic_index().search(query)
+    topics = _user_topics(allowed_ids)
+    return [topics[topic_id] for topic_id in sorted(_substring_ids(topics, query))]
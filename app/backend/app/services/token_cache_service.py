@@ -0,0 +1,141 @@
+# app/services/token_cache_service.py
+import os
+import time
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+from redis.exceptions import RedisError
+from app.services.redis_service import get_redis
+
+# Configure logging for error tracking and debugging
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+# How long a token stays verified without rechecking Firebase Auth and Firestore.
+# This bounds how long another worker may keep accepting a revoked token.
+TOKEN_CACHE_TTL = float(os.getenv('TOKEN_CACHE_TTL', 60))
+TOKEN_CACHE_MAX_ENTRIES = int(os.getenv('TOKEN_CACHE_MAX_ENTRIES', 10000))
+# Revocations are kept this long when the token carries no expiry
+TOKEN_REVOCATION_TTL = int(os.getenv('TOKEN_REVOCATION_TTL', 7 * 24 * 3600))
+
+@dataclass
+class VerifiedPrincipal:
+    """A user whose token passed the full Firebase Auth and Firestore checks"""
+    user_id: str
+    user_data: Dict[str, Any]
+    verified_until: float
+
+_principals = OrderedDict()  # token hash -> VerifiedPrincipal
+_revoked: Dict[str, float] = {}  # token hash -> wall-clock time the revocation can be forgotten
+_lock = threading.Lock()
+_stats = {'hits': 0, 'misses': 0, 'revocations': 0, 'invalidations': 0}
+
+def hash_token(token: str) -> str:
+    """
+    Hashes a raw token so tokens are never held in memory or Redis as cache keys.
+    """
+    return hashlib.sha256(token.encode('utf-8')).hexdigest()
+
+def _revoked_key(token_hash: str) -> str:
+    return f"auth:revoked:{token_hash}"
+
+def get_principal(token_hash: str, user_id: str) -> Optional[VerifiedPrincipal]:
+    """
+    Returns the cached principal for a token if it is still fresh and matches user_id.
+    """
+    with _lock:
+        principal = _principals.get(token_hash)
+        if principal is None or principal.user_id != user_id or principal.verified_until <= time.monotonic():
+            if principal is not None:
+                del _principals[token_hash]
+            _stats['misses'] += 1
+            return None
+        _principals.move_to_end(token_hash)
+        _stats['hits'] += 1
+        return principal
+
+def store_principal(token_hash: str, user_id: str, user_data: Dict[str, Any]) -> None:
+    """
+    Caches a principal after a full verification.
+    """
+    with _lock:
+        _principals[token_hash] = VerifiedPrincipal(user_id, user_data, time.monotonic() + TOKEN_CACHE_TTL)
+        _principals.move_to_end(token_hash)
+        while len(_principals) > TOKEN_CACHE_MAX_ENTRIES:
+            _principals.popitem(last=False)
+
+def is_revoked(token_hash: str) -> bool:
+    """
+    Checks the local revocation list, then the shared one in Redis.
+    Called on cache misses only, so hits stay free of network calls.
+    """
+    with _lock:
+        forget_at = _revoked.get(token_hash)
+        if forget_at is not None:
+            if forget_at > time.time():
+                return True
+            del _revoked[token_hash]
+
+    client = get_redis()
+    if client is None:
+        return False
+    try:
+        return bool(client.exists(_revoked_key(token_hash)))
+    except RedisError as e:
+        logging.warning(f"Could not check token revocation in Redis: {e}")
+        return False
+
+def revoke_token(token: str, expires_at: Optional[float] = None) -> None:
+    """
+    Revokes a token so it is rejected even though its signature is still valid.
+
+    Args:
+        token (str): The raw token, with or without the "Bearer " prefix.
+        expires_at (float): The token's exp claim; the revocation is dropped after it.
+    """
+    token_hash = hash_token(token.replace("Bearer ", ""))
+    forget_at = expires_at or time.time() + TOKEN_REVOCATION_TTL
+    with _lock:
+        _principals.pop(token_hash, None)
+        _revoked[token_hash] = forget_at
+        _stats['revocations'] += 1
+
+    client = get_redis()
+    if client is not None:
+        try:
+            client.set(_revoked_key(token_hash), 1, ex=max(1, int(forget_at - time.time())))
+        except RedisError as e:
+            logging.warning(f"Could not share token revocation through Redis: {e}")
+
+def invalidate_user(user_id: str) -> None:
+    """
+    Drops every cached principal for a user, e.g. after their profile changes.
+    """
+    with _lock:
+        stale = [token_hash for token_hash, principal in _principals.items() if principal.user_id == user_id]
+        for token_hash in stale:
+            del _principals[token_hash]
+        _stats['invalidations'] += 1
+
+def clear_token_cache() -> None:
+    """
+    Drops all cached principals and local revocations.
+    """
+    with _lock:
+        _principals.clear()
+        _revoked.clear()
+
+def get_token_cache_stats() -> Dict[str, Any]:
+    """
+    Returns hit, miss, revocation and size counters for the token cache.
+    """
+    with _lock:
+        lookups = _stats['hits'] + _stats['misses']
+        return {
+            **_stats,
+            'hit_ratio': round(_stats['hits'] / lookups, 4) if lookups else 0.0,
+            'entries': len(_principals),
+            'revoked': len(_revoked),
+        }
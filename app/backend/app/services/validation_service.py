@@ -8,6 +8,7 @@ import os
 from jwt import InvalidTokenError, ExpiredSignatureError
 from app.models.user_model import store_user_data, update_last_login
 from app.services.firebase_service import get_user_by_id, auth
+from app.services.token_cache_service import get_principal, hash_token, is_revoked, store_principal
 from werkzeug.security import generate_password_hash, check_password_hash
 
 JWT_SECRET = os.getenv('JWT_SECRET')
@@ -81,6 +82,7 @@ def validate_signup_input(data):
 def validate_jwt_token(token):
     """
     Validates a JWT token and retrieves the associated user data from Firestore.
+    A token verified within TOKEN_CACHE_TTL is accepted after the local HS256 check alone.
     
     Args:
         token (str): The JWT token to validate
@@ -115,6 +117,18 @@ def validate_jwt_token(token):
             logging.error("Token has expired")
             return None
 
+        # Recently verified tokens skip the Firebase Auth and Firestore round trips
+        token_hash = hash_token(token)
+        principal = get_principal(token_hash, user_id)
+        if principal:
+            update_last_login(user_id)
+            decoded_token['user_data'] = dict(principal.user_data)
+            return decoded_token
+
+        if is_revoked(token_hash):
+            logging.error(f"Revoked token presented for user: {user_id}")
+            return False
+
         # First, verify the user exists in Firebase Auth
         try:
             auth_user = auth.get_user(user_id)
@@ -149,6 +163,7 @@ def validate_jwt_token(token):
             
             # Add user data to decoded token
             decoded_token['user_data'] = firestore_user
+            store_principal(token_hash, user_id, dict(firestore_user))
             
             logging.info(f"Token validated successfully for user: {user_id}")
             return decoded_token
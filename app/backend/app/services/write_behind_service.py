@@ -0,0 +1,190 @@
+# app/services/write_behind_service.py
+import os
+import atexit
+import logging
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from google.api_core.exceptions import NotFound
+from app.services import firebase_service
+
+# Configure logging for error tracking and debugging
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+# Seconds between background flushes
+WRITE_BEHIND_FLUSH_INTERVAL = float(os.getenv('WRITE_BEHIND_FLUSH_INTERVAL', 30))
+# Number of distinct pending documents that triggers an early flush
+WRITE_BEHIND_MAX_PENDING = int(os.getenv('WRITE_BEHIND_MAX_PENDING', 500))
+# Firestore rejects batches with more than 500 writes
+FIRESTORE_BATCH_LIMIT = 500
+
+class WriteBehindBuffer:
+    """
+    Collects hot, loss-tolerant document updates in memory and writes them to
+    Firestore in batches, coalescing repeated updates to the same document.
+
+    Writes are updates of existing documents: an update to a document that has been
+    deleted meanwhile is dropped rather than recreating it.
+    """
+    def __init__(
+        self,
+        flush_interval: float = WRITE_BEHIND_FLUSH_INTERVAL,
+        max_pending: int = WRITE_BEHIND_MAX_PENDING,
+        client_getter: Callable[[], Any] = lambda: firebase_service.db
+    ):
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.client_getter = client_getter
+        self.enqueued = 0
+        self.flushed_documents = 0
+        self.batches = 0
+        self.errors = 0
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def set_fields(self, path: str, fields: Dict[str, Any]) -> None:
+        """
+        Queues field values for a document; a later value for the same field replaces an earlier one.
+
+        Args:
+            path (str): Document path, e.g. "users/<uid>".
+            fields (dict): Field values to update in the existing document.
+        """
+        with self._lock:
+            self._pending.setdefault(path, {}).update(fields)
+            self.enqueued += 1
+            if len(self._pending) >= self.max_pending:
+                self._wake.set()
+
+    def flush(self) -> int:
+        """
+        Writes every pending document in batches of up to FIRESTORE_BATCH_LIMIT.
+        Documents in a failed batch are re-queued behind any newer updates.
+
+        Returns:
+            int: Number of documents written.
+        """
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, {}
+            if not pending:
+                return 0
+
+            client = self.client_getter()
+            if client is None:
+                self._requeue(pending)
+                return 0
+
+            written = 0
+            items = list(pending.items())
+            for start in range(0, len(items), FIRESTORE_BATCH_LIMIT):
+                chunk = items[start:start + FIRESTORE_BATCH_LIMIT]
+                batch = client.batch()
+                for path, fields in chunk:
+                    batch.update(client.document(path), fields)
+                try:
+                    batch.commit()
+                except NotFound:
+                    # A document was deleted since its update was queued, which fails the
+                    # whole batch; write the chunk one document at a time instead
+                    written += self._update_each(client, chunk)
+                    continue
+                except Exception as e:
+                    logging.error(f"Write-behind flush of {len(chunk)} documents failed: {e}")
+                    with self._lock:
+                        self.errors += 1
+                    self._requeue(dict(chunk))
+                    continue
+                written += len(chunk)
+                with self._lock:
+                    self.batches += 1
+                    self.flushed_documents += len(chunk)
+            return written
+
+    def _update_each(self, client: Any, chunk: List[Tuple[str, Dict[str, Any]]]) -> int:
+        """Updates documents one by one, dropping updates to documents that no longer exist"""
+        written = 0
+        for path, fields in chunk:
+            try:
+                client.document(path).update(fields)
+            except NotFound:
+                logging.info(f"Write-behind update to deleted document {path} dropped")
+                continue
+            except Exception as e:
+                logging.error(f"Write-behind update of {path} failed: {e}")
+                with self._lock:
+                    self.errors += 1
+                self._requeue({path: fields})
+                continue
+            written += 1
+            with self._lock:
+                self.flushed_documents += 1
+        return written
+
+    def _requeue(self, writes: Dict[str, Dict[str, Any]]) -> None:
+        """Puts back writes from a failed flush; fields updated since keep their newer value"""
+        with self._lock:
+            for path, older in writes.items():
+                newer = self._pending.setdefault(path, {})
+                for field, value in older.items():
+                    newer.setdefault(field, value)
+
+    def _run(self) -> None:
+        while not self._stopped.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                logging.error(f"Write-behind flush failed: {e}")
+
+    def start(self) -> None:
+        """Starts the background flush thread"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='write-behind', daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        """Stops the flush thread and writes whatever is still pending"""
+        self._stopped.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.flush_interval)
+            self._thread = None
+        self.flush()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'pending_documents': len(self._pending),
+                'enqueued': self.enqueued,
+                'flushed_documents': self.flushed_documents,
+                'write_reduction': round(self.enqueued / self.flushed_documents, 2) if self.flushed_documents else None,
+                'batches': self.batches,
+                'errors': self.errors,
+            }
+
+write_behind = None  # Process-wide buffer, initialized in init_write_behind
+
+def init_write_behind(app):
+    """
+    Starts the write-behind buffer and flushes it when the process exits.
+    """
+    global write_behind
+    if write_behind is None:
+        write_behind = WriteBehindBuffer(
+            flush_interval=app.config.get('WRITE_BEHIND_FLUSH_INTERVAL', WRITE_BEHIND_FLUSH_INTERVAL),
+            max_pending=app.config.get('WRITE_BEHIND_MAX_PENDING', WRITE_BEHIND_MAX_PENDING)
+        )
+        write_behind.start()
+        atexit.register(write_behind.stop)
+    return write_behind
+
+def get_write_behind():
+    """
+    Returns the write-behind buffer, or None if it has not been started.
+    """
+    return write_behind
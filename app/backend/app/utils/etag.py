@@ -0,0 +1,35 @@
+from flask import Response
+import hashlib
+import json
+
+# Field holding a document's own hash; it is never part of the hashed data
+CONTENT_HASH_FIELD = 'content_hash'
+
+def content_hash(data):
+    """
+    Returns a stable SHA-256 hex digest of a JSON-like document, used as its strong ETag.
+    Key order does not affect the hash; the content_hash field itself is ignored.
+
+    Args:
+        data (dict): The document.
+
+    Returns:
+        str: The hex digest.
+    """
+    hashed = {key: value for key, value in data.items() if key != CONTENT_HASH_FIELD}
+    return hashlib.sha256(canonical_json(hashed)).hexdigest()
+
+def canonical_json(value):
+    """
+    Returns the canonical (sorted keys, no whitespace) UTF-8 JSON encoding of a value.
+    """
+    return json.dumps(value, sort_keys=True, separators=(',', ':'), default=str).encode('utf-8')
+
+def not_modified(etag):
+    """
+    Returns an empty 304 response for a client whose copy matches the current ETag.
+    """
+    response = Response(status=304)
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
@@ -54,6 +54,14 @@ def run_tests(test_name):
         exit(0)
     exit(1)
 
+# Define a command to backfill the recommendation graph's learner counts (run once per deployment)
+@cli.command("backfill-topic-stats")
+def backfill_topic_stats_command():
+    """Compute topic_stats from all existing user progress."""
+    from app.services.recommendation_service import backfill_topic_stats
+    count = backfill_topic_stats()
+    click.echo(f"Topic stats written for {count} topics.")
+
 # Define a command to reset the database (use with caution in production)
 @cli.command("db_reset")
 def reset_database():
@@ -0,0 +1,138 @@
+import threading
+import unittest
+from flask import Flask
+from google.cloud.firestore_v1.transforms import SERVER_TIMESTAMP
+from app.services import firebase_service
+from app.services.firebase_service import get_documents, get_loader, init_request_metrics
+
+class FakeSnapshot:
+    def __init__(self, doc_id, data, reference=None):
+        self.id = doc_id
+        self.reference = reference
+        self.exists = data is not None
+        self._data = data
+
+    def to_dict(self):
+        return self._data
+
+class FakeRef:
+    def __init__(self, doc_id, client=None, path=None):
+        self.id = doc_id
+        self.client = client
+        self.path = path or doc_id
+
+    def set(self, data, merge=False):
+        self.client.writes.append(('set', self.path, data))
+        self.client.store[self.path] = dict(data)
+
+    def update(self, fields):
+        self.client.writes.append(('update', self.path, fields))
+        self.client.store[self.path].update(fields)
+
+    def delete(self):
+        self.client.writes.append(('delete', self.path, None))
+        self.client.store.pop(self.path, None)
+
+class FakeCollection:
+    def document(self, doc_id):
+        return FakeRef(doc_id)
+
+class FakeClient:
+    """Answers get_all from a dict and records each call, in place of a Firestore client"""
+    def __init__(self, store):
+        self.store = store
+        self.calls = []
+        self.writes = []
+        self.lock = threading.Lock()
+
+    def collection(self, name):
+        return FakeCollection()
+
+    def document(self, path):
+        return FakeRef(path.rsplit('/', 1)[-1], self, path)
+
+    def get_all(self, refs, field_paths=None):
+        with self.lock:
+            self.calls.append(([ref.id for ref in refs], field_paths))
+        for ref in refs:
+            data = self.store.get(ref.path)
+            if data is not None and field_paths:
+                data = {field: data[field] for field in field_paths if field in data}
+            yield FakeSnapshot(ref.id, data, ref)
+
+class GetDocumentsTestCase(unittest.TestCase):
+    def setUp(self):
+        self.original_db = firebase_service.db
+        self.client = FakeClient({f't{i}': {'name': f'Topic {i}', 'body': 'x'} for i in range(25)})
+        firebase_service.db = self.client
+
+    def tearDown(self):
+        firebase_service.db = self.original_db
+
+    def test_fetches_requested_documents_in_chunks(self):
+        ids = [f't{i}' for i in range(25)] + ['t3', 'missing']
+        documents = get_documents('topics', ids, field_paths=['name'], chunk_size=10)
+
+        self.assertEqual(len(documents), 25)
+        self.assertEqual(documents['t7'], {'name': 'Topic 7'})
+        self.assertEqual(sorted(len(refs) for refs, _ in self.client.calls), [6, 10, 10])
+        self.assertTrue(all(fields == ['name'] for _, fields in self.client.calls))
+
+    def test_no_ids_means_no_reads(self):
+        self.assertEqual(get_documents('topics', []), {})
+        self.assertEqual(self.client.calls, [])
+
+class RequestLoaderTestCase(unittest.TestCase):
+    def setUp(self):
+        self.original_db = firebase_service.db
+        self.client = FakeClient({'users/u1': {'fcm_token': 'a'}, 'lessons/l1': {'title': 'Intro'}})
+        firebase_service.db = self.client
+        self.app = Flask(__name__)
+        init_request_metrics(self.app)
+
+    def tearDown(self):
+        firebase_service.db = self.original_db
+
+    def test_repeated_reads_in_a_request_hit_firestore_once(self):
+        with self.app.test_request_context():
+            loader = get_loader()
+            self.assertEqual(loader.load('users/u1'), {'fcm_token': 'a'})
+            loader.load('users/u1')
+            self.assertIs(get_loader(), loader)
+            self.assertEqual(loader.reads, 1)
+            self.assertEqual(loader.memo_hits, 1)
+
+    def test_primed_reads_are_batched(self):
+        with self.app.test_request_context():
+            loader = get_loader()
+            loader.prime('users/u1', 'lessons/l1', 'lessons/missing')
+            self.assertEqual(loader.load('lessons/l1'), {'title': 'Intro'})
+            self.assertIsNone(loader.load('lessons/missing'))
+            self.assertEqual(len(self.client.calls), 1)
+            self.assertEqual(loader.reads, 3)
+
+    def test_writes_keep_the_memo_current(self):
+        with self.app.test_request_context():
+            loader = get_loader()
+            loader.load('users/u1')
+            loader.update('users/u1', {'fcm_token': 'b'})
+            self.assertEqual(loader.load('users/u1'), {'fcm_token': 'b'})
+            loader.update('users/u1', {'last_seen': SERVER_TIMESTAMP})
+            loader.load('users/u1')
+            self.assertEqual(len(self.client.calls), 2)
+            self.assertEqual(loader.writes, 2)
+
+    def test_counts_are_reported_in_response_headers(self):
+        @self.app.route('/lesson')
+        def lesson():
+            get_loader().load('lessons/l1')
+            get_loader().load('lessons/l1')
+            get_loader().set('users/u1/progress/l1', {'completed': True})
+            return 'ok'
+
+        response = self.app.test_client().get('/lesson')
+        self.assertEqual(response.headers['X-Firestore-Reads'], '1')
+        self.assertEqual(response.headers['X-Firestore-Writes'], '1')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,97 @@
+import gzip
+import json
+import unittest
+from flask import Flask
+from app.routes import content_routes
+from app.services import caching_service
+from app.services.bundle_service import build_delta, get_bundle, get_package, held_chunks, pack
+from app.services.caching_service import init_cache
+from app.services.redis_service import set_redis_client
+
+def make_content(second_lesson='Loops repeat work.'):
+    return {
+        'summary': 'Python basics',
+        'lesson_outlines': ['Outline 1', 'Outline 2'],
+        'lessons': {'0': 'Variables hold values.', '1': second_lesson},
+        'quizzes': [{'question': 'What is a variable?'}, {'question': 'What is a loop?'}],
+        'level': 'beginner',
+    }
+
+class BundleTestCase(unittest.TestCase):
+    def setUp(self):
+        set_redis_client(None)
+        init_cache(Flask(__name__))
+
+    def tearDown(self):
+        caching_service.cache = None
+
+    def test_manifest_lists_content_addressed_chunks(self):
+        bundle = get_bundle('Python', 'beginner', make_content())
+        manifest = bundle['manifest']
+        names = [entry['name'] for entry in manifest['chunks']]
+
+        self.assertEqual(names, ['summary', 'lesson:0', 'quiz:0', 'lesson:1', 'quiz:1'])
+        self.assertEqual({entry['hash'] for entry in manifest['chunks']}, set(bundle['chunks']))
+        self.assertEqual(bundle['chunks'][manifest['chunks'][1]['hash']]['lesson'], 'Variables hold values.')
+
+    def test_package_round_trips_and_is_cached_per_version(self):
+        bundle = get_bundle('Python', 'beginner', make_content())
+        package = get_package(bundle)
+        self.assertEqual(json.loads(gzip.decompress(package)), bundle)
+        self.assertIs(get_package(bundle), package)
+        self.assertEqual(get_bundle('Python', 'beginner', make_content()), bundle)
+
+    def test_delta_carries_only_changed_chunks(self):
+        old = get_bundle('Python', 'beginner', make_content())
+        new = get_bundle('Python', 'beginner', make_content('Loops repeat work until a condition fails.'))
+        self.assertNotEqual(old['manifest']['version'], new['manifest']['version'])
+
+        delta = build_delta(new, held_chunks({'manifest': old['manifest']}))
+        changed = [entry['name'] for entry in new['manifest']['chunks'] if entry['hash'] in delta['chunks']]
+        self.assertEqual(changed, ['lesson:1'])
+        self.assertLess(len(pack(delta)), len(get_package(new)))
+
+    def test_delta_request_body_is_validated(self):
+        self.assertEqual(held_chunks({'have': ['a', 'b', 3]}), {'a', 'b'})
+        with self.assertRaises(ValueError):
+            held_chunks({'manifest': 'nope'})
+        with self.assertRaises(ValueError):
+            held_chunks(None)
+        # A manifest that is not an object is rejected even when 'have' is usable
+        with self.assertRaises(ValueError):
+            held_chunks({'have': ['a'], 'manifest': ['a']})
+
+class BundleRouteTestCase(unittest.TestCase):
+    def setUp(self):
+        set_redis_client(None)
+        init_cache(Flask(__name__))
+        self.originals = (content_routes.validate_jwt_token, content_routes.fetch_content, content_routes.fetch_content_hash)
+        content_routes.validate_jwt_token = lambda token: {'uid': 'user'}
+        content_routes.fetch_content = lambda user_id, topic, level: make_content()
+        content_routes.fetch_content_hash = lambda topic, level: None
+        app = Flask(__name__)
+        app.register_blueprint(content_routes.content_bp, url_prefix='/content')
+        self.client = app.test_client()
+
+    def tearDown(self):
+        caching_service.cache = None
+        content_routes.validate_jwt_token, content_routes.fetch_content, content_routes.fetch_content_hash = self.originals
+
+    def get(self, **headers):
+        return self.client.get('/content/bundle/Python', headers={'Authorization': 'token', **headers})
+
+    def test_gzip_and_plain_bodies_have_distinct_etags(self):
+        plain = self.get()
+        packed = self.get(**{'Accept-Encoding': 'gzip'})
+        self.assertEqual(packed.headers['Content-Encoding'], 'gzip')
+        self.assertEqual(packed.headers['ETag'], plain.headers['ETag'][:-1] + '-gz"')
+
+        # Each validator only revalidates its own representation
+        self.assertEqual(self.get(**{'If-None-Match': plain.headers['ETag']}).status_code, 304)
+        self.assertEqual(self.get(**{'If-None-Match': plain.headers['ETag'], 'Accept-Encoding': 'gzip'}).status_code, 200)
+        revalidated = self.get(**{'If-None-Match': packed.headers['ETag'], 'Accept-Encoding': 'gzip'})
+        self.assertEqual(revalidated.status_code, 304)
+        self.assertEqual(revalidated.headers['ETag'], packed.headers['ETag'])
+
+if __name__ == '__main__':
+    unittest.main()
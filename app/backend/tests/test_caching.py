@@ -0,0 +1,133 @@
+import threading
+import time
+import unittest
+import fakeredis
+from flask import Flask
+from app.services import caching_service
+from app.services.caching_service import (
+    LRUCache, ReadThroughCache, cache_content, content_cache_key, get_cache_stats, get_cached_content, init_cache
+)
+from app.services.redis_service import set_redis_client
+
+class LRUCacheTestCase(unittest.TestCase):
+    def test_evicts_least_recently_used_when_over_budget(self):
+        cache = LRUCache(max_bytes=20)
+        cache.set('a', b'x' * 8, 60)
+        cache.set('b', b'y' * 8, 60)
+        cache.get('a')
+        cache.set('c', b'z' * 8, 60)
+
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('a'), b'x' * 8)
+        stats = cache.stats()
+        self.assertEqual(stats['evictions'], 1)
+        self.assertEqual(stats['evicted_bytes'], 8)
+        self.assertLessEqual(stats['bytes'], 20)
+
+    def test_expired_entries_are_misses(self):
+        cache = LRUCache(max_bytes=100)
+        cache.set('a', b'value', 0)
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(cache.stats()['expirations'], 1)
+
+class TwoTierCacheTestCase(unittest.TestCase):
+    def setUp(self):
+        self.redis = fakeredis.FakeRedis()
+        set_redis_client(self.redis)
+        init_cache(Flask(__name__))
+
+    def tearDown(self):
+        set_redis_client(None)
+        caching_service.cache = None
+
+    def test_keys_are_namespaced_by_topic_level_and_language(self):
+        self.assertEqual(content_cache_key(' Machine  Learning', 'Beginner'), 'content:machine learning:beginner:english')
+        cache_content('Python', {'level': 'beginner'}, 'beginner')
+        cache_content('Python', {'level': 'advanced'}, 'advanced')
+
+        self.assertEqual(get_cached_content('Python', 'beginner'), {'level': 'beginner'})
+        self.assertEqual(get_cached_content('Python', 'advanced'), {'level': 'advanced'})
+        self.assertIsNone(get_cached_content('Python', 'beginner', 'spanish'))
+
+    def test_l2_is_shared_between_workers(self):
+        cache_content('Python', {'summary': 'shared'}, 'beginner')
+        self.assertIsNotNone(self.redis.get('brightmind:content:python:beginner:english'))
+
+        # A second worker starts with an empty L1 but the same Redis
+        init_cache(Flask(__name__))
+        self.assertEqual(get_cached_content('Python', 'beginner'), {'summary': 'shared'})
+        self.assertEqual(get_cached_content('Python', 'beginner'), {'summary': 'shared'})
+
+        stats = get_cache_stats()
+        self.assertEqual(stats['l2']['hits'], 1)
+        self.assertEqual(stats['l1']['hits'], 1)
+        self.assertEqual(stats['l1']['misses'], 1)
+
+    def test_works_without_redis(self):
+        set_redis_client(None)
+        cache_content('Python', {'summary': 'local'}, 'beginner')
+        self.assertEqual(get_cached_content('Python', 'beginner'), {'summary': 'local'})
+        self.assertFalse(get_cache_stats()['l2']['enabled'])
+
+class ReadThroughCacheTestCase(unittest.TestCase):
+    def setUp(self):
+        self.store = {'python': {'summary': 'v1'}}
+        self.loads = []
+
+    def load(self, key):
+        self.loads.append(key)
+        return self.store.get(key)
+
+    def test_hits_do_not_call_loader(self):
+        reader = ReadThroughCache(self.load, ttl=60, name='test-hits')
+        for _ in range(5):
+            self.assertEqual(reader.get('python'), {'summary': 'v1'})
+        self.assertEqual(self.loads, ['python'])
+        self.assertEqual(reader.stats()['hits'], 4)
+
+    def test_missing_documents_are_negatively_cached(self):
+        reader = ReadThroughCache(self.load, ttl=60, negative_ttl=60, name='test-negative')
+        self.assertIsNone(reader.get('unknown'))
+        self.assertIsNone(reader.get('unknown'))
+        self.assertEqual(self.loads, ['unknown'])
+        self.assertEqual(reader.stats()['negative_hits'], 1)
+
+        reader.prime('unknown', {'summary': 'generated'})
+        self.assertEqual(reader.get('unknown'), {'summary': 'generated'})
+
+    def test_peek_never_loads(self):
+        reader = ReadThroughCache(self.load, ttl=60, name='test-peek')
+        self.assertIsNone(reader.peek('python'))
+        reader.get('python')
+        self.assertEqual(reader.peek('python'), {'summary': 'v1'})
+        self.assertEqual(self.loads, ['python'])
+
+    def test_stale_entries_are_served_while_refreshing(self):
+        reader = ReadThroughCache(self.load, ttl=0.2, stale_ttl=60, name='test-stale')
+        reader.get('python')
+        self.store['python'] = {'summary': 'v2'}
+        time.sleep(0.3)
+
+        self.assertEqual(reader.get('python'), {'summary': 'v1'})
+        deadline = time.monotonic() + 2
+        while reader.stats()['refreshes'] == 0 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(reader.get('python'), {'summary': 'v2'})
+        self.assertEqual(reader.stats()['stale_hits'], 1)
+
+    def test_concurrent_misses_load_once(self):
+        def slow_load(key):
+            self.loads.append(key)
+            time.sleep(0.1)
+            return {'summary': 'v1'}
+
+        reader = ReadThroughCache(slow_load, ttl=60, name='test-concurrent')
+        threads = [threading.Thread(target=reader.get, args=('python',)) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(self.loads, ['python'])
+
+if __name__ == '__main__':
+    unittest.main()
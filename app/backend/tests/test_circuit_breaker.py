@@ -0,0 +1,82 @@
+import time
+import unittest
+from app.services import circuit_breaker_service
+from app.services.api_service import APIConfig, HuggingFaceManager
+from app.services.circuit_breaker_service import CircuitBreaker, CircuitOpenError, CLOSED, OPEN, HALF_OPEN
+
+class CircuitBreakerTestCase(unittest.TestCase):
+    def make_breaker(self, **overrides):
+        settings = dict(window_seconds=60, min_calls=4, error_rate=0.5,
+                        slow_call_seconds=1, slow_call_rate=0.8, open_seconds=0.05, half_open_probes=1)
+        settings.update(overrides)
+        return CircuitBreaker('https://example.test/model', **settings)
+
+    def test_opens_when_error_rate_exceeded(self):
+        breaker = self.make_breaker()
+        for success in (True, False, True, False):
+            breaker.record(success, 0.1)
+        self.assertEqual(breaker.state, OPEN)
+        self.assertFalse(breaker.allow())
+        self.assertEqual(breaker.snapshot()['rejected'], 1)
+
+    def test_stays_closed_below_min_calls(self):
+        breaker = self.make_breaker()
+        for _ in range(3):
+            breaker.record(False, 0.1)
+        self.assertEqual(breaker.state, CLOSED)
+
+    def test_opens_when_calls_are_slow(self):
+        breaker = self.make_breaker()
+        for _ in range(4):
+            breaker.record(True, 2.0)
+        self.assertEqual(breaker.state, OPEN)
+
+    def test_half_open_probe_closes_on_success(self):
+        breaker = self.make_breaker()
+        for _ in range(4):
+            breaker.record(False, 0.1)
+        time.sleep(0.06)
+        self.assertTrue(breaker.allow())
+        self.assertEqual(breaker.state, HALF_OPEN)
+        self.assertFalse(breaker.allow())
+        breaker.record(True, 0.1)
+        self.assertEqual(breaker.state, CLOSED)
+
+    def test_half_open_probe_reopens_on_failure(self):
+        breaker = self.make_breaker()
+        for _ in range(4):
+            breaker.record(False, 0.1)
+        time.sleep(0.06)
+        self.assertTrue(breaker.allow())
+        breaker.record(False, 0.1)
+        self.assertEqual(breaker.state, OPEN)
+        self.assertEqual(breaker.snapshot()['times_opened'], 2)
+
+    def test_released_probe_frees_its_slot(self):
+        breaker = self.make_breaker()
+        for _ in range(4):
+            breaker.record(False, 0.1)
+        time.sleep(0.06)
+        self.assertTrue(breaker.allow())
+        breaker.release()
+        self.assertTrue(breaker.allow())
+
+    def test_open_circuit_fails_before_acquiring_a_key(self):
+        url = 'https://example.test/open-model'
+        breaker = self.make_breaker(open_seconds=60)
+        for _ in range(4):
+            breaker.record(False, 0.1)
+        circuit_breaker_service._breakers[url] = breaker
+        self.addCleanup(circuit_breaker_service._breakers.pop, url, None)
+
+        acquired = []
+        manager = HuggingFaceManager.__new__(HuggingFaceManager)
+        manager.endpoints = {'model': {'key': APIConfig(url=url, key='key')}}
+        manager._get_next_available_config = lambda model_name, timeout=0: acquired.append(timeout)
+
+        with self.assertRaises(CircuitOpenError):
+            manager.make_request('model', {'inputs': 'hi'}, use_cache=False)
+        self.assertEqual(acquired, [])
+
+if __name__ == '__main__':
+    unittest.main()
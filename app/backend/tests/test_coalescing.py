@@ -0,0 +1,59 @@
+import json
+import threading
+import time
+import unittest
+import fakeredis
+from app.services.coalescing_service import coalesce_key, single_flight
+from app.services.redis_service import set_redis_client
+
+class CoalescingTestCase(unittest.TestCase):
+    def tearDown(self):
+        set_redis_client(None)
+
+    def test_coalesce_key_normalizes_topic_and_level(self):
+        self.assertEqual(coalesce_key('  Machine   Learning ', 'Beginner '), 'machine learning:beginner')
+
+    def test_concurrent_callers_share_one_call(self):
+        calls = []
+
+        def generate():
+            calls.append(1)
+            time.sleep(0.2)
+            return {'summary': 'shared'}
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(single_flight('topic:beginner', generate)))
+            for _ in range(5)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, [{'summary': 'shared'}] * 5)
+
+    def test_waits_for_result_from_another_worker(self):
+        client = fakeredis.FakeRedis()
+        set_redis_client(client)
+        client.set('coalesce:lock:topic:beginner', 'other-worker')
+
+        def other_worker_finishes():
+            time.sleep(0.2)
+            client.set('coalesce:result:topic:beginner', json.dumps({'summary': 'remote'}))
+            client.delete('coalesce:lock:topic:beginner')
+
+        threading.Thread(target=other_worker_finishes).start()
+        result = single_flight('topic:beginner', lambda: self.fail('should not generate locally'))
+        self.assertEqual(result, {'summary': 'remote'})
+
+    def test_leader_releases_shared_lock(self):
+        client = fakeredis.FakeRedis()
+        set_redis_client(client)
+        self.assertEqual(single_flight('topic:advanced', lambda: {'ok': True}), {'ok': True})
+        self.assertFalse(client.exists('coalesce:lock:topic:advanced'))
+        self.assertEqual(json.loads(client.get('coalesce:result:topic:advanced')), {'ok': True})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+import json
+import unittest
+from flask import Flask
+from app.routes import content_routes
+
+CONTENT = {
+    'summary': 'Python basics',
+    'lesson_outlines': ['Variables', 'Loops'],
+    'lessons': ['Variables hold values.', 'Loops repeat work.'],
+    'quizzes': [['Q1'], ['Q2']],
+    'level': 'beginner',
+    'status': 'complete',
+}
+
+class ContentStreamTestCase(unittest.TestCase):
+    def setUp(self):
+        self.originals = (content_routes.validate_jwt_token, content_routes.generate_content)
+        content_routes.validate_jwt_token = lambda token: {'uid': 'user'}
+        app = Flask(__name__)
+        app.register_blueprint(content_routes.content_bp, url_prefix='/content')
+        self.client = app.test_client()
+
+    def tearDown(self):
+        content_routes.validate_jwt_token, content_routes.generate_content = self.originals
+
+    def stream(self, generate):
+        content_routes.generate_content = generate
+        response = self.client.post('/content/generate/stream?format=ndjson',
+                                    headers={'Authorization': 'Bearer token'},
+                                    json={'topic': 'Python', 'level': 'beginner'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, 'application/x-ndjson')
+        return [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+
+    def test_live_events_stream_in_order_and_missing_ones_are_replayed(self):
+        def generate(user_id, topic, level, on_event=None):
+            on_event('summary', {'summary': CONTENT['summary'], 'lesson_outlines': CONTENT['lesson_outlines']})
+            on_event('lesson', {'index': 0, 'outline': 'Variables', 'lesson': CONTENT['lessons'][0]})
+            return CONTENT
+
+        events = self.stream(generate)
+        self.assertEqual([event['event'] for event in events], ['summary', 'lesson', 'quiz', 'lesson', 'quiz', 'complete'])
+        self.assertEqual([event['data'].get('index') for event in events if event['event'] == 'lesson'], [0, 1])
+        self.assertEqual(events[-1]['data']['status'], 'complete')
+
+    def test_producer_failure_ends_the_stream_with_an_error(self):
+        def generate(user_id, topic, level, on_event=None):
+            on_event('summary', {'summary': CONTENT['summary'], 'lesson_outlines': CONTENT['lesson_outlines']})
+            raise RuntimeError('model unavailable')
+
+        events = self.stream(generate)
+        self.assertEqual([event['event'] for event in events], ['summary', 'error'])
+        self.assertEqual(events[-1]['data'], {'error': 'Content generation failed'})
+
+if __name__ == '__main__':
+    unittest.main()
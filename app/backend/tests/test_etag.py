@@ -0,0 +1,112 @@
+import unittest
+from flask import Flask, request
+from app.models import lesson_model
+from app.routes import lesson_routes
+from app.services import firebase_service
+from app.utils.etag import CONTENT_HASH_FIELD, content_hash, not_modified
+
+class FakeSnapshot:
+    def __init__(self, reference, data):
+        self.reference = reference
+        self.exists = data is not None
+        self._data = data
+
+    def to_dict(self):
+        return dict(self._data) if self._data is not None else None
+
+class FakeReference:
+    def __init__(self, client, path):
+        self.client = client
+        self.path = path
+
+    def get(self, field_paths=None):
+        data = self.client.documents.get(self.path)
+        if data is not None and field_paths is not None:
+            data = {field: data[field] for field in field_paths if field in data}
+        return FakeSnapshot(self, data)
+
+    def update(self, fields):
+        self.client.documents[self.path].update(fields)
+
+class FakeClient:
+    """Stores documents by path, like the Firestore client calls the lesson routes make"""
+    def __init__(self, documents):
+        self.documents = documents
+
+    def document(self, path):
+        return FakeReference(self, path)
+
+    def collection(self, name):
+        client = self
+
+        class Collection:
+            def document(self, doc_id):
+                return FakeReference(client, f"{name}/{doc_id}")
+        return Collection()
+
+    def get_all(self, references):
+        return [reference.get() for reference in references]
+
+class ContentHashTestCase(unittest.TestCase):
+    def test_hash_ignores_key_order_and_its_own_field(self):
+        content = {'summary': 'Intro', 'lessons': {'0': 'One', '1': 'Two'}, 'level': 'beginner'}
+        reordered = {'level': 'beginner', 'lessons': {'1': 'Two', '0': 'One'}, 'summary': 'Intro'}
+        digest = content_hash(content)
+
+        self.assertEqual(len(digest), 64)
+        self.assertEqual(content_hash(reordered), digest)
+        self.assertEqual(content_hash({**content, CONTENT_HASH_FIELD: digest}), digest)
+        self.assertNotEqual(content_hash({**content, 'summary': 'Intro!'}), digest)
+
+    def test_not_modified_response_carries_etag(self):
+        app = Flask(__name__)
+
+        @app.route('/lesson')
+        def lesson():
+            if 'abc' in request.if_none_match:
+                return not_modified('abc')
+            return {'lesson': 'body'}
+
+        client = app.test_client()
+        response = client.get('/lesson', headers={'If-None-Match': '"abc"'})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.headers['ETag'], '"abc"')
+        self.assertEqual(response.data, b'')
+        self.assertEqual(client.get('/lesson', headers={'If-None-Match': '"old"'}).status_code, 200)
+
+class LessonETagTestCase(unittest.TestCase):
+    def setUp(self):
+        self.originals = (firebase_service.db, lesson_model.db, lesson_routes.validate_jwt_token)
+        self.client = FakeClient({'lessons/intro': {'title': 'Intro', 'level': 'beginner'}})
+        firebase_service.db = lesson_model.db = self.client
+        lesson_routes.validate_jwt_token = lambda token: {'user_id': 'user'}
+        app = Flask(__name__)
+        app.register_blueprint(lesson_routes.lesson_bp, url_prefix='/lessons')
+        self.app = app.test_client()
+
+    def tearDown(self):
+        firebase_service.db, lesson_model.db, lesson_routes.validate_jwt_token = self.originals
+
+    def test_hash_is_stored_on_first_read_and_revalidation_is_a_304(self):
+        first = self.app.get('/lessons/intro', headers={'Authorization': 'Bearer token'})
+        self.assertEqual(first.status_code, 200)
+        etag = first.headers['ETag'].strip('"')
+        self.assertEqual(self.client.documents['lessons/intro'][CONTENT_HASH_FIELD], etag)
+
+        second = self.app.get('/lessons/intro', headers={'Authorization': 'Bearer token', 'If-None-Match': f'"{etag}"'})
+        self.assertEqual(second.status_code, 304)
+        self.assertEqual(second.data, b'')
+
+    def test_lesson_edited_elsewhere_gets_a_fresh_etag(self):
+        first = self.app.get('/lessons/intro', headers={'Authorization': 'Bearer token'})
+        old_etag = first.headers['ETag']
+        # Edited outside the service; the stored hash is now stale
+        self.client.documents['lessons/intro']['title'] = 'Introduction'
+
+        second = self.app.get('/lessons/intro', headers={'Authorization': 'Bearer token', 'If-None-Match': old_etag})
+        self.assertEqual(second.status_code, 200)
+        self.assertNotEqual(second.headers['ETag'], old_etag)
+        self.assertEqual(self.client.documents['lessons/intro'][CONTENT_HASH_FIELD], second.headers['ETag'].strip('"'))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,109 @@
+import unittest
+from app.services import firebase_service
+from app.services.grading_service import build_answer_key, grade, submit_batch
+
+QUESTIONS = [
+    {'id': 'q1', 'correct_answer': 'B'},
+    {'id': 'q2', 'correct_answer': 'Photosynthesis'},
+    {'id': 'q3', 'correct_answer': 'D'},
+]
+
+class FakeRef:
+    def __init__(self, path):
+        self.path = path
+
+class FakeSnapshot:
+    def __init__(self, path, data):
+        self.reference = FakeRef(path)
+        self.exists = data is not None
+        self._data = data
+
+    def to_dict(self):
+        return self._data
+
+class FakeBatch:
+    def __init__(self, client):
+        self.client = client
+        self.updates = []
+
+    def update(self, ref, fields):
+        self.updates.append((ref.path, fields))
+
+    def commit(self):
+        self.client.commits.append(self.updates)
+        for path, fields in self.updates:
+            self.client.store[path].update(fields)
+
+class FakeClient:
+    def __init__(self, store):
+        self.store = store
+        self.get_all_calls = 0
+        self.commits = []
+
+    def document(self, path):
+        return FakeRef(path)
+
+    def get_all(self, refs):
+        self.get_all_calls += 1
+        return [FakeSnapshot(ref.path, self.store.get(ref.path)) for ref in refs]
+
+    def batch(self):
+        return FakeBatch(self)
+
+class GradingTestCase(unittest.TestCase):
+    def test_vectorized_grading_matches_per_question_comparison(self):
+        key = build_answer_key(QUESTIONS)
+        outcome = grade([key, key, key], [
+            {'q1': 'b', 'q2': ' photosynthesis ', 'q3': 'D'},
+            {'q1': 'A', 'q3': 'D'},
+            {},
+        ])
+        self.assertEqual(outcome['correct'].tolist(), [3, 1, 0])
+        self.assertEqual(outcome['total'].tolist(), [3, 3, 3])
+        self.assertAlmostEqual(outcome['scores'][1], 100 / 3)
+        self.assertAlmostEqual(outcome['question_accuracy'][(None, 'q3')], 2 / 3)
+
+    def test_question_stats_are_kept_per_lesson(self):
+        # Generated ids repeat across lessons: q1 of one lesson is not q1 of another
+        key = build_answer_key(QUESTIONS)
+        outcome = grade([key, key], [{'q1': 'B'}, {'q1': 'A'}], ['biology', 'history'])
+        self.assertEqual(outcome['question_accuracy'][('biology', 'q1')], 1.0)
+        self.assertEqual(outcome['question_accuracy'][('history', 'q1')], 0.0)
+
+    def test_batch_reads_once_writes_in_batches_and_reports_stats(self):
+        store = {
+            f"users/u{n}/quizzes/quiz": {'lesson_id': 'lesson', 'questions': QUESTIONS, 'answer_key': build_answer_key(QUESTIONS)}
+            for n in range(4)
+        }
+        # A quiz created before answer keys were stored
+        store["users/u4/quizzes/quiz"] = {'lesson_id': 'lesson', 'questions': QUESTIONS}
+        original = firebase_service.db
+        firebase_service.db = client = FakeClient(store)
+        try:
+            answers = [{'q1': 'B', 'q2': 'Photosynthesis', 'q3': 'D'}, {'q1': 'B'}, {}, {'q1': 'B', 'q3': 'D'}, {'q2': 'photosynthesis'}]
+            graded = submit_batch(
+                [{'user_id': f'u{n}', 'quiz_id': 'quiz', 'answers': answer} for n, answer in enumerate(answers)]
+                + [{'user_id': 'u9', 'quiz_id': 'missing', 'answers': {}}]
+            )
+        finally:
+            firebase_service.db = original
+
+        self.assertEqual(client.get_all_calls, 1)
+        self.assertEqual(len(client.commits), 1)
+        self.assertEqual([result.get('correct') for result in graded['results']], [3, 1, 0, 2, 1, None])
+        self.assertEqual(graded['results'][-1]['error'], 'Quiz not found')
+        self.assertEqual(store["users/u0/quizzes/quiz"]['score'], 100.0)
+        self.assertTrue(store["users/u4/quizzes/quiz"]['completed'])
+        self.assertEqual(graded['stats']['count'], 5)
+        self.assertEqual(graded['stats']['pass_rate'], 0.4)
+        self.assertEqual(sum(graded['stats']['histogram']), 5)
+        self.assertEqual(graded['stats']['hardest_questions'][0], {'lesson_id': 'lesson', 'id': 'q2', 'accuracy': 0.4})
+
+    def test_invalid_batches_are_rejected(self):
+        with self.assertRaises(ValueError):
+            submit_batch([])
+        with self.assertRaises(ValueError):
+            submit_batch([{'quiz_id': 'quiz', 'answers': {}}])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,29 @@
+import unittest
+from flask import Flask
+from app.routes import health_routes
+
+ROUTES = ('/transport', '/prompt-cache', '/circuits', '/cache', '/token-cache', '/write-behind')
+
+class HealthRoutesTestCase(unittest.TestCase):
+    def setUp(self):
+        self.original = health_routes.validate_jwt_token
+        health_routes.validate_jwt_token = lambda token: {'uid': 'user'} if token == 'Bearer valid' else None
+        app = Flask(__name__)
+        app.register_blueprint(health_routes.health_bp, url_prefix='/health')
+        self.client = app.test_client()
+
+    def tearDown(self):
+        health_routes.validate_jwt_token = self.original
+
+    def test_stats_require_a_valid_token(self):
+        for route in ROUTES:
+            self.assertEqual(self.client.get(f'/health{route}').status_code, 401, route)
+            self.assertEqual(self.client.get(f'/health{route}', headers={'Authorization': 'Bearer forged'}).status_code, 401, route)
+
+    def test_authenticated_callers_get_stats(self):
+        response = self.client.get('/health/token-cache', headers={'Authorization': 'Bearer valid'})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('hit_ratio', response.get_json())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from app.services import http_service
+from app.services.http_service import get_pool_stats, http_get, http_post
+
+class KeepAliveHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def respond(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        if length:
+            self.rfile.read(length)
+        body = b'{"ok": true}'
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_GET = do_POST = respond
+
+    def log_message(self, format, *args):
+        pass
+
+class SharedSessionTestCase(unittest.TestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), KeepAliveHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.port = self.server.server_address[1]
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        for host in ('127.0.0.1', 'localhost'):
+            pool = http_service._pools.pop(host, None)
+            if pool is not None:
+                pool.adapter.close()
+
+    def test_requests_to_a_host_share_one_adapter_and_connection(self):
+        url = f'http://127.0.0.1:{self.port}/model'
+        for _ in range(5):
+            self.assertEqual(http_post(url, json={'inputs': 'hi'}).json(), {'ok': True})
+        http_get(url)
+
+        pool = http_service._get_host_pool(url)
+        self.assertIs(http_service._session.get_adapter(url), pool.adapter)
+        stats = get_pool_stats()['127.0.0.1']
+        self.assertEqual(stats['requests'], 6)
+        self.assertEqual(stats['connections_opened'], 1)
+        self.assertEqual(stats['reuse_ratio'], round(5 / 6, 4))
+        self.assertEqual(stats['in_flight'], 0)
+        self.assertEqual(stats['waits'], 0)
+
+    def test_each_host_gets_its_own_pool(self):
+        http_get(f'http://127.0.0.1:{self.port}/')
+        http_get(f'http://localhost:{self.port}/')
+        http_get(f'http://localhost:{self.port}/again')
+
+        first = http_service._get_host_pool(f'http://127.0.0.1:{self.port}/')
+        second = http_service._get_host_pool(f'http://localhost:{self.port}/')
+        self.assertIsNot(first.adapter, second.adapter)
+        stats = get_pool_stats()
+        self.assertEqual(stats['127.0.0.1']['requests'], 1)
+        self.assertEqual(stats['localhost']['requests'], 2)
+        self.assertEqual(stats['localhost']['connections_opened'], 1)
+
+    def test_waits_are_counted_when_the_pool_is_full(self):
+        pool = http_service._get_host_pool(f'http://127.0.0.1:{self.port}/')
+        for _ in range(pool.maxsize):
+            pool.acquire()
+        waiter = threading.Thread(target=pool.acquire)
+        waiter.start()
+        time.sleep(0.1)
+        pool.release()
+        waiter.join(timeout=5)
+        for _ in range(pool.maxsize):
+            pool.release()
+
+        stats = pool.stats()
+        self.assertEqual(stats['waits'], 1)
+        self.assertEqual(stats['requests'], pool.maxsize + 1)
+        self.assertEqual(stats['in_flight'], 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,149 @@
+import threading
+import time
+import unittest
+import fakeredis
+from flask import Flask, request
+from app.routes import job_routes
+from app.services import job_service
+from app.services.job_service import (
+    InMemoryJobBackend, JobQueue, RedisJobBackend, register_job_type, JOB_TYPES,
+    SUCCEEDED, FAILED
+)
+
+class JobQueueTestCase(unittest.TestCase):
+    def setUp(self):
+        self.running = 0
+        self.max_running = 0
+        self.lock = threading.Lock()
+        register_job_type('test_echo', 'test-model', self.run_echo, lambda payload: payload.get('key'))
+        register_job_type('test_fail', 'test-model', self.run_fail)
+
+    def tearDown(self):
+        JOB_TYPES.pop('test_echo', None)
+        JOB_TYPES.pop('test_fail', None)
+
+    def run_echo(self, payload):
+        with self.lock:
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+        time.sleep(payload.get('sleep', 0))
+        with self.lock:
+            self.running -= 1
+        return {'echo': payload.get('value')}
+
+    def run_fail(self, payload):
+        raise RuntimeError('boom')
+
+    def make_queue(self, backend, workers=4, limit=1):
+        queue = JobQueue(backend, workers=workers, model_limits={'test-model': limit})
+        queue.start()
+        self.addCleanup(queue.stop)
+        return queue
+
+    def test_runs_job_and_stores_result(self):
+        queue = self.make_queue(InMemoryJobBackend())
+        job = queue.submit('test_echo', {'value': 42})
+        finished = queue.wait(job.id, timeout=5)
+        self.assertEqual(finished.status, SUCCEEDED)
+        self.assertEqual(finished.result, {'echo': 42})
+
+    def test_failed_job_records_error(self):
+        queue = self.make_queue(InMemoryJobBackend())
+        job = queue.submit('test_fail', {})
+        finished = queue.wait(job.id, timeout=5)
+        self.assertEqual(finished.status, FAILED)
+        self.assertEqual(finished.error, 'boom')
+
+    def test_deduplicates_queued_jobs(self):
+        backend = InMemoryJobBackend()
+        queue = JobQueue(backend, workers=1, model_limits={'test-model': 1})
+        first = queue.submit('test_echo', {'key': 'same', 'value': 1})
+        second = queue.submit('test_echo', {'key': 'same', 'value': 2})
+        self.assertEqual(first.id, second.id)
+
+    def test_deduplicated_job_is_visible_to_every_submitter(self):
+        for backend in (InMemoryJobBackend(), RedisJobBackend(fakeredis.FakeRedis())):
+            queue = JobQueue(backend, workers=1, model_limits={'test-model': 1})
+            alice = queue.submit('test_echo', {'key': 'shared', 'value': 1}, user_id='alice')
+            bob = queue.submit('test_echo', {'key': 'shared', 'value': 2}, user_id='bob')
+            self.assertEqual(alice.id, bob.id)
+            job = queue.get(alice.id)
+            self.assertTrue(queue.can_view(job, 'alice'))
+            self.assertTrue(queue.can_view(job, 'bob'))
+            self.assertFalse(queue.can_view(job, 'mallory'))
+
+    def test_status_route_serves_both_users_of_a_shared_job(self):
+        app = Flask(__name__)
+        app.register_blueprint(job_routes.job_bp, url_prefix='/jobs')
+        original_queue, original_get_user_id = job_service.job_queue, job_routes.get_user_id
+        job_service.job_queue = JobQueue(InMemoryJobBackend(), workers=1, model_limits={'test-model': 1})
+        job_routes.get_user_id = lambda: request.headers.get('X-User')
+        self.addCleanup(setattr, job_service, 'job_queue', original_queue)
+        self.addCleanup(setattr, job_routes, 'get_user_id', original_get_user_id)
+
+        client = app.test_client()
+        body = {'type': 'test_echo', 'payload': {'key': 'ml-beginner'}}
+        alice = client.post('/jobs/', json=body, headers={'X-User': 'alice'}).get_json()
+        bob = client.post('/jobs/', json=body, headers={'X-User': 'bob'}).get_json()
+        self.assertEqual(alice['job_id'], bob['job_id'])
+
+        for user, status in (('alice', 200), ('bob', 200), ('mallory', 404)):
+            response = client.get(f"/jobs/{bob['job_id']}", headers={'X-User': user})
+            self.assertEqual(response.status_code, status)
+
+    def test_respects_model_concurrency_limit(self):
+        queue = self.make_queue(InMemoryJobBackend(), workers=4, limit=1)
+        jobs = [queue.submit('test_echo', {'value': i, 'sleep': 0.05}) for i in range(4)]
+        for job in jobs:
+            self.assertEqual(queue.wait(job.id, timeout=5).status, SUCCEEDED)
+        self.assertEqual(self.max_running, 1)
+
+    def test_higher_priority_runs_first(self):
+        backend = InMemoryJobBackend()
+        queue = JobQueue(backend, workers=1, model_limits={'test-model': 1})
+        low = queue.submit('test_echo', {'value': 'low'}, priority=0)
+        high = queue.submit('test_echo', {'value': 'high'}, priority=5)
+        job = backend.dequeue(queue._reserve, queue._release, timeout=0)
+        self.assertEqual(job.id, high.id)
+        self.assertNotEqual(job.id, low.id)
+
+    def test_redis_backend(self):
+        backend = RedisJobBackend(fakeredis.FakeRedis())
+        queue = self.make_queue(backend, workers=2, limit=2)
+        job = queue.submit('test_echo', {'key': 'redis', 'value': 'shared'})
+        duplicate = queue.submit('test_echo', {'key': 'redis', 'value': 'ignored'})
+        self.assertEqual(job.id, duplicate.id)
+        finished = queue.wait(job.id, timeout=5)
+        self.assertEqual(finished.status, SUCCEEDED)
+        self.assertEqual(finished.result, {'echo': 'shared'})
+
+class JobBackendSelectionTestCase(unittest.TestCase):
+    def setUp(self):
+        self.original = job_service.JOB_BACKEND
+        job_service.JOB_BACKEND = None
+
+    def tearDown(self):
+        job_service.JOB_BACKEND = self.original
+
+    def make_app(self, testing=False, backend=None):
+        app = Flask(__name__)
+        app.testing = testing
+        app.config['JOB_BACKEND'] = backend
+        return app
+
+    def test_production_without_redis_fails_startup(self):
+        with self.assertRaises(RuntimeError):
+            job_service.select_job_backend(self.make_app(), None)
+        with self.assertRaises(RuntimeError):
+            job_service.select_job_backend(self.make_app(testing=True, backend='redis'), None)
+
+    def test_redis_is_used_when_available(self):
+        backend = job_service.select_job_backend(self.make_app(), fakeredis.FakeRedis())
+        self.assertIsInstance(backend, RedisJobBackend)
+
+    def test_memory_backend_needs_an_explicit_choice_or_testing(self):
+        self.assertIsInstance(job_service.select_job_backend(self.make_app(backend='memory'), None), InMemoryJobBackend)
+        self.assertIsInstance(job_service.select_job_backend(self.make_app(testing=True), None), InMemoryJobBackend)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,43 @@
+import time
+import unittest
+from app.services.api_service import APIConfig, KeyScheduler, parse_retry_after
+
+class KeySchedulerTestCase(unittest.TestCase):
+    def make_configs(self, count=2, capacity=2, refill_per_second=20):
+        return [
+            APIConfig(url='https://example.test', key=f'key_{i}', calls_remaining=capacity,
+                      capacity=capacity, refill_per_second=refill_per_second)
+            for i in range(count)
+        ]
+
+    def test_rotates_between_keys(self):
+        scheduler = KeyScheduler(self.make_configs())
+        keys = [scheduler.acquire().key for _ in range(4)]
+        self.assertEqual(sorted(keys), ['key_0', 'key_0', 'key_1', 'key_1'])
+
+    def test_returns_none_when_budget_exhausted(self):
+        scheduler = KeyScheduler(self.make_configs(count=1, capacity=1, refill_per_second=0.01))
+        self.assertIsNotNone(scheduler.acquire())
+        self.assertIsNone(scheduler.acquire(timeout=0))
+
+    def test_blocks_until_tokens_refill(self):
+        scheduler = KeyScheduler(self.make_configs(count=1, capacity=1, refill_per_second=20))
+        scheduler.acquire()
+        started = time.monotonic()
+        self.assertIsNotNone(scheduler.acquire(timeout=1))
+        self.assertGreater(time.monotonic() - started, 0.03)
+
+    def test_penalized_key_is_skipped(self):
+        configs = self.make_configs()
+        scheduler = KeyScheduler(configs)
+        scheduler.penalize(configs[0], retry_after=30)
+        keys = {scheduler.acquire().key for _ in range(2)}
+        self.assertEqual(keys, {'key_1'})
+
+    def test_parse_retry_after(self):
+        self.assertEqual(parse_retry_after('5'), 5.0)
+        self.assertEqual(parse_retry_after('Wed, 21 Oct 2015 07:28:00 GMT'), 0.0)
+        self.assertEqual(parse_retry_after(None), 60)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,150 @@
+import json
+import unittest
+from flask import Flask
+from app.models import lesson_model
+from app.routes import lesson_routes
+from app.models.lesson_model import LessonPage, decode_lesson_cursor, encode_lesson_cursor
+
+class FakeSnapshot:
+    def __init__(self, doc_id, data):
+        self.id = doc_id
+        self._data = data
+
+    def to_dict(self):
+        return dict(self._data)
+
+class FakeQuery:
+    """Orders a dict of documents by id, like order_by(document_id()) on a collection"""
+    def __init__(self, documents, fields=None, after=None, limit=None):
+        self.documents = documents
+        self.fields = fields
+        self.after = after
+        self.count = limit
+        self.streamed = 0
+
+    def order_by(self, field_path):
+        return self
+
+    def select(self, fields):
+        return FakeQuery(self.documents, fields, self.after, self.count)
+
+    def start_after(self, values):
+        return FakeQuery(self.documents, self.fields, next(iter(values.values())), self.count)
+
+    def limit(self, count):
+        return FakeQuery(self.documents, self.fields, self.after, count)
+
+    def stream(self):
+        ids = [doc_id for doc_id in sorted(self.documents) if self.after is None or doc_id > self.after]
+        for doc_id in ids[:self.count]:
+            self.streamed += 1
+            data = self.documents[doc_id]
+            yield FakeSnapshot(doc_id, {field: data[field] for field in self.fields if field in data})
+
+class FailingQuery(FakeQuery):
+    """Fails after streaming a number of documents, like a dropped Firestore stream"""
+    def __init__(self, documents, fail_after, *args, **kwargs):
+        super().__init__(documents, *args, **kwargs)
+        self.fail_after = fail_after
+
+    def select(self, fields):
+        return FailingQuery(self.documents, self.fail_after, fields, self.after, self.count)
+
+    def start_after(self, values):
+        return FailingQuery(self.documents, self.fail_after, self.fields, next(iter(values.values())), self.count)
+
+    def limit(self, count):
+        return FailingQuery(self.documents, self.fail_after, self.fields, self.after, count)
+
+    def stream(self):
+        for index, snapshot in enumerate(super().stream()):
+            if index == self.fail_after:
+                raise RuntimeError('stream reset')
+            yield snapshot
+
+class FakeClient:
+    def __init__(self, documents, fail_after=None):
+        self.documents = documents
+        self.fail_after = fail_after
+
+    def collection(self, name):
+        if self.fail_after is not None:
+            return FailingQuery(self.documents, self.fail_after)
+        return FakeQuery(self.documents)
+
+class LessonPaginationTestCase(unittest.TestCase):
+    def setUp(self):
+        self.original_db = lesson_model.db
+        lesson_model.db = FakeClient({
+            f'lesson{n}': {'title': f'Lesson {n}', 'level': 'beginner', 'content': 'x' * 100}
+            for n in range(5)
+        })
+
+    def tearDown(self):
+        lesson_model.db = self.original_db
+
+    def test_pages_follow_cursor_to_the_end(self):
+        seen = []
+        cursor = None
+        while True:
+            page = LessonPage(limit=2, cursor=cursor)
+            seen.append([lesson['id'] for lesson in page])
+            cursor = page.next_cursor
+            if cursor is None:
+                break
+        self.assertEqual(seen, [['lesson0', 'lesson1'], ['lesson2', 'lesson3'], ['lesson4']])
+
+    def test_list_view_is_projected(self):
+        lesson = next(iter(LessonPage(limit=1)))
+        self.assertEqual(lesson, {'id': 'lesson0', 'title': 'Lesson 0', 'level': 'beginner'})
+
+    def test_page_size_is_capped(self):
+        self.assertEqual(LessonPage(limit=10000).limit, lesson_model.LESSONS_MAX_PAGE_SIZE)
+        self.assertEqual(LessonPage(limit=0).limit, 1)
+
+    def test_invalid_cursor_is_rejected(self):
+        self.assertEqual(decode_lesson_cursor(encode_lesson_cursor('lesson3')), 'lesson3')
+        with self.assertRaises(ValueError):
+            LessonPage(cursor='%%%')
+
+class LessonListingRouteTestCase(unittest.TestCase):
+    def setUp(self):
+        self.original_db = lesson_model.db
+        self.original_validate = lesson_routes.validate_jwt_token
+        lesson_routes.validate_jwt_token = lambda token: {'user_data': {'user_id': 'user'}}
+        app = Flask(__name__)
+        app.register_blueprint(lesson_routes.lesson_bp, url_prefix='/lessons')
+        self.client = app.test_client()
+        self.documents = {f'lesson{n}': {'title': f'Lesson {n}', 'level': 'beginner'} for n in range(5)}
+
+    def tearDown(self):
+        lesson_model.db = self.original_db
+        lesson_routes.validate_jwt_token = self.original_validate
+
+    def get(self, query=''):
+        return self.client.get(f'/lessons/{query}', headers={'Authorization': 'Bearer token'})
+
+    def test_streams_a_page_with_its_cursor(self):
+        lesson_model.db = FakeClient(self.documents)
+        body = json.loads(self.get('?limit=2').data)
+        self.assertEqual([lesson['id'] for lesson in body['lessons']], ['lesson0', 'lesson1'])
+        self.assertEqual(decode_lesson_cursor(body['next_cursor']), 'lesson1')
+
+    def test_failure_before_the_first_lesson_is_a_500(self):
+        lesson_model.db = FakeClient(self.documents, fail_after=0)
+        self.assertEqual(self.get().status_code, 500)
+
+    def test_failure_mid_stream_reports_an_error_and_a_resume_cursor(self):
+        lesson_model.db = FakeClient(self.documents, fail_after=3)
+        body = json.loads(self.get('?limit=5').data)
+        self.assertEqual([lesson['id'] for lesson in body['lessons']], ['lesson0', 'lesson1', 'lesson2'])
+        self.assertIn('error', body)
+        self.assertEqual(decode_lesson_cursor(body['next_cursor']), 'lesson2')
+
+        lesson_model.db = FakeClient(self.documents)
+        resumed = json.loads(self.get(f"?limit=5&cursor={body['next_cursor']}").data)
+        self.assertEqual([lesson['id'] for lesson in resumed['lessons']], ['lesson3', 'lesson4'])
+        self.assertIsNone(resumed['next_cursor'])
+
+if __name__ == '__main__':
+    unittest.main()
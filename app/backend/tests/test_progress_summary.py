@@ -0,0 +1,74 @@
+import unittest
+from datetime import datetime, timedelta, timezone
+from app.models import progress_model
+from app.models.progress_model import apply_completion, apply_download, build_summary
+
+START = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+class ProgressSummaryTestCase(unittest.TestCase):
+    def setUp(self):
+        self.summary = build_summary({
+            'algebra': {'status': 'in_progress', 'last_accessed': START},
+            'geometry': {'completed': True, 'completed_at': START + timedelta(hours=1)},
+            'physics': {'status': 'in_progress'},
+        }, ['algebra'], now=START)
+
+    def recent_ids(self):
+        return [entry['lesson_id'] for entry in self.summary['recent']]
+
+    def test_backfill_derives_status_sets_and_recent_order(self):
+        self.assertEqual(self.summary['in_progress'], ['algebra', 'physics'])
+        self.assertEqual(self.summary['completed'], ['geometry'])
+        self.assertEqual(self.summary['downloaded'], ['algebra'])
+        self.assertEqual(self.summary['completed_count'], 1)
+        self.assertEqual(self.recent_ids(), ['geometry', 'algebra'])
+
+    def test_completion_moves_lesson_between_sets_and_to_front(self):
+        apply_completion(self.summary, 'algebra', START + timedelta(hours=2))
+
+        self.assertEqual(self.summary['in_progress'], ['physics'])
+        self.assertEqual(self.summary['completed'], ['algebra', 'geometry'])
+        self.assertEqual(self.summary['completed_count'], 2)
+        self.assertEqual(self.recent_ids(), ['algebra', 'geometry'])
+        self.assertTrue(self.summary['lessons']['algebra']['completed'])
+
+    def test_recent_list_is_capped(self):
+        original = progress_model.PROGRESS_RECENT_LIMIT
+        progress_model.PROGRESS_RECENT_LIMIT = 2
+        try:
+            apply_completion(self.summary, 'physics', START + timedelta(hours=3))
+            apply_completion(self.summary, 'chemistry', START + timedelta(hours=4))
+        finally:
+            progress_model.PROGRESS_RECENT_LIMIT = original
+        self.assertEqual(self.recent_ids(), ['chemistry', 'physics'])
+
+    def test_entries_keep_progress_document_fields(self):
+        self.assertEqual(self.summary['lessons']['geometry']['completed_at'], START + timedelta(hours=1))
+        self.assertEqual(self.summary['recent'][0]['completed_at'], START + timedelta(hours=1))
+
+        done = START + timedelta(hours=2)
+        apply_completion(self.summary, 'algebra', done)
+        self.assertEqual(self.summary['lessons']['algebra']['completed_at'], done)
+        self.assertEqual(self.summary['recent'][0]['completed_at'], done)
+
+    def test_oversized_summary_is_stored_as_a_stub(self):
+        original = progress_model.PROGRESS_SUMMARY_MAX_LESSONS
+        progress_model.PROGRESS_SUMMARY_MAX_LESSONS = 3
+        try:
+            self.assertIs(progress_model._stored_form(self.summary), self.summary)
+            apply_completion(self.summary, 'chemistry', START)
+            self.assertEqual(progress_model._stored_form(self.summary), {'overflow': True, 'updated_at': START})
+        finally:
+            progress_model.PROGRESS_SUMMARY_MAX_LESSONS = original
+
+    def test_downloads_are_added_and_removed(self):
+        apply_download(self.summary, 'physics', True, START)
+        apply_download(self.summary, 'physics', True, START)
+        self.assertEqual(self.summary['downloaded'], ['algebra', 'physics'])
+
+        apply_download(self.summary, 'algebra', False, START)
+        self.assertEqual(self.summary['downloaded'], ['physics'])
+        self.assertEqual(self.summary['downloaded_count'], 1)
+
+if __name__ == '__main__':
+    unittest.main()
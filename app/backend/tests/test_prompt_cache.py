@@ -0,0 +1,70 @@
+import os
+import tempfile
+import time
+import unittest
+from app.services.prompt_cache_service import PromptCache
+
+class PromptCacheTestCase(unittest.TestCase):
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp(suffix='.db')
+        os.close(handle)
+        self.addCleanup(os.remove, self.path)
+
+    def test_key_depends_on_model_prompt_and_parameters(self):
+        payload = {"inputs": "Explain gravity", "parameters": {"temperature": 0.7}}
+        key = PromptCache.make_key('mistral', payload)
+        self.assertEqual(key, PromptCache.make_key('mistral', dict(reversed(list(payload.items())))))
+        self.assertNotEqual(key, PromptCache.make_key('other-model', payload))
+        self.assertNotEqual(key, PromptCache.make_key('mistral', {"inputs": "Explain gravity", "parameters": {"temperature": 0.2}}))
+
+    def test_hit_and_miss_counters(self):
+        cache = PromptCache(self.path)
+        self.assertIsNone(cache.get('missing'))
+        cache.set('key', [{"generated_text": "hello"}])
+        self.assertEqual(cache.get('key'), [{"generated_text": "hello"}])
+        stats = cache.stats()
+        self.assertEqual((stats['hits'], stats['misses']), (1, 1))
+
+    def test_entries_survive_reopen(self):
+        PromptCache(self.path).set('key', {"value": 1})
+        self.assertEqual(PromptCache(self.path).get('key'), {"value": 1})
+
+    def test_expired_entries_are_misses(self):
+        cache = PromptCache(self.path)
+        cache.set('key', {"value": 1}, ttl=0.01)
+        time.sleep(0.02)
+        self.assertIsNone(cache.get('key'))
+
+    def test_evicts_least_recently_used(self):
+        cache = PromptCache(self.path, max_bytes=30)
+        cache.set('a', 'x' * 10)
+        cache.set('b', 'y' * 10)
+        cache.get('a')
+        cache.set('c', 'z' * 10)
+        self.assertIsNotNone(cache.get('a'))
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.stats()['evictions'], 1)
+
+    def test_running_total_tracks_inserts_replacements_and_evictions(self):
+        cache = PromptCache(self.path, max_bytes=50)
+
+        def summed():
+            return cache._conn.execute("SELECT COALESCE(SUM(size), 0) FROM prompt_cache").fetchone()[0]
+
+        cache.set('a', 'x' * 10)
+        cache.set('a', 'x' * 20)
+        cache.set('b', 'y' * 20)
+        self.assertEqual(cache.stats()['bytes'], summed())
+        cache.set('c', 'z' * 20)
+        self.assertEqual(cache.stats()['evictions'], 1)
+        self.assertEqual(cache.stats()['bytes'], summed())
+        self.assertLessEqual(summed(), 50)
+
+    def test_running_total_is_seeded_from_an_existing_cache(self):
+        PromptCache(self.path).set('key', 'x' * 10)
+        cache = PromptCache(self.path)
+        cache._conn.execute("DELETE FROM prompt_cache_meta")
+        self.assertEqual(PromptCache(self.path).stats()['bytes'], 12)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,150 @@
+import random
+import unittest
+from collections import Counter
+from app.models import question_bank_model
+from app.models.question_bank_model import (
+    add_generated_questions, add_questions, allocate, generated_lesson_id, sample_in_memory, sample_questions
+)
+
+class FakeSnapshot:
+    def __init__(self, data):
+        self._data = data
+
+    def to_dict(self):
+        return dict(self._data)
+
+class FakeQuery:
+    """Filters, orders and limits a list of stored questions, counting the documents it returns"""
+    def __init__(self, bank, filters=(), order=None, count=None):
+        self.bank = bank
+        self.filters = filters
+        self.order = order
+        self.count = count
+
+    def where(self, field, op, value):
+        return FakeQuery(self.bank, self.filters + ((field, op, value),), self.order, self.count)
+
+    def order_by(self, field):
+        return FakeQuery(self.bank, self.filters, field, self.count)
+
+    def limit(self, count):
+        return FakeQuery(self.bank, self.filters, self.order, count)
+
+    def stream(self):
+        ops = {'==': lambda a, b: a == b, '>=': lambda a, b: a >= b, '<': lambda a, b: a < b}
+        docs = [doc for doc in self.bank.docs.values() if all(ops[op](doc[field], value) for field, op, value in self.filters)]
+        if self.order:
+            docs.sort(key=lambda doc: doc[self.order])
+        docs = docs[:self.count]
+        self.bank.reads += len(docs)
+        return [FakeSnapshot(doc) for doc in docs]
+
+class FakeBank(FakeQuery):
+    def __init__(self):
+        self.docs = {}
+        self.reads = 0
+        super().__init__(self)
+
+    def document(self, doc_id):
+        return (self, doc_id)
+
+class FakeBatch:
+    def __init__(self):
+        self.pending = []
+
+    def set(self, reference, data):
+        self.pending.append((reference, data))
+
+    def commit(self):
+        for (bank, doc_id), data in self.pending:
+            bank.docs[doc_id] = dict(data)
+
+class FakeClient:
+    def __init__(self):
+        self.banks = {}
+
+    @property
+    def bank(self):
+        return self.bank_for('lesson')
+
+    def bank_for(self, lesson_id):
+        return self.banks.setdefault(lesson_id, FakeBank())
+
+    def batch(self):
+        return FakeBatch()
+
+def make_questions(easy, medium, hard):
+    questions = []
+    for difficulty, count in (('easy', easy), ('medium', medium), ('hard', hard)):
+        questions += [{'id': f'{difficulty}{n}', 'difficulty': difficulty, 'correct_answer': 'A'} for n in range(count)]
+    return questions
+
+class QuestionBankTestCase(unittest.TestCase):
+    def setUp(self):
+        self.client = FakeClient()
+        self.originals = (question_bank_model.db, question_bank_model.question_bank)
+        question_bank_model.db = self.client
+        question_bank_model.question_bank = self.client.bank_for
+        random.seed(7)
+
+    def tearDown(self):
+        question_bank_model.db, question_bank_model.question_bank = self.originals
+
+    def test_allocation_follows_difficulty_mix(self):
+        self.assertEqual(allocate(15), {'easy': 5, 'medium': 6, 'hard': 4})
+        self.assertEqual(allocate(10), {'easy': 3, 'medium': 4, 'hard': 3})
+
+    def test_sample_is_stratified_and_reads_only_selected_questions(self):
+        add_questions('lesson', make_questions(100, 100, 100))
+        self.client.bank.reads = 0
+
+        questions = sample_questions('lesson', 10)
+
+        self.assertEqual(len({question['id'] for question in questions}), 10)
+        self.assertEqual(Counter(question['difficulty'] for question in questions), {'easy': 3, 'medium': 4, 'hard': 3})
+        self.assertEqual(self.client.bank.reads, 10)
+
+    def test_short_strata_are_topped_up_from_the_whole_bank(self):
+        add_questions('lesson', make_questions(1, 20, 0))
+        questions = sample_questions('lesson', 10)
+        self.assertEqual(len({question['id'] for question in questions}), 10)
+        self.assertIn('easy0', {question['id'] for question in questions})
+
+    def test_samples_are_not_contiguous_runs_of_the_key_order(self):
+        add_questions('lesson', make_questions(0, 100, 0))
+        order = [doc['id'] for doc in sorted(self.client.bank.docs.values(), key=lambda doc: doc['random_key'])]
+
+        def contiguous(questions):
+            positions = sorted(order.index(question['id']) for question in questions)
+            return positions[-1] - positions[0] == len(positions) - 1
+
+        samples = [sample_questions('lesson', 6, {'medium': 1.0}) for _ in range(20)]
+        self.assertTrue(all(len(sample) == 6 for sample in samples))
+        self.assertFalse(any(contiguous(sample) for sample in samples))
+
+    def test_generated_quizzes_grow_each_lessons_bank(self):
+        quizzes = [[{'question': 'What is 1 + 1?', 'correct_answer': '2'}], [{'question': 'What is 2 + 2?', 'correct_answer': '4'}]]
+        self.assertEqual(add_generated_questions('math', 'beginner', quizzes), 2)
+        add_generated_questions('math', 'beginner', [[{'question': 'What is 1 + 1?', 'correct_answer': '2'},
+                                                      {'question': 'What is 3 + 3?', 'correct_answer': '6'}]])
+
+        first = self.client.bank_for(generated_lesson_id('math', 'beginner', 0))
+        second = self.client.bank_for(generated_lesson_id('math', 'beginner', 1))
+        self.assertEqual(sorted(doc['question'] for doc in first.docs.values()), ['What is 1 + 1?', 'What is 3 + 3?'])
+        self.assertEqual(len(second.docs), 1)
+        self.assertEqual(len(sample_questions(generated_lesson_id('math', 'beginner', 0), 5)), 2)
+
+    def test_empty_bank_samples_nothing(self):
+        self.assertEqual(sample_questions('lesson', 10), [])
+
+    def test_legacy_questions_get_ids_difficulty_and_keys(self):
+        entries = add_questions('lesson', [{'question': 'Why?'}, {'question': 'How?', 'difficulty': 'HARD'}])
+        self.assertEqual([entry['id'] for entry in entries], ['q0', 'q1'])
+        self.assertEqual([entry['difficulty'] for entry in entries], ['medium', 'hard'])
+        self.assertTrue(all(0 <= entry['random_key'] < 1 for entry in entries))
+
+        selected = sample_in_memory(entries, 5)
+        self.assertEqual(sorted(entry['id'] for entry in selected), ['q0', 'q1'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+import threading
+import time
+import unittest
+from app.services.api_service import generate_quizzes, remove_near_duplicates
+
+TOPICS = [
+    "chlorophyll", "stomata", "glucose", "sunlight", "carbon", "oxygen",
+    "water", "roots", "leaves", "enzymes", "energy", "thylakoid",
+]
+
+def quiz_text(seed, count=3):
+    lines = []
+    for i in range(count):
+        subject = TOPICS[(seed * count + i) % len(TOPICS)]
+        lines += [
+            f"Q: Why does {subject} matter?",
+            "A) one", "B) two", "C) three", "D) four",
+            "Correct: B"
+        ]
+    return "\n".join(lines)
+
+class FakeManager:
+    def __init__(self, delay=0.1, empty_seeds=()):
+        self.delay = delay
+        self.empty_seeds = set(empty_seeds)
+        self.seeds = []
+        self.lock = threading.Lock()
+
+    def make_request(self, model_name, payload, timeout=10, max_retries=3, use_cache=True):
+        seed = payload["parameters"]["seed"]
+        with self.lock:
+            self.seeds.append(seed)
+        time.sleep(self.delay)
+        if seed in self.empty_seeds:
+            return [{"generated_text": "no questions here"}]
+        return [{"generated_text": quiz_text(seed)}]
+
+class QuizGenerationTestCase(unittest.TestCase):
+    def test_batches_run_concurrently(self):
+        manager = FakeManager(delay=0.2)
+        started = time.monotonic()
+        questions = generate_quizzes("Photosynthesis", api_manager=manager)
+        self.assertEqual(len(questions), 10)
+        self.assertLess(time.monotonic() - started, 0.6)
+        self.assertEqual(sorted(manager.seeds), [0, 1, 2, 3])
+
+    def test_failed_batches_are_topped_up(self):
+        manager = FakeManager(delay=0.01, empty_seeds={0, 1})
+        questions = generate_quizzes("Photosynthesis", api_manager=manager)
+        self.assertEqual(len(questions), 10)
+        self.assertGreater(len(manager.seeds), 4)
+
+    def test_falls_back_when_nothing_generated(self):
+        manager = FakeManager(delay=0, empty_seeds=set(range(100)))
+        questions = generate_quizzes("Photosynthesis", api_manager=manager)
+        self.assertEqual(len(questions), 1)
+        self.assertEqual(questions[0]["correct_answer"], "Core principles and fundamentals")
+
+    def test_remove_near_duplicates(self):
+        questions = [
+            {"question": "What is the main function of chlorophyll?"},
+            {"question": "What is the main function of chlorophyll"},
+            {"question": "Where does the Calvin cycle take place?"},
+        ]
+        unique = remove_near_duplicates(questions)
+        self.assertEqual([q["question"] for q in unique], [
+            "What is the main function of chlorophyll?",
+            "Where does the Calvin cycle take place?",
+        ])
+
+if __name__ == '__main__':
+    unittest.main()
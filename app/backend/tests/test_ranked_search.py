@@ -0,0 +1,93 @@
+import unittest
+from types import SimpleNamespace
+from app.services import ranked_search_service
+from app.services.ranked_search_service import SearchEngine, decode_cursor, encode_cursor, stem, tokenize
+
+class TokenizerTestCase(unittest.TestCase):
+    def test_stemming_groups_word_forms(self):
+        self.assertEqual({stem('learning'), stem('learned'), stem('learns')}, {'learn'})
+        self.assertEqual(stem('class'), 'class')
+        self.assertEqual(tokenize('The Basics of Networks'), ['basic', 'network'])
+
+    def test_cursor_round_trip(self):
+        self.assertEqual(decode_cursor(encode_cursor(40)), 40)
+        self.assertEqual(decode_cursor(None), 0)
+        with self.assertRaises(ValueError):
+            decode_cursor('not-a-cursor')
+
+class SearchEngineTestCase(unittest.TestCase):
+    def setUp(self):
+        self.engine = SearchEngine()
+        self.engine.update_document('machine learning', {
+            'name': 'Machine Learning',
+            'summary:beginner': 'Models learn patterns from data.',
+        })
+        self.engine.update_document('python', {
+            'name': 'Python',
+            'lessons:beginner': [['Python is used for data analysis and machine learning scripts.']],
+        })
+        self.engine.update_document('cooking', {'name': 'Cooking', 'summary:beginner': 'Recipes and kitchen basics.'})
+
+    def keys(self, query, k=10, accept=None):
+        return [key for key, _ in self.engine.search(query, k, accept)]
+
+    def test_name_matches_outrank_body_matches(self):
+        self.assertEqual(self.keys('machine learning'), ['machine learning', 'python'])
+
+    def test_matches_text_inside_generated_content(self):
+        self.assertEqual(self.keys('analysis'), ['python'])
+        self.assertEqual(self.keys('recipe'), ['cooking'])
+
+    def test_typos_are_tolerated(self):
+        self.assertEqual(self.keys('pyhton'), ['python'])
+        self.assertEqual(self.keys('machin'), ['machine learning', 'python'])
+        self.assertEqual(self.keys('xyzzy'), [])
+
+    def test_top_k_and_filters(self):
+        self.assertEqual(len(self.keys('learning', k=1)), 1)
+        self.assertEqual(self.keys('learning', accept=lambda key: key != 'machine learning'), ['python'])
+
+    def test_incremental_updates(self):
+        self.engine.update_document('cooking', {'lessons:advanced': 'Sous vide and fermentation.'})
+        self.assertEqual(self.keys('fermentation'), ['cooking'])
+        self.assertEqual(self.keys('recipes'), ['cooking'])
+
+        self.engine.remove_document('cooking')
+        self.assertEqual(self.keys('fermentation'), [])
+        self.assertNotIn('ferment', self.engine.postings)
+        self.assertEqual(self.engine.stats()['documents'], 2)
+
+def content_change(kind, doc_id, data):
+    document = SimpleNamespace(id=doc_id, to_dict=lambda: data)
+    return SimpleNamespace(type=SimpleNamespace(name=kind), document=document)
+
+class ContentListenerTestCase(unittest.TestCase):
+    def setUp(self):
+        self.original = ranked_search_service.search_engine
+        self.engine = ranked_search_service.search_engine = SearchEngine()
+        ranked_search_service.index_topic('t1', {'name': 'Python', 'description': 'A language'})
+
+    def tearDown(self):
+        ranked_search_service.search_engine = self.original
+
+    def deliver(self, *changes):
+        ranked_search_service._on_content_snapshot([], list(changes), None)
+
+    def test_listener_changes_keep_the_index_current(self):
+        self.deliver(
+            content_change('ADDED', 'python_beginner', {'level': 'beginner', 'summary': 'Variables and loops'}),
+            content_change('ADDED', 'Cooking Basics_beginner', {'summary': 'Kitchen fermentation'}),
+        )
+        self.assertEqual([key for key, _ in self.engine.search('loops', 5)], ['python'])
+        self.assertEqual(self.engine.meta['cooking basics']['levels'], ['beginner'])
+
+        self.deliver(content_change('REMOVED', 'python_beginner', {'level': 'beginner'}))
+        self.assertEqual(self.engine.search('loops', 5), [])
+        # The topic's own fields stay searchable
+        self.assertEqual([key for key, _ in self.engine.search('language', 5)], ['python'])
+
+        self.deliver(content_change('REMOVED', 'Cooking Basics_beginner', {}))
+        self.assertNotIn('cooking basics', self.engine.fields)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,46 @@
+import unittest
+from app.services.search_service import TopicIndex
+
+class FakeSnapshot:
+    def __init__(self, doc_id, data):
+        self.id = doc_id
+        self._data = data
+
+    def to_dict(self):
+        return dict(self._data)
+
+class TopicIndexTestCase(unittest.TestCase):
+    def setUp(self):
+        self.index = TopicIndex()
+        self.index.replace_all([
+            FakeSnapshot('algebra', {'name': 'Algebra Basics'}),
+            FakeSnapshot('ml', {'name': 'Machine Learning'}),
+            FakeSnapshot('python', {'name': 'Python Programming'}),
+        ])
+
+    def names(self, results):
+        return [topic['name'] for topic in results]
+
+    def test_matches_case_insensitive_substrings(self):
+        self.assertEqual(self.names(self.index.search('LEARN')), ['Machine Learning'])
+        self.assertEqual(self.names(self.index.search('ing')), ['Machine Learning', 'Python Programming'])
+        self.assertEqual(self.names(self.index.search('g')), ['Algebra Basics', 'Machine Learning', 'Python Programming'])
+        self.assertEqual(self.index.search('gram pro'), [])
+
+    def test_empty_query_returns_every_topic(self):
+        self.assertEqual(len(self.index.search('')), 3)
+
+    def test_category_filter_limits_results(self):
+        self.assertEqual(self.names(self.index.search('ing', {'python', 'algebra'})), ['Python Programming'])
+
+    def test_updates_and_removals_are_reflected(self):
+        self.index.upsert('python', {'name': 'Python for Data Science'})
+        self.index.remove('ml')
+
+        self.assertEqual(self.names(self.index.search('data')), ['Python for Data Science'])
+        self.assertEqual(self.index.search('programming'), [])
+        self.assertEqual(self.index.search('machine'), [])
+        self.assertNotIn('mac', self.index.postings)
+
+if __name__ == '__main__':
+    unittest.main()
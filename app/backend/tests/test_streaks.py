@@ -0,0 +1,95 @@
+import unittest
+from datetime import date, datetime, timedelta, timezone
+from app.models import streak_model
+from app.models.streak_model import ActivityLog
+from app.services import firebase_service
+
+DAY = date(2024, 3, 1)
+
+def log_of(*offsets):
+    log = ActivityLog()
+    for offset in offsets:
+        log = log.with_day(DAY + timedelta(days=offset))
+    return log
+
+class ActivityLogTestCase(unittest.TestCase):
+    def test_current_streak_counts_back_from_today(self):
+        log = log_of(0, 1, 3, 4, 5)
+        self.assertEqual(log.current_streak(DAY + timedelta(days=5)), 3)
+        # Still alive the day after, until that day ends
+        self.assertEqual(log.current_streak(DAY + timedelta(days=6)), 3)
+        self.assertEqual(log.current_streak(DAY + timedelta(days=7)), 0)
+        self.assertEqual(log_of(0, 1, 2).current_streak(DAY + timedelta(days=2)), 3)
+        self.assertEqual(ActivityLog().current_streak(DAY), 0)
+
+    def test_longest_streak(self):
+        self.assertEqual(log_of(0, 1, 2, 3, 6, 7, 9).longest_streak(), 4)
+        self.assertEqual(log_of(5).longest_streak(), 1)
+        self.assertEqual(ActivityLog().longest_streak(), 0)
+
+    def test_days_before_the_epoch_rebase_the_bitmap(self):
+        log = log_of(3, 0)
+        self.assertEqual(log.epoch, DAY)
+        self.assertTrue(log.is_active(DAY) and log.is_active(DAY + timedelta(days=3)))
+        self.assertFalse(log.is_active(DAY + timedelta(days=1)))
+
+    def test_heatmap_window(self):
+        log = log_of(0, 2, 3)
+        self.assertEqual(log.heatmap(DAY + timedelta(days=3), 6), [0, 0, 1, 0, 1, 1])
+        self.assertEqual(log.heatmap(DAY + timedelta(days=5), 3), [1, 0, 0])
+
+    def test_document_round_trip(self):
+        log = log_of(*range(0, 400, 3))
+        document = log.to_document()
+        self.assertIsInstance(document['bits'], bytes)
+        self.assertLessEqual(len(document['bits']), 50)
+        restored = ActivityLog.from_document(document)
+        self.assertEqual((restored.epoch, restored.bits), (log.epoch, log.bits))
+        self.assertEqual(document['active_days'], 134)
+
+class FakeSnapshot:
+    def __init__(self, path, data):
+        self.reference = type('Reference', (), {'path': path})()
+        self.exists = data is not None
+        self._data = data
+
+    def to_dict(self):
+        return dict(self._data)
+
+class FakeClient:
+    """Answers get_all from a dict of documents by path"""
+    def __init__(self, documents):
+        self.documents = documents
+
+    def document(self, path):
+        return path
+
+    def get_all(self, paths):
+        return [FakeSnapshot(path, self.documents.get(path)) for path in paths]
+
+class LegacyStreakTestCase(unittest.TestCase):
+    def setUp(self):
+        self.originals = (firebase_service.db, streak_model.today_utc)
+        streak_model.today_utc = lambda: DAY
+
+    def tearDown(self):
+        firebase_service.db, streak_model.today_utc = self.originals
+
+    def load_with_last_login(self, last_day):
+        last_login = datetime(last_day.year, last_day.month, last_day.day, 18, tzinfo=timezone.utc)
+        firebase_service.db = FakeClient({'users/u1': {'streak': 3, 'last_login': last_login}})
+        return streak_model._load_activity('u1')
+
+    def test_live_legacy_streak_is_seeded(self):
+        self.assertEqual(self.load_with_last_login(DAY).current_streak(DAY), 3)
+        log = self.load_with_last_login(DAY - timedelta(days=1))
+        self.assertEqual(log.current_streak(DAY), 3)
+        self.assertFalse(log.is_active(DAY))
+
+    def test_lapsed_legacy_streak_is_not_seeded(self):
+        log = self.load_with_last_login(DAY - timedelta(days=2))
+        self.assertIsNone(log.epoch)
+        self.assertEqual(log.longest_streak(), 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+import time
+import unittest
+import fakeredis
+from app.services import token_cache_service
+from app.services.token_cache_service import (
+    clear_token_cache, get_principal, hash_token, invalidate_user, is_revoked, revoke_token, store_principal
+)
+from app.services.redis_service import set_redis_client
+
+class TokenCacheTestCase(unittest.TestCase):
+    def setUp(self):
+        clear_token_cache()
+
+    def tearDown(self):
+        clear_token_cache()
+        set_redis_client(None)
+
+    def test_cached_principal_is_returned_for_matching_user(self):
+        token_hash = hash_token('token-a')
+        store_principal(token_hash, 'user-1', {'uid': 'user-1'})
+
+        self.assertEqual(get_principal(token_hash, 'user-1').user_data, {'uid': 'user-1'})
+        self.assertIsNone(get_principal(token_hash, 'user-2'))
+
+    def test_principal_expires_after_ttl(self):
+        original_ttl = token_cache_service.TOKEN_CACHE_TTL
+        token_cache_service.TOKEN_CACHE_TTL = 0.05
+        try:
+            token_hash = hash_token('token-a')
+            store_principal(token_hash, 'user-1', {'uid': 'user-1'})
+            time.sleep(0.1)
+            self.assertIsNone(get_principal(token_hash, 'user-1'))
+        finally:
+            token_cache_service.TOKEN_CACHE_TTL = original_ttl
+
+    def test_invalidate_user_drops_all_their_tokens(self):
+        store_principal(hash_token('token-a'), 'user-1', {})
+        store_principal(hash_token('token-b'), 'user-1', {})
+        store_principal(hash_token('token-c'), 'user-2', {})
+
+        invalidate_user('user-1')
+
+        self.assertIsNone(get_principal(hash_token('token-a'), 'user-1'))
+        self.assertIsNone(get_principal(hash_token('token-b'), 'user-1'))
+        self.assertIsNotNone(get_principal(hash_token('token-c'), 'user-2'))
+
+    def test_revoked_token_is_rejected_by_other_workers(self):
+        set_redis_client(fakeredis.FakeRedis())
+        store_principal(hash_token('token-a'), 'user-1', {})
+
+        revoke_token('Bearer token-a', time.time() + 60)
+
+        self.assertIsNone(get_principal(hash_token('token-a'), 'user-1'))
+        # Another worker has no local revocation but shares Redis
+        clear_token_cache()
+        self.assertTrue(is_revoked(hash_token('token-a')))
+        self.assertFalse(is_revoked(hash_token('token-b')))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+import threading
+import time
+import unittest
+from datetime import datetime, timezone
+from app.models.progress_model import apply_completion, build_summary, co_learner_updates
+from app.services import recommendation_service
+from app.services.recommendation_service import TopicGraph, stats_from_memberships
+
+class TopicGraphTestCase(unittest.TestCase):
+    def setUp(self):
+        self.topics = {
+            'algebra': {'name': 'Algebra', 'related_topics': ['calculus']},
+            'calculus': {'name': 'Calculus', 'related_topics': []},
+            'python': {'name': 'Python', 'related_topics': ['ml']},
+            'ml': {'name': 'Machine Learning', 'related_topics': []},
+            'cooking': {'name': 'Cooking'},
+        }
+        memberships = [
+            ('u1', 'python'), ('u1', 'statistics-missing'), ('u1', 'algebra'),
+            ('u2', 'python'), ('u2', 'ml'),
+            ('u3', 'cooking'),
+        ]
+        self.graph = TopicGraph.build(self.topics, stats_from_memberships(memberships))
+
+    def names(self, topics):
+        return [topic['name'] for topic in topics]
+
+    def test_related_topics_are_linked_in_both_directions(self):
+        self.assertEqual(self.names(self.graph.recommend(['calculus'])), ['Algebra'])
+        self.assertEqual(self.names(self.graph.recommend(['algebra'])), ['Calculus', 'Python'])
+
+    def test_multiple_seeds_are_scored_together(self):
+        results = self.names(self.graph.recommend(['python', 'calculus']))
+        # Each is linked to one seed by related_topics and to python through a shared user
+        self.assertEqual(set(results[:2]), {'Algebra', 'Machine Learning'})
+        self.assertNotIn('Python', results)
+        self.assertNotIn('Cooking', results)
+
+    def test_limit_exclusions_and_unknown_seeds(self):
+        self.assertEqual(len(self.graph.recommend(['python'], limit=1)), 1)
+        self.assertNotIn('Machine Learning', self.names(self.graph.recommend(['python'], exclude=['ml'])))
+        self.assertEqual(self.graph.recommend(['unknown']), [])
+
+    def test_sample_returns_distinct_topics(self):
+        self.assertEqual(len({topic['name'] for topic in self.graph.sample(3)}), 3)
+
+class TopicStatsTestCase(unittest.TestCase):
+    def test_first_study_of_a_lesson_counts_learners_and_pairs(self):
+        summary = build_summary({'algebra': {'status': 'in_progress'}, 'python': {'status': 'in_progress'}}, [])
+        updates = co_learner_updates(summary, {'ml'})
+
+        self.assertEqual(updates['topic_stats/ml']['learners'].value, 1)
+        self.assertEqual(sorted(updates['topic_stats/ml']['co_learners']), ['algebra', 'python'])
+        self.assertEqual(list(updates['topic_stats/python']['co_learners']), ['ml'])
+        self.assertNotIn('learners', updates['topic_stats/algebra'])
+
+    def test_revisits_do_not_count(self):
+        summary = build_summary({'algebra': {'status': 'in_progress'}}, [])
+        before = set(summary['lessons'])
+        apply_completion(summary, 'algebra', datetime.now(timezone.utc))
+        self.assertEqual(co_learner_updates(summary, set(summary['lessons']) - before), {})
+
+class GraphBuildTestCase(unittest.TestCase):
+    def setUp(self):
+        self.originals = (recommendation_service._graph, recommendation_service.refresh_topic_graph)
+        recommendation_service._graph = None
+
+    def tearDown(self):
+        recommendation_service._graph, recommendation_service.refresh_topic_graph = self.originals
+
+    def test_concurrent_cold_requests_build_once(self):
+        builds = []
+
+        def build():
+            builds.append(1)
+            time.sleep(0.05)
+            recommendation_service._graph = TopicGraph.build({'python': {'name': 'Python'}}, {})
+            return recommendation_service._graph
+
+        recommendation_service.refresh_topic_graph = build
+        graphs = []
+        threads = [threading.Thread(target=lambda: graphs.append(recommendation_service.get_topic_graph())) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(builds), 1)
+        self.assertEqual(len({id(graph) for graph in graphs}), 1)
+
+if __name__ == '__main__':
+    unittest.main()
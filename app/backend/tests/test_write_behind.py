@@ -0,0 +1,95 @@
+import unittest
+from google.api_core.exceptions import NotFound
+from app.services.write_behind_service import FIRESTORE_BATCH_LIMIT, WriteBehindBuffer
+
+class RecordingBatch:
+    def __init__(self, client):
+        self.client = client
+        self.writes = []
+
+    def update(self, reference, fields):
+        self.writes.append((reference.path, fields))
+
+    def commit(self):
+        if self.client.fail_next:
+            self.client.fail_next = False
+            raise RuntimeError("commit failed")
+        if any(path in self.client.deleted for path, _ in self.writes):
+            raise NotFound("No document to update")
+        self.client.commits.append(self.writes)
+
+class RecordingReference:
+    def __init__(self, client, path):
+        self.client = client
+        self.path = path
+
+    def update(self, fields):
+        if self.path in self.client.deleted:
+            raise NotFound("No document to update")
+        self.client.commits.append([(self.path, fields)])
+
+class RecordingClient:
+    """Records batched writes in place of a Firestore client"""
+    def __init__(self):
+        self.commits = []
+        self.deleted = set()
+        self.fail_next = False
+
+    def batch(self):
+        return RecordingBatch(self)
+
+    def document(self, path):
+        return RecordingReference(self, path)
+
+class WriteBehindTestCase(unittest.TestCase):
+    def setUp(self):
+        self.client = RecordingClient()
+        self.buffer = WriteBehindBuffer(flush_interval=60, max_pending=10000, client_getter=lambda: self.client)
+
+    def test_updates_are_coalesced_per_document(self):
+        for second in range(100):
+            self.buffer.set_fields('users/u1', {'last_login': second})
+
+        self.assertEqual(self.buffer.flush(), 1)
+        [[(path, data)]] = self.client.commits
+        self.assertEqual(path, 'users/u1')
+        self.assertEqual(data, {'last_login': 99})
+        self.assertEqual(self.buffer.stats()['write_reduction'], 100.0)
+
+    def test_flush_splits_into_firestore_sized_batches(self):
+        for index in range(FIRESTORE_BATCH_LIMIT + 1):
+            self.buffer.set_fields(f'users/u{index}', {'last_login': index})
+
+        self.assertEqual(self.buffer.flush(), FIRESTORE_BATCH_LIMIT + 1)
+        self.assertEqual([len(batch) for batch in self.client.commits], [FIRESTORE_BATCH_LIMIT, 1])
+
+    def test_failed_batch_is_requeued_behind_newer_writes(self):
+        self.buffer.set_fields('users/u1', {'last_login': 1, 'fcm_token': 'old'})
+        self.client.fail_next = True
+        self.assertEqual(self.buffer.flush(), 0)
+
+        self.buffer.set_fields('users/u1', {'last_login': 2})
+        self.assertEqual(self.buffer.flush(), 1)
+
+        [[(_, data)]] = self.client.commits
+        self.assertEqual(data, {'last_login': 2, 'fcm_token': 'old'})
+
+    def test_updates_to_deleted_documents_are_dropped(self):
+        self.client.deleted.add('users/gone')
+        self.buffer.set_fields('users/u1', {'last_login': 1})
+        self.buffer.set_fields('users/gone', {'last_login': 1})
+
+        self.assertEqual(self.buffer.flush(), 1)
+        self.assertEqual(self.client.commits, [[('users/u1', {'last_login': 1})]])
+        self.assertEqual(self.buffer.stats()['pending_documents'], 0)
+        self.assertEqual(self.buffer.stats()['errors'], 0)
+
+    def test_stop_flushes_pending_writes(self):
+        self.buffer.start()
+        self.buffer.set_fields('users/u1', {'last_login': 1})
+        self.buffer.stop()
+        self.assertEqual(len(self.client.commits), 1)
+        self.assertEqual(self.buffer.stats()['pending_documents'], 0)
+
+if __name__ == '__main__':
+    unittest.main()